@@ -0,0 +1,88 @@
+"""Pre-aggregated chart data for the Charts page.
+
+The Charts page used to hand every row to px.box and recompute the operator
+rating means and route counts on each rerun, so the browser received one
+point per bus. Here the summaries are computed once per data load: box-plot
+statistics (quartiles and Tukey whiskers) per Bus_Type, rating stats per
+operator and route frequencies. Outliers are kept only as a capped,
+reproducible sample, so the chart payload depends on the number of bus
+types and the cap, not on the table size.
+"""
+
+from dataclasses import dataclass # Imports dataclass for the aggregate record.
+
+import pandas as pd # Imports the pandas library for data handling.
+
+OUTLIERS_PER_TYPE = 50 # Most outlier points kept per Bus_Type.
+SAMPLE_SEED = 0 # Fixed seed so the sampled outliers do not change between reruns.
+
+BOX_COLUMNS = ['Bus_Type', 'count', 'min', 'lowerfence', 'q1', 'median', 'q3', 'upperfence', 'max', 'mean']
+
+
+@dataclass
+class ChartAggregates:
+    """Everything the Charts page draws, a few rows per bus type, operator or route."""
+    price_boxes: pd.DataFrame # BOX_COLUMNS, one row per Bus_Type.
+    price_outliers: pd.DataFrame # Bus_Type, Price, Bus_Name; at most OUTLIERS_PER_TYPE rows per type.
+    operator_ratings: pd.DataFrame # Bus_Name, Ratings (mean), count; best first.
+    route_counts: pd.DataFrame # Route_name, Count; most frequent first.
+    rating_bounds: tuple # (min rating, max rating) over rated buses.
+
+    def outlier_sample(self, per_type):
+        """The first `per_type` sampled outliers of each Bus_Type (cap <= OUTLIERS_PER_TYPE)."""
+        return self.price_outliers.groupby('Bus_Type', observed=True, sort=False).head(per_type)
+
+
+# --- Summaries ---
+
+def price_box_stats(df, outliers_per_type=OUTLIERS_PER_TYPE):
+    """Returns (per-type box statistics, sampled outlier rows) for Price by Bus_Type."""
+    prices = df[['Bus_Type', 'Price', 'Bus_Name']].dropna(subset=['Bus_Type', 'Price'])
+    groups = prices.groupby('Bus_Type', observed=True)['Price']
+    quartiles = groups.quantile([0.25, 0.5, 0.75]).unstack()
+    quartiles.columns = ['q1', 'median', 'q3']
+    stats = groups.agg(['count', 'min', 'max', 'mean']).join(quartiles)
+
+    # Tukey whiskers: the most extreme prices within 1.5 IQR of the box.
+    iqr = stats['q3'] - stats['q1']
+    low = prices['Bus_Type'].map(stats['q1'] - 1.5 * iqr).astype(float)
+    high = prices['Bus_Type'].map(stats['q3'] + 1.5 * iqr).astype(float)
+    inside = prices['Price'].between(low, high)
+    whiskers = prices[inside].groupby('Bus_Type', observed=True)['Price'].agg(lowerfence='min', upperfence='max')
+    stats = stats.join(whiskers).reset_index()
+    stats['Bus_Type'] = stats['Bus_Type'].astype(str)
+
+    outliers = prices[~inside].sample(frac=1, random_state=SAMPLE_SEED) # Shuffled once, then capped per type.
+    outliers = outliers.groupby('Bus_Type', observed=True, sort=False).head(outliers_per_type)
+    outliers = outliers.assign(Bus_Type=outliers['Bus_Type'].astype(str), Bus_Name=outliers['Bus_Name'].astype(str))
+    return stats[BOX_COLUMNS], outliers.reset_index(drop=True)
+
+
+def operator_rating_stats(df):
+    """Returns mean rating and bus count per operator, highest mean first."""
+    rated = df.dropna(subset=['Ratings'])
+    stats = rated.groupby('Bus_Name', observed=True)['Ratings'].agg(['mean', 'count']).reset_index()
+    stats = stats.rename(columns={'mean': 'Ratings'})
+    stats['Bus_Name'] = stats['Bus_Name'].astype(str)
+    return stats.sort_values('Ratings', ascending=False, kind='stable', ignore_index=True)
+
+
+def route_frequencies(df):
+    """Returns the number of buses per route, most frequent first."""
+    counts = df['Route_name'].value_counts().reset_index()
+    counts.columns = ['Route_name', 'Count']
+    counts['Route_name'] = counts['Route_name'].astype(str)
+    return counts[counts['Count'] > 0].reset_index(drop=True) # Drops unused categories.
+
+
+def build_chart_aggregates(df, outliers_per_type=OUTLIERS_PER_TYPE):
+    """Computes every Charts page summary from the cleaned dashboard frame."""
+    boxes, outliers = price_box_stats(df, outliers_per_type)
+    ratings = df['Ratings'].dropna()
+    return ChartAggregates(
+        price_boxes=boxes,
+        price_outliers=outliers,
+        operator_ratings=operator_rating_stats(df),
+        route_counts=route_frequencies(df),
+        rating_bounds=(float(ratings.min()), float(ratings.max())) if len(ratings) else (0.0, 0.0),
+    )
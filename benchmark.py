@@ -0,0 +1,399 @@
+"""Benchmark harness for the cleaning, loading and dashboard pipeline.
+
+Scales `cleaned dataset/df_final_bus_details.csv` to synthetic datasets of
+any size by replicating it with jittered times, prices and seat counts and
+renamed services, so the operator, route and bus-type mix stays exactly
+that of the scraped data. The rows are written back in the raw scraped
+text format ('INR 1,469', '29 Seats available'). Each size is then run
+through the pipeline:
+
+    clean      cleaning.clean_files over the synthetic CSV
+    load       loader.load_chunks into a fresh SQLite file (or, with --mysql,
+               a scratch MySQL database named by REDBUS_BENCH_DB)
+    snapshot   snapshot.refresh_snapshot(rebuild=True), the fetch and cleaning
+               behind load_data_from_db, plus a warm load_snapshot
+    engine     FilterEngine build
+    filter/*   every Bus Routes filter combination (engine query + first page),
+               and the same combinations pushed down to SQL
+    charts     aggregations.build_chart_aggregates
+
+Wall time and peak resident memory are recorded per stage and written to a
+JSON file. With --baseline the run is compared stage by stage against a
+stored result file, and regressions beyond --tolerance are flagged. The
+committed bench_baseline.json covers the default 100k rows on SQLite;
+larger sizes are opt-in and need their own baseline (--save-baseline).
+
+    python benchmark.py --baseline bench_baseline.json
+    python benchmark.py --rows 1000000 10000000 --baseline bench_large.json --save-baseline
+"""
+
+import argparse # Imports argparse for the command line interface.
+import itertools # Imports itertools for the filter combinations.
+import json # Imports json for the result files.
+import os # Imports os for paths and memory readings.
+import platform # Imports platform for the run metadata.
+import sqlite3 # Imports sqlite3 for the offline database.
+import sys # Imports sys for the exit code.
+import threading # Imports threading for the memory sampler.
+import time # Imports time for the stage timings.
+from dataclasses import asdict, dataclass # Imports dataclass for the result records.
+
+import numpy as np # Imports numpy for the synthetic jitter.
+import pandas as pd # Imports the pandas library for data handling.
+
+from aggregations import build_chart_aggregates # Imports the Charts page aggregations.
+from cleaning import CLEANED_PATH, clean_chunk, clean_files, iter_clean_chunks, to_export_frame # Imports the cleaning pipeline.
+from db_pool import DatabaseConfig # Imports the REDBUS_DB_* configuration.
+from filter_engine import FilterEngine # Imports the Bus Routes filter engine.
+from loader import bus_key, load_chunks # Imports the bulk loader and its natural key.
+from queries import BusFilters, count_buses, fetch_page # Imports the SQL query layer.
+from snapshot import load_snapshot, refresh_snapshot # Imports the dashboard snapshot.
+
+DATA_DIR = "bench_data" # Synthetic CSVs, SQLite files and snapshots.
+RESULTS_PATH = "bench_results.json" # Default result file.
+DEFAULT_SIZES = [100_000] # The sizes bench_baseline.json covers; 1M/10M runs are opt-in via --rows.
+BENCH_DB_ENV = "REDBUS_BENCH_DB" # Scratch MySQL database for --mysql runs; never the app's REDBUS_DB_NAME.
+
+RAW_COLUMNS = ['Bus_Name', 'Bus_Type', 'Departure_Time', 'Destination_Time', 'Total_Duration',
+               'Ratings', 'Price', 'Seats_Available', 'Route_name', 'Route_Link']
+
+
+@dataclass
+class StageResult:
+    """Timing and memory of one benchmark stage at one dataset size."""
+    stage: str
+    rows: int # Synthetic dataset size.
+    seconds: float
+    peak_rss_mb: float # Highest resident set size seen during the stage.
+    rss_delta_mb: float # Peak minus the resident size when the stage started.
+    result_rows: int = None # Rows produced/matched, where meaningful.
+
+    @property
+    def key(self):
+        return f"{self.rows}:{self.stage}"
+
+
+# --- Memory Sampling ---
+
+def _rss_bytes():
+    """Current resident set size (Linux /proc; falls back to the peak from getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource # Imports resource lazily; not available on Windows.
+        scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is bytes on macOS, KiB elsewhere.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _PeakSampler:
+    """Polls the resident size on a background thread while a stage runs."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def measure(results, stage, rows, fn, repeat=1):
+    """Runs `fn` `repeat` times, records the fastest run and returns the last return value."""
+    best, value, sampler = None, None, None
+    for _ in range(repeat):
+        with _PeakSampler() as run:
+            started = time.perf_counter()
+            value = fn()
+            elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best, sampler = elapsed, run
+    size = len(value) if hasattr(value, "__len__") else None
+    result = StageResult(stage, rows, best, sampler.peak / 2**20, (sampler.peak - sampler.start) / 2**20, size)
+    results.append(result)
+    print(f"  {stage:<48} {best:9.3f}s  peak {result.peak_rss_mb:8.1f} MB  (+{result.rss_delta_mb:.1f})", flush=True)
+    return value
+
+
+# --- Synthetic Data ---
+
+def _clock_shift(series, minutes):
+    """Shifts 'HH:MM' text by whole minutes, wrapping at midnight."""
+    td = pd.to_timedelta(series.astype(str).str.slice(0, 5) + ":00", errors="coerce")
+    shifted = (td + pd.to_timedelta(minutes, unit="m")) % pd.Timedelta(days=1)
+    seconds = shifted.dt.total_seconds().fillna(0).astype(int)
+    return (seconds // 3600).map("{:02d}".format) + ":" + (seconds % 3600 // 60).map("{:02d}".format)
+
+
+def synthetic_chunks(n_rows, source=CLEANED_PATH, seed=0, chunk_rows=100_000):
+    """Yields raw-format DataFrame chunks totalling `n_rows`, replicating `source`.
+
+    The source's own natural-key collisions (rows sharing Bus_Key, which the
+    loader stores once) are dropped first, keeping the last as the loader
+    does, so every synthetic row is stored and the benchmark row counts are
+    real. Replica 0 is that deduplicated source; replica k renames every
+    service to '<Bus_Name>-<k>', shifts the departures and arrivals of each
+    (route, operator, bus type) by one random number of minutes, scales the
+    price by a random factor and redraws the seats. Natural keys therefore
+    stay unique while each replica has the source's operator/route/bus-type
+    mix. The last replica is a random subset.
+    """
+    base = pd.read_csv(source, dtype=str, keep_default_na=False)
+    base = base[~bus_key(to_export_frame(clean_chunk(base))).duplicated(keep='last')].reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    replicas_per_chunk = max(1, chunk_rows // len(base))
+    emitted, k = 0, 0
+    while emitted < n_rows:
+        parts = []
+        for _ in range(replicas_per_chunk):
+            if emitted >= n_rows:
+                break
+            take = min(len(base), n_rows - emitted)
+            part = base if take == len(base) else base.iloc[np.sort(rng.choice(len(base), take, replace=False))]
+            part = part.copy()
+            if k:
+                # +/- 1 hour in 5-minute steps, one shift per service group so its departures stay distinct.
+                group = part.groupby(['Route_Link', 'Bus_Name', 'Bus_Type'], sort=False).ngroup().to_numpy()
+                shift = rng.integers(-12, 13, group.max() + 1)[group] * 5
+                part['Bus_Name'] = part['Bus_Name'] + f"-{k}"
+                part['Departure_Time'] = _clock_shift(part['Departure_Time'], shift)
+                part['Destination_Time'] = _clock_shift(part['Destination_Time'], shift)
+                price = pd.to_numeric(part['Price'], errors="coerce") * rng.lognormal(0, 0.1, len(part))
+                part['Price'] = price.round()
+                part['Seats_Available'] = rng.integers(0, 45, len(part)).astype(str)
+            price = pd.to_numeric(part['Price'], errors="coerce")
+            part['Price'] = ("INR " + price.map("{:,.0f}".format)).where(price.notna(), "") # Scraped text format.
+            part['Seats_Available'] = part['Seats_Available'] + " Seats available"
+            parts.append(part[RAW_COLUMNS])
+            emitted += take
+            k += 1
+        yield pd.concat(parts, ignore_index=True)
+
+
+def write_synthetic(n_rows, path, source=CLEANED_PATH, seed=0):
+    """Writes a synthetic CSV of `n_rows` (reused if it already exists); returns the path."""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    for i, chunk in enumerate(synthetic_chunks(n_rows, source, seed)):
+        chunk.to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+# --- Filter Combinations ---
+
+FILTER_FIELDS = ("source_city", "operator", "bus_type", "price", "rating", "seats")
+
+
+def representative_values(df):
+    """Filter values a user would plausibly pick together: the busiest city, its busiest operator, etc."""
+    city = df['Source_City'].value_counts().index[0]
+    in_city = df[df['Source_City'] == city]
+    operator = in_city['Bus_Name'].value_counts().index[0]
+    bus_type = in_city[in_city['Bus_Name'] == operator]['Bus_Type'].value_counts().index[0]
+    low, high = df['Price'].quantile([0.25, 0.75])
+    return {
+        "source_city": city, "operator": operator, "bus_type": bus_type,
+        "price": (float(low), float(high)), "rating": 3.0, "seats": True,
+    }
+
+
+def filter_combinations(values):
+    """Yields (name, BusFilters) for every subset of the Bus Routes sidebar filters."""
+    for size in range(len(FILTER_FIELDS) + 1):
+        for fields in itertools.combinations(FILTER_FIELDS, size):
+            price = values["price"] if "price" in fields else (None, None)
+            yield "+".join(fields) or "none", BusFilters(
+                source_city=values["source_city"] if "source_city" in fields else None,
+                operator=values["operator"] if "operator" in fields else None,
+                bus_type=values["bus_type"] if "bus_type" in fields else None,
+                price_min=price[0],
+                price_max=price[1],
+                min_rating=values["rating"] if "rating" in fields else None,
+                seats_only="seats" in fields,
+            )
+
+
+# --- Runs ---
+
+def bench_database(args):
+    """Returns the scratch MySQL database for --mysql, refusing the app's own database."""
+    database = args.mysql_database or os.environ.get(BENCH_DB_ENV)
+    if not database:
+        raise SystemExit(f"--mysql needs a scratch database: set {BENCH_DB_ENV} or pass --mysql-database")
+    if database == DatabaseConfig.from_env().database:
+        raise SystemExit(f"Refusing to benchmark in the app database {database!r} (REDBUS_DB_NAME); use a scratch one")
+    return database
+
+
+def _connect(args, n_rows):
+    """Opens the benchmark database: a fresh SQLite file, or the scratch MySQL database with --mysql.
+
+    An existing bus_routes in the scratch database is only dropped with
+    --drop-existing; the benchmark drops the table it loaded after each size.
+    """
+    if not args.mysql:
+        path = os.path.join(args.data_dir, f"bench_{n_rows}.sqlite")
+        if os.path.exists(path):
+            os.remove(path)
+        return sqlite3.connect(path)
+    from loader import connect_mysql # Imported here: only --mysql runs need the driver.
+    config = DatabaseConfig.from_env()
+    conn = connect_mysql(config.host, config.port, config.user, config.password, bench_database(args))
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'bus_routes'"
+    )
+    exists = cursor.fetchone()[0] > 0
+    if exists and not args.drop_existing:
+        cursor.close()
+        conn.close()
+        raise SystemExit("bus_routes already exists in the benchmark database; pass --drop-existing to replace it")
+    if exists:
+        cursor.execute("DROP TABLE bus_routes") # Each size starts from an empty table.
+    cursor.close()
+    return conn
+
+
+def _drop_loaded_table(conn):
+    """Removes the table a --mysql run loaded, so the next size starts clean without --drop-existing."""
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS bus_routes")
+    cursor.close()
+
+
+def run_size(args, n_rows, results):
+    """Benchmarks every stage at one dataset size."""
+    print(f"\n{n_rows:,} rows", flush=True)
+    csv_path = write_synthetic(n_rows, os.path.join(args.data_dir, f"synthetic_{n_rows}.csv"), args.source, args.seed)
+
+    measure(results, "clean", n_rows, lambda: clean_files([csv_path], args.chunksize))
+
+    conn = _connect(args, n_rows)
+    try:
+        report = measure(results, "load", n_rows,
+                         lambda: load_chunks(conn, iter_clean_chunks([csv_path], args.chunksize), args.batch_size))
+        results[-1].result_rows = report.stored
+
+        snapshot_path = os.path.join(args.data_dir, f"bench_{n_rows}.arrow")
+        df = measure(results, "snapshot/rebuild", n_rows, lambda: refresh_snapshot(conn, snapshot_path, rebuild=True))
+        measure(results, "snapshot/warm", n_rows, lambda: load_snapshot(snapshot_path)[0], args.repeat)
+
+        engine = measure(results, "engine", n_rows, lambda: FilterEngine(df))
+        results[-1].result_rows = engine.n_rows
+        values = representative_values(df)
+        for name, filters in filter_combinations(values):
+            def query(filters=filters):
+                result = engine.query(filters)
+                engine.page(result.rows, "Price", False, None, 50) # First page, as the results table renders it.
+                return result
+            measure(results, f"filter/engine/{name}", n_rows, query, args.repeat)
+            if not args.skip_sql:
+                def sql(filters=filters):
+                    count_buses(conn, filters)
+                    return fetch_page(conn, filters, "Price", False, None, 50)[0]
+                measure(results, f"filter/sql/{name}", n_rows, sql, args.repeat)
+
+        aggregates = measure(results, "charts", n_rows, lambda: build_chart_aggregates(df), args.repeat)
+        results[-1].result_rows = len(aggregates.price_boxes)
+        if args.mysql:
+            _drop_loaded_table(conn)
+    finally:
+        conn.close()
+
+
+def compare(results, baseline, tolerance):
+    """Prints each stage against the baseline; returns the keys slower than 1 + tolerance times."""
+    previous = {f"{r['rows']}:{r['stage']}": r for r in baseline.get("results", [])}
+    regressions, unmatched = [], []
+    print(f"\n{'stage':<58} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for result in results:
+        old = previous.get(result.key)
+        if old is None or not old['seconds']:
+            unmatched.append(result.key)
+            continue
+        ratio = result.seconds / old['seconds']
+        flag = ""
+        if ratio > 1 + tolerance and result.seconds - old['seconds'] > 0.001: # Ignores sub-millisecond noise.
+            regressions.append(result.key)
+            flag = "  SLOWER"
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(f"{result.key:<58} {old['seconds']:10.4f} {result.seconds:10.4f} {ratio:7.2f}{flag}")
+    if unmatched:
+        sizes = sorted({int(key.split(':')[0]) for key in unmatched})
+        print(f"\n{len(unmatched)} stage(s) not in the baseline (sizes {', '.join(f'{n:,}' for n in sizes)}); "
+              "save a baseline for them with --save-baseline")
+    return regressions
+
+
+def main(argv=None):
+    """Generates the synthetic datasets, runs every stage and writes/compares the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the Redbus cleaning, loading and dashboard pipeline.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES, help="Synthetic dataset sizes.")
+    parser.add_argument("--source", default=CLEANED_PATH, help="Cleaned CSV to scale up.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic data.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where synthetic CSVs and databases are kept.")
+    parser.add_argument("--mysql", action="store_true", help=f"Load into MySQL (REDBUS_DB_* server, {BENCH_DB_ENV} database).")
+    parser.add_argument("--mysql-database", help=f"Scratch MySQL database (default: ${BENCH_DB_ENV}).")
+    parser.add_argument("--drop-existing", action="store_true", help="Allow dropping an existing bus_routes in that database.")
+    parser.add_argument("--skip-sql", action="store_true", help="Only time the in-memory filter path.")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Raw rows cleaned at a time.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT/commit.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the fast stages (the fastest is kept).")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Result JSON to write.")
+    parser.add_argument("--baseline", help="Result JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%).")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to --baseline.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any stage regressed.")
+    args = parser.parse_args(argv)
+    if args.mysql:
+        bench_database(args) # Fails before any data is generated.
+
+    results = []
+    for n_rows in args.rows:
+        run_size(args, n_rows, results)
+
+    document = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "backend": "mysql" if args.mysql else "sqlite",
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+        },
+        "results": [asdict(r) for r in results],
+    }
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"\nWrote {len(results)} results -> {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved baseline -> {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        print(f"\n{len(regressions)} stage(s) slower than baseline by more than {args.tolerance:.0%}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
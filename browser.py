@@ -0,0 +1,164 @@
+"""Shared Chrome factory for the Selenium scrapers.
+
+The notebooks started a full, maximized `webdriver.Chrome()` per cell and let
+every route page pull its images, fonts, videos, ads and tracking scripts
+before anything could be read. Here every worker gets the same tuned
+browser instead: headless by default, a fixed viewport, the "eager" page-load
+strategy (driver.get() returns at DOMContentLoaded; the scrapers wait for
+the elements they need explicitly), images, media and fonts blocked, and
+every host outside the allowed Redbus domains resolved to nothing, so
+third-party ads and trackers never load. With a profile directory, each
+worker thread reuses its own Chrome profile, so the HTTP cache of Redbus'
+scripts and styles stays warm across routes and browser restarts.
+"""
+
+import os # Imports os for the profile paths.
+import re # Imports re for profile directory names.
+import threading # Imports threading to give each worker its own profile.
+from dataclasses import dataclass, replace # Imports dataclass for the browser settings.
+from ipaddress import ip_address # Imports ip_address to tell IP literals from host names.
+from typing import Optional # Imports typing helpers.
+from urllib.parse import urlsplit # Imports urlsplit to read the --base-url host.
+
+from selenium import webdriver # Imports the Selenium webdriver.
+
+# Hosts the pages may load from; everything else (ads, analytics, tag managers) fails to resolve.
+# rdbuz.com serves Redbus' scripts and styles; the loopback names cover fixture_server.py runs.
+DEFAULT_ALLOWED_DOMAINS = ("redbus.in", "rdbuz.com", "localhost", "127.0.0.1")
+
+# Sub-resources the scrapers never read: images, fonts and audio/video.
+BLOCKED_URL_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg",
+)
+
+# Background features that cost memory or network but do nothing for a scraper.
+LEAN_ARGUMENTS = (
+    "--disable-gpu",
+    "--disable-dev-shm-usage", # Uses /tmp instead of the small /dev/shm in containers.
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--no-first-run",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+)
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """Launch settings shared by every scraper worker."""
+    headless: bool = True # Runs Chrome without a window.
+    viewport: tuple = (1366, 900) # Fixed window size instead of maximize_window().
+    page_load_strategy: str = "eager" # "eager" returns at DOMContentLoaded; "normal" waits for every resource.
+    page_timeout: float = 30.0 # Seconds allowed for driver.get().
+    block_resources: bool = True # Blocks images, media and fonts.
+    allowed_domains: tuple = DEFAULT_ALLOWED_DOMAINS # Empty: third-party hosts are not blocked.
+    profile_dir: Optional[str] = None # Root of the warmed per-worker profiles; None uses a throwaway profile.
+
+
+def _is_ip(host):
+    """True when `host` is an IP literal such as 127.0.0.1."""
+    try:
+        ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def host_resolver_rules(allowed_domains):
+    """Chrome rule that fails DNS for every host outside `allowed_domains` (and their subdomains)."""
+    excludes = []
+    for domain in allowed_domains:
+        excludes.append(f"EXCLUDE {domain}")
+        if not _is_ip(domain):
+            excludes.append(f"EXCLUDE *.{domain}") # IP literals have no subdomains.
+    return ", ".join(["MAP * ~NOTFOUND"] + excludes)
+
+
+def worker_profile_dir(profile_dir):
+    """Profile directory of the calling thread; Chrome allows one running browser per directory."""
+    slot = re.sub(r"[^A-Za-z0-9_-]+", "-", threading.current_thread().name)
+    return os.path.join(profile_dir, slot)
+
+
+def chrome_options(profile, user_data_dir=None):
+    """Builds the ChromeOptions for `profile`."""
+    options = webdriver.ChromeOptions() # Chrome launch options.
+    options.page_load_strategy = profile.page_load_strategy
+    if profile.headless:
+        options.add_argument("--headless=new") # Runs Chrome without a window.
+    options.add_argument("--window-size={},{}".format(*profile.viewport))
+    for argument in LEAN_ARGUMENTS:
+        options.add_argument(argument)
+    if profile.block_resources:
+        options.add_argument("--blink-settings=imagesEnabled=false") # Skips image decoding as well as the download.
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+    if profile.allowed_domains:
+        options.add_argument(f"--host-resolver-rules={host_resolver_rules(profile.allowed_domains)}")
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+    return options
+
+
+def make_driver(profile=None, **fields):
+    """Starts a Chrome driver for a pool worker.
+
+    `fields` override single BrowserProfile settings, e.g.
+    make_driver(headless=False) or make_driver(profile, page_timeout=10).
+    """
+    profile = replace(profile or BrowserProfile(), **fields)
+    user_data_dir = None
+    if profile.profile_dir:
+        user_data_dir = worker_profile_dir(profile.profile_dir)
+        os.makedirs(user_data_dir, exist_ok=True)
+    driver = webdriver.Chrome(options=chrome_options(profile, user_data_dir)) # Starts the browser.
+    try:
+        driver.set_page_load_timeout(profile.page_timeout) # Bounds driver.get() by the retry policy.
+        if profile.block_resources:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)}) # Fonts and media by URL.
+    except Exception:
+        driver.quit() # Never leak a half-configured browser.
+        raise
+    return driver
+
+
+# --- Command Line ---
+
+def add_browser_arguments(parser):
+    """Adds the shared browser flags to a scraper's argument parser."""
+    group = parser.add_argument_group("browser")
+    group.add_argument("--no-headless", action="store_true", help="Show the browser windows.")
+    group.add_argument("--profile-dir", help="Reuse warmed Chrome profiles under this folder (one per worker).")
+    group.add_argument("--no-block", action="store_true", help="Load images, media, fonts and third-party hosts.")
+    group.add_argument("--allow-domain", action="append", default=[], metavar="DOMAIN",
+                       help="Another host the pages may load from (repeatable).")
+    group.add_argument("--page-load", choices=["eager", "normal"], default="eager", help="Page-load strategy.")
+    return parser
+
+
+def profile_from_args(args, base_url=None, **fields):
+    """Builds the BrowserProfile selected by add_browser_arguments() flags.
+
+    The host of `base_url` (e.g. a fixture server) is always allowed.
+    """
+    allowed = DEFAULT_ALLOWED_DOMAINS + tuple(args.allow_domain)
+    host = urlsplit(base_url).hostname if base_url else None
+    if host and host not in allowed:
+        allowed += (host,)
+    return BrowserProfile(
+        headless=not args.no_headless,
+        page_load_strategy=args.page_load,
+        block_resources=not args.no_block,
+        allowed_domains=() if args.no_block else allowed,
+        profile_dir=args.profile_dir,
+        **fields,
+    )
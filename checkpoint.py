@@ -0,0 +1,143 @@
+"""Local SQLite checkpoint store for resumable, incremental crawls.
+
+Tracks the status, last-scraped time and row count of every route link, and
+keeps each route's bus rows as soon as the route finishes. A crashed crawl
+can therefore be restarted without losing completed routes, and a nightly
+run can re-scrape only the routes whose data is older than a given age.
+"""
+
+import sqlite3 # Imports the stdlib SQLite driver.
+import threading # Imports threading to serialise writes from pool workers.
+import time # Imports time for scrape timestamps.
+
+import pandas as pd # Imports the pandas library for data handling.
+
+from extraction import COLUMNS # Imports the bus-details column order.
+
+STATUS_DONE = "done" # Route scraped successfully.
+STATUS_FAILED = "failed" # Route exhausted its retries.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    Route_Link TEXT PRIMARY KEY,
+    Operator TEXT NOT NULL,
+    Route_name TEXT,
+    Status TEXT NOT NULL,
+    Attempts INTEGER NOT NULL DEFAULT 0,
+    Last_Scraped REAL,
+    Row_Count INTEGER NOT NULL DEFAULT 0,
+    Error TEXT
+);
+CREATE TABLE IF NOT EXISTS bus_rows (
+    Route_Link TEXT NOT NULL,
+    Bus_Name TEXT,
+    Bus_Type TEXT,
+    Departure_Time TEXT,
+    Destination_Time TEXT,
+    Total_Duration TEXT,
+    Ratings TEXT,
+    Price TEXT,
+    Seats_Available TEXT,
+    Route_name TEXT,
+    Scraped_At REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bus_rows_route ON bus_rows (Route_Link);
+"""
+
+
+class CheckpointStore:
+    """Thread-safe checkpoint store backed by one SQLite file."""
+
+    def __init__(self, path="scrape_checkpoint.sqlite"):
+        self.path = path # Location of the SQLite file.
+        self._conn = sqlite3.connect(path, check_same_thread=False) # Shared by all pool workers.
+        self._conn.execute("PRAGMA journal_mode=WAL") # Keeps readers unblocked while workers write.
+        self._conn.execute("PRAGMA synchronous=NORMAL") # Durable enough for a re-scrapeable cache.
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock() # Serialises writes from worker threads.
+
+    def close(self):
+        """Closes the underlying connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Writes ---
+
+    def record_success(self, job, rows):
+        """Replaces the route's stored rows and marks it done, in one transaction."""
+        now = time.time()
+        values = [
+            (job.route_link, row['Bus_Name'], row['Bus_Type'], row['Departure_Time'],
+             row['Destination_Time'], row['Total_Duration'], row['Ratings'], row['Price'],
+             row['Seats_Available'], row['Route_name'], now)
+            for row in rows
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM bus_rows WHERE Route_Link = ?", (job.route_link,))
+            self._conn.executemany("INSERT INTO bus_rows VALUES (?,?,?,?,?,?,?,?,?,?,?)", values)
+            self._conn.execute(
+                """INSERT INTO routes (Route_Link, Operator, Route_name, Status, Attempts, Last_Scraped, Row_Count, Error)
+                   VALUES (?, ?, ?, ?, 1, ?, ?, NULL)
+                   ON CONFLICT(Route_Link) DO UPDATE SET
+                       Status = excluded.Status, Attempts = routes.Attempts + 1,
+                       Last_Scraped = excluded.Last_Scraped, Row_Count = excluded.Row_Count, Error = NULL""",
+                (job.route_link, job.operator, job.route_name, STATUS_DONE, now, len(rows)),
+            )
+
+    def record_failure(self, job, error):
+        """Marks the route failed, keeping any rows from an earlier successful scrape."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO routes (Route_Link, Operator, Route_name, Status, Attempts, Error)
+                   VALUES (?, ?, ?, ?, 1, ?)
+                   ON CONFLICT(Route_Link) DO UPDATE SET
+                       Status = excluded.Status, Attempts = routes.Attempts + 1, Error = excluded.Error""",
+                (job.route_link, job.operator, job.route_name, STATUS_FAILED, error),
+            )
+
+    # --- Reads ---
+
+    def pending(self, jobs, max_age=None):
+        """Returns the jobs that still need scraping.
+
+        Without `max_age`, every route already marked done is skipped (resume).
+        With `max_age` (seconds), done routes are re-scraped only when their
+        last scrape is older than that (refresh stale only).
+        """
+        with self._lock:
+            done = dict(self._conn.execute(
+                "SELECT Route_Link, Last_Scraped FROM routes WHERE Status = ?", (STATUS_DONE,)
+            ).fetchall())
+        cutoff = None if max_age is None else time.time() - max_age
+        return [
+            job for job in jobs
+            if job.route_link not in done or (cutoff is not None and done[job.route_link] < cutoff)
+        ]
+
+    def status(self):
+        """Returns the per-route status table as a DataFrame."""
+        with self._lock:
+            return pd.read_sql("SELECT * FROM routes ORDER BY Operator, Route_Link", self._conn)
+
+    def results(self, jobs=None):
+        """Returns the stored bus rows with the bus-details CSV columns.
+
+        With `jobs`, only the rows of those routes are returned (e.g. the
+        current run's operators and host); without, every stored route.
+        """
+        sql = f"SELECT {', '.join(COLUMNS)} FROM bus_rows"
+        with self._lock:
+            if jobs is not None:
+                with self._conn:
+                    self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected_routes (Route_Link TEXT PRIMARY KEY)")
+                    self._conn.execute("DELETE FROM selected_routes")
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO selected_routes VALUES (?)", ((job.route_link,) for job in jobs)
+                    )
+                sql += " WHERE Route_Link IN (SELECT Route_Link FROM selected_routes)"
+            return pd.read_sql(sql + " ORDER BY rowid", self._conn)
@@ -0,0 +1,200 @@
+"""Vectorized, streaming cleaning of the scraped bus-details CSVs.
+
+Replaces the row-by-row cleaning in mysql_connector_python.ipynb. The
+operator CSVs are read in chunks, every column is parsed with vectorized
+string operations into real dtypes (float prices and ratings, integer seats,
+time-of-day timedeltas, categorical names), and Source_City /
+Destination_City are derived once here instead of on every dashboard load.
+Only one chunk of raw text is held in memory at a time.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import glob # Imports glob to find the operator CSVs.
+import os # Imports os for building dataset paths.
+
+import pandas as pd # Imports the pandas library for data handling.
+from pandas.api.types import union_categoricals # Imports category merging for chunked reads.
+
+BUS_DETAILS_DIR = "Bus details dataset" # Folder holding the scraped operator CSVs.
+CLEANED_PATH = os.path.join("cleaned dataset", "df_final_bus_details.csv") # The notebooks' cleaned dataset (read-only here).
+# Default output of this pipeline; its typed schema (Duration_Minutes, city columns) differs from CLEANED_PATH.
+CLEAN_OUTPUT_PATH = os.path.join("cleaned dataset", "df_bus_details_typed.csv")
+
+# Scraped operator CSVs in the notebook's df_1..df_10 order.
+OPERATOR_CSVS = [
+    "df_APSRTC_11.csv",
+    "df_TSRTC_2.csv",
+    "df_KSRTC_Kerala_3.csv",
+    "df_SBSTC_State_4.csv",
+    "df_WBSTC_State_5.csv",
+    "df_BSRTC_6.csv",
+    "df_HRTC_7.csv",
+    "df_PEPSU_8.csv",
+    "df_ASTC_9.csv",
+    "df_KAAC_TRANSPORT_10.csv",
+]
+
+CATEGORY_COLUMNS = ['Bus_Name', 'Bus_Type', 'Total_Duration', 'Route_name', 'Route_Link', 'Source_City', 'Destination_City']
+
+# Column order of the cleaned frame.
+CLEAN_COLUMNS = [
+    'Bus_Name',
+    'Bus_Type',
+    'Departure_Time',
+    'Destination_Time',
+    'Total_Duration',
+    'Duration_Minutes',
+    'Ratings',
+    'Price',
+    'Seats_Available',
+    'Route_name',
+    'Route_Link',
+    'Source_City',
+    'Destination_City',
+]
+
+NUMBER = r"(\d+(?:\.\d+)?)" # First decimal number in a string.
+
+
+def default_paths(directory=BUS_DETAILS_DIR):
+    """Returns the operator CSV paths, or every df_*.csv except df_final.csv if the list is stale."""
+    paths = [os.path.join(directory, name) for name in OPERATOR_CSVS]
+    if all(os.path.exists(path) for path in paths):
+        return paths
+    return sorted(p for p in glob.glob(os.path.join(directory, "df_*.csv")) if not p.endswith("df_final.csv"))
+
+
+# --- Column Parsers ---
+
+def parse_price(series):
+    """'INR 1,469' -> 1469.0"""
+    return series.astype("string").str.replace(",", "", regex=False).str.extract(NUMBER, expand=False).astype("float64")
+
+
+def parse_ratings(series):
+    """'3.7\\n10' or 'New' -> 3.7 / 0.0 (first number is the star rating, the rest is the review count)."""
+    return series.astype("string").str.extract(NUMBER, expand=False).astype("float64").fillna(0.0)
+
+
+def parse_seats(series):
+    """'29 Seats available' -> 29 (missing -> 0)."""
+    return series.astype("string").str.extract(r"(\d+)", expand=False).astype("float64").fillna(0).astype("int32")
+
+
+def parse_time_of_day(series):
+    """'15:00' / '15:00:00' / '0 days 15:00:00' -> Timedelta since midnight."""
+    text = series.astype("string").str.extract(r"(\d{1,2}:\d{2}(?::\d{2})?)", expand=False)
+    text = text.where(text.str.count(":") == 2, text + ":00") # Adds seconds to HH:MM.
+    return pd.to_timedelta(text, errors="coerce")
+
+
+def parse_duration_minutes(series):
+    """'08h 00m' -> 480 (missing parts count as 0)."""
+    parts = series.astype("string").str.extract(r"(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?")
+    hours = parts[0].astype("float64").fillna(0)
+    minutes = parts[1].astype("float64").fillna(0)
+    return (hours * 60 + minutes).astype("int32")
+
+
+def split_route(series):
+    """Splits 'Source to Destination' (or 'A - B' / 'A -> B') into two city columns."""
+    text = series.astype("string").str.strip()
+    pattern = r"^\s*(?P<source>.+?)\s+(?:to|->|-)\s+(?P<destination>.+?)\s*$"
+    cities = text.str.extract(pattern)
+    source = cities["source"].fillna(text).fillna("Unknown Source") # Unsplittable names stay as the source.
+    destination = cities["destination"].fillna("Unknown Destination")
+    return source, destination
+
+
+# --- Chunk Cleaning ---
+
+def clean_chunk(df):
+    """Cleans one raw chunk into CLEAN_COLUMNS with proper dtypes."""
+    out = pd.DataFrame(index=df.index)
+    out['Bus_Name'] = df['Bus_Name'].astype("string").str.strip()
+    out['Bus_Type'] = df['Bus_Type'].astype("string").str.strip()
+    out['Departure_Time'] = parse_time_of_day(df['Departure_Time'])
+    out['Destination_Time'] = parse_time_of_day(df['Destination_Time'])
+    out['Total_Duration'] = df['Total_Duration'].astype("string").str.strip()
+    out['Duration_Minutes'] = parse_duration_minutes(df['Total_Duration'])
+    out['Ratings'] = parse_ratings(df['Ratings'])
+    out['Price'] = parse_price(df['Price'])
+    out['Seats_Available'] = parse_seats(df['Seats_Available'])
+    out['Route_name'] = df['Route_name'].astype("string").str.strip()
+    out['Route_Link'] = df['Route_Link'].astype("string").str.strip()
+    out['Source_City'], out['Destination_City'] = split_route(df['Route_name'])
+    for column in CATEGORY_COLUMNS:
+        out[column] = out[column].astype("category") # Repeated names stored once per chunk.
+    return out
+
+
+def iter_clean_chunks(paths=None, chunksize=50_000):
+    """Yields cleaned chunks from the operator CSVs, reading `chunksize` raw rows at a time."""
+    for path in paths or default_paths():
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""]):
+            yield clean_chunk(chunk)
+
+
+def concat_chunks(chunks):
+    """Concatenates cleaned chunks, merging categories instead of falling back to object dtype."""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame(columns=CLEAN_COLUMNS)
+    merged = {}
+    for column in CLEAN_COLUMNS:
+        if column in CATEGORY_COLUMNS:
+            merged[column] = pd.Series(union_categoricals([c[column] for c in chunks], ignore_order=True))
+        else:
+            merged[column] = pd.concat([c[column] for c in chunks], ignore_index=True)
+    return pd.DataFrame(merged)
+
+
+def clean_files(paths=None, chunksize=50_000):
+    """Cleans every operator CSV into one compact DataFrame."""
+    return concat_chunks(iter_clean_chunks(paths, chunksize))
+
+
+# --- Export Helpers ---
+
+def format_time_of_day(series):
+    """Timedelta since midnight -> 'HH:MM:SS' text (what MySQL TIME columns accept)."""
+    seconds = series.dt.total_seconds()
+    hours = (seconds // 3600).astype("Int64").astype("string").str.zfill(2)
+    minutes = (seconds % 3600 // 60).astype("Int64").astype("string").str.zfill(2)
+    secs = (seconds % 60).astype("Int64").astype("string").str.zfill(2)
+    return hours + ":" + minutes + ":" + secs
+
+
+def to_export_frame(df):
+    """Returns a copy with times as 'HH:MM:SS' text, ready for CSV or SQL parameters."""
+    out = df.copy()
+    for column in ('Departure_Time', 'Destination_Time'):
+        out[column] = format_time_of_day(out[column])
+    return out
+
+
+def clean_to_csv(output=CLEAN_OUTPUT_PATH, paths=None, chunksize=50_000):
+    """Streams the cleaned chunks to a CSV without holding the whole dataset; returns the row count."""
+    rows = 0
+    for i, chunk in enumerate(iter_clean_chunks(paths, chunksize)):
+        to_export_frame(chunk).to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False, float_format="%.2f")
+        rows += len(chunk)
+    return rows
+
+
+def main(argv=None):
+    """Cleans the scraped operator CSVs into the cleaned dataset."""
+    parser = argparse.ArgumentParser(description="Clean the scraped Redbus bus-details CSVs.")
+    parser.add_argument("paths", nargs="*", help=f"Operator CSVs (default: {BUS_DETAILS_DIR}/df_*.csv).")
+    parser.add_argument("--output", default=CLEAN_OUTPUT_PATH, help="Cleaned CSV to write.")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Raw rows per chunk.")
+    args = parser.parse_args(argv)
+    if os.path.abspath(args.output) == os.path.abspath(CLEANED_PATH):
+        parser.error(f"{CLEANED_PATH} is read by the notebooks in its own schema; choose another --output.")
+
+    rows = clean_to_csv(args.output, args.paths or None, args.chunksize)
+    print(f"Cleaned {rows} rows -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Thread-safe database connection pool for the dashboard and scripts.
+
+Streamlit runs every browser session in its own thread, so the dashboard
+can no longer share one cached connection (which load_data_from_db also
+used to close). Connections are checked out for one unit of work and
+returned afterwards. Checkout blocks, up to a timeout, when all `pool_size`
+connections are in use. Idle connections are pinged before reuse and
+replaced if the server dropped them, and connections older than `recycle`
+seconds are reopened. Every MySQL session gets a server-side statement
+timeout. Credentials come from Streamlit secrets or REDBUS_DB_* environment
+variables, never from the source.
+"""
+
+import os # Imports os for the environment configuration.
+import sqlite3 # Imports sqlite3 for the local stand-in database.
+import threading # Imports threading for the checkout lock.
+import time # Imports time for idle ages and wait times.
+from contextlib import contextmanager # Imports contextmanager for checkout/return.
+from dataclasses import dataclass, field # Imports dataclass for the config and stats records.
+from typing import Optional # Imports typing helpers.
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout."""
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    """Connection settings plus pool tuning; see from_env / from_mapping."""
+    host: str = "127.0.0.1"
+    port: int = 3306
+    user: str = "root"
+    password: str = ""
+    database: str = "Bus_details"
+    sqlite_path: Optional[str] = None # Use this SQLite file instead of MySQL.
+    pool_size: int = 5 # Most connections open at once.
+    checkout_timeout: float = 10.0 # Seconds to wait for a free connection.
+    connect_timeout: int = 10 # Seconds to wait for the server when opening a connection.
+    query_timeout: float = 30.0 # Per-statement limit (MySQL MAX_EXECUTION_TIME); 0 disables it.
+    ping_after: float = 30.0 # Idle seconds after which a connection is pinged before reuse.
+    recycle: float = 3600.0 # Connections older than this are reopened.
+    options: dict = field(default_factory=dict, hash=False) # Extra mysql.connector arguments (e.g. ssl_ca).
+
+    @classmethod
+    def from_mapping(cls, values):
+        """Builds a config from a dict-like section (e.g. st.secrets["mysql"]), ignoring unknown keys."""
+        known = {name: values[name] for name in cls.__dataclass_fields__ if name in values}
+        if 'options' in known:
+            known['options'] = dict(known['options']) # TOML tables arrive as read-only mappings.
+        return cls(**known)
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        """Builds a config from REDBUS_DB_* environment variables (same names as loader.py)."""
+        defaults = cls()
+        return cls(
+            host=environ.get("REDBUS_DB_HOST", defaults.host),
+            port=int(environ.get("REDBUS_DB_PORT", defaults.port)),
+            user=environ.get("REDBUS_DB_USER", defaults.user),
+            password=environ.get("REDBUS_DB_PASSWORD", defaults.password),
+            database=environ.get("REDBUS_DB_NAME", defaults.database),
+            sqlite_path=environ.get("REDBUS_DB_SQLITE") or None,
+            pool_size=int(environ.get("REDBUS_DB_POOL_SIZE", defaults.pool_size)),
+            query_timeout=float(environ.get("REDBUS_DB_QUERY_TIMEOUT", defaults.query_timeout)),
+        )
+
+
+@dataclass
+class PoolStats:
+    """Utilisation counters of one pool."""
+    size: int = 0 # Configured maximum.
+    open: int = 0 # Connections currently open (idle + in use).
+    in_use: int = 0 # Connections checked out right now.
+    idle: int = 0 # Open connections waiting in the pool.
+    peak_in_use: int = 0 # Highest in_use seen.
+    checkouts: int = 0 # Successful checkouts.
+    waits: int = 0 # Checkouts that had to wait for a free connection.
+    wait_seconds: float = 0.0 # Total time spent waiting.
+    timeouts: int = 0 # Checkouts that gave up (PoolTimeout).
+    created: int = 0 # Connections opened.
+    reconnects: int = 0 # Stale connections replaced after a failed ping.
+    discarded: int = 0 # Connections dropped after errors or recycling.
+
+    @property
+    def utilisation(self):
+        return self.in_use / self.size if self.size else 0.0
+
+
+class _Entry:
+    """A pooled connection with its open and last-used times."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.opened = self.used = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections with checkout/return semantics.
+
+    Use `with pool.connection() as conn:`; the connection is rolled back and
+    returned (or discarded, if it broke) when the block exits.
+    """
+
+    def __init__(self, config, connect=None):
+        self.config = config
+        self._connect = connect or self._default_connect
+        self._idle = [] # LIFO stack of _Entry: recently used connections are the least likely to be stale.
+        self._cond = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._stats = PoolStats(size=config.pool_size)
+
+    # --- Connections ---
+
+    def _default_connect(self):
+        config = self.config
+        if config.sqlite_path:
+            return sqlite3.connect(config.sqlite_path, timeout=config.checkout_timeout, check_same_thread=False)
+        import mysql.connector # Imports the connector lazily so SQLite runs need no MySQL driver.
+        conn = mysql.connector.connect(
+            host=config.host, port=config.port, user=config.user, password=config.password,
+            database=config.database, connection_timeout=config.connect_timeout, **config.options,
+        )
+        if config.query_timeout:
+            cursor = conn.cursor()
+            cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(config.query_timeout * 1000)}")
+            cursor.close()
+        return conn
+
+    @staticmethod
+    def _ping(conn):
+        """True if the connection still answers."""
+        try:
+            if hasattr(conn, "ping"):
+                conn.ping(reconnect=False) # mysql.connector raises on a dropped connection.
+            else:
+                conn.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass # Already gone.
+
+    def _open_entry(self):
+        entry = _Entry(self._connect())
+        with self._cond:
+            self._stats.created += 1
+        return entry
+
+    # --- Checkout / Return ---
+
+    def _checkout(self):
+        """Reserves a slot and returns a live _Entry (reused, revalidated or new)."""
+        deadline = time.monotonic() + self.config.checkout_timeout
+        with self._cond:
+            waited = None
+            while not self._idle and self._open >= self.config.pool_size:
+                if waited is None:
+                    waited = time.monotonic()
+                    self._stats.waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats.timeouts += 1
+                    self._stats.wait_seconds += time.monotonic() - waited
+                    raise PoolTimeout(f"No free connection after {self.config.checkout_timeout:.1f}s "
+                                      f"({self.config.pool_size} in use)")
+                self._cond.wait(remaining)
+            if waited is not None:
+                self._stats.wait_seconds += time.monotonic() - waited
+            entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                self._open += 1 # Slot reserved; the connection is opened outside the lock.
+            self._in_use += 1
+            self._stats.checkouts += 1
+            self._stats.peak_in_use = max(self._stats.peak_in_use, self._in_use)
+
+        try:
+            if entry is None:
+                return self._open_entry()
+            now = time.monotonic()
+            if now - entry.opened > self.config.recycle:
+                self._close(entry.conn)
+                with self._cond:
+                    self._stats.discarded += 1
+                return self._open_entry()
+            if now - entry.used > self.config.ping_after and not self._ping(entry.conn):
+                self._close(entry.conn)
+                with self._cond:
+                    self._stats.reconnects += 1
+                return self._open_entry()
+            return entry
+        except Exception:
+            self._release(None) # Connect failed: give the slot back.
+            raise
+
+    def _release(self, entry):
+        """Returns an entry to the pool, or frees its slot if `entry` is None (discarded)."""
+        with self._cond:
+            self._in_use -= 1
+            if entry is None:
+                self._open -= 1
+            else:
+                entry.used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the duration of the `with` block."""
+        entry = self._checkout()
+        try:
+            yield entry.conn
+        except Exception:
+            self._discard_if_broken(entry)
+            raise
+        else:
+            try:
+                entry.conn.rollback() # Never hand an open transaction to the next session.
+            except Exception:
+                self._close(entry.conn)
+                with self._cond:
+                    self._stats.discarded += 1
+                self._release(None)
+                return
+            self._release(entry)
+
+    def _discard_if_broken(self, entry):
+        """After an error, keeps the connection only if it is still usable."""
+        try:
+            entry.conn.rollback()
+            if self._ping(entry.conn):
+                self._release(entry)
+                return
+        except Exception:
+            pass
+        self._close(entry.conn)
+        with self._cond:
+            self._stats.discarded += 1
+        self._release(None)
+
+    # --- Introspection ---
+
+    def stats(self):
+        """Returns a snapshot of the pool's utilisation counters."""
+        with self._cond:
+            snapshot = PoolStats(**vars(self._stats))
+            snapshot.open, snapshot.in_use, snapshot.idle = self._open, self._in_use, len(self._idle)
+        return snapshot
+
+    def close(self):
+        """Closes the idle connections (e.g. on shutdown)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for entry in idle:
+            self._close(entry.conn)
@@ -0,0 +1,178 @@
+"""Single-round-trip extraction of Redbus bus cards.
+
+The notebook extracted each field with its own find_elements() call and one
+`.text` round trip per element, collecting them into parallel lists that
+shift out of alignment whenever a card is missing a field. Here every bus
+card is read as a unit, either with one execute_script() call or by parsing
+one page_source snapshot, and returned as one BusRecord per card.
+"""
+
+from dataclasses import dataclass, fields # Imports dataclass helpers for the record type.
+from html.parser import HTMLParser # Imports the stdlib HTML parser (no extra dependency).
+from typing import List, Optional # Imports typing helpers.
+
+# Column order of the scraped bus-details CSVs.
+COLUMNS = [
+    'Bus_Name',
+    'Bus_Type',
+    'Departure_Time',
+    'Destination_Time',
+    'Total_Duration',
+    'Ratings',
+    'Price',
+    'Seats_Available',
+    'Route_name',
+    'Route_Link',
+]
+
+# A bus card is the "row-one" block the notebook's Ratings XPath already anchors on.
+CARD_CLASSES = ("clearfix", "row-one")
+
+# Field name -> CSS class that identifies it inside a card (same classes as the notebook XPaths).
+FIELD_CLASSES = {
+    "bus_name": "travels",
+    "bus_type": "bus-type",
+    "departure_time": "dp-time",
+    "destination_time": "bp-time",
+    "total_duration": "dur",
+    "ratings": "column-six",
+    "price": "fare",
+    "seats_available": "seat-left",
+}
+
+
+@dataclass(frozen=True)
+class BusRecord:
+    """Raw text of one bus card; a missing field is None instead of shifting later columns."""
+    bus_name: Optional[str]
+    bus_type: Optional[str]
+    departure_time: Optional[str]
+    destination_time: Optional[str]
+    total_duration: Optional[str]
+    ratings: Optional[str]
+    price: Optional[str]
+    seats_available: Optional[str]
+
+    def to_row(self, route_name, route_link):
+        """Returns the record as a dict keyed by the bus-details CSV columns."""
+        return {
+            'Bus_Name': self.bus_name,
+            'Bus_Type': self.bus_type,
+            'Departure_Time': self.departure_time,
+            'Destination_Time': self.destination_time,
+            'Total_Duration': self.total_duration,
+            'Ratings': self.ratings,
+            'Price': self.price,
+            'Seats_Available': self.seats_available,
+            'Route_name': route_name,
+            'Route_Link': route_link,
+        }
+
+
+FIELD_NAMES = [f.name for f in fields(BusRecord)] # Field order shared by both extractors.
+
+# Reads every card in the browser and returns a list of [field, ...] arrays in FIELD_NAMES order.
+EXTRACT_JS = """
+const fieldClasses = arguments[0];
+const cards = document.querySelectorAll('div.' + arguments[1].join('.'));
+return Array.from(cards, card => fieldClasses.map(cls => {
+    const el = card.querySelector('[class~="' + cls + '"]');
+    return el ? el.innerText.trim() : null;
+}));
+"""
+
+
+def extract_with_script(driver) -> List[BusRecord]:
+    """Extracts all bus cards with a single execute_script() round trip."""
+    classes = [FIELD_CLASSES[name] for name in FIELD_NAMES] # Field classes in record order.
+    cards = driver.execute_script(EXTRACT_JS, classes, list(CARD_CLASSES)) or []
+    return [BusRecord(*values) for values in cards]
+
+
+class _BusCardParser(HTMLParser):
+    """Collects the text of each field class inside each bus card, the way EXTRACT_JS reads it.
+
+    A field is the first element (of any tag) carrying its class inside the
+    card, like querySelector('[class~=...]'), and its text breaks lines at
+    both ends of block elements, like innerText.
+    """
+
+    # Tags whose start and end break lines in innerText.
+    BLOCK_TAGS = {"div", "p", "br", "li", "ul", "ol", "section", "article", "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6"}
+    # Tags that never get an end tag.
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = [] # Completed cards as {field: text} dicts.
+        self._card = None # Card currently being read.
+        self._stack = [] # Open elements as (tag, fields they opened, whether they opened the card).
+        self._fields = {} # Fields currently being captured -> their text pieces.
+
+    def _line_break(self):
+        for chunks in self._fields.values():
+            chunks.append("\n") # Keeps innerText-style line breaks (e.g. "3.7\n10").
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._line_break()
+        if tag in self.VOID_TAGS:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        opened, is_card = [], False
+        if self._card is None:
+            if tag == "div" and all(c in classes for c in CARD_CLASSES):
+                self._card, is_card = {}, True # Opens a new card.
+        else:
+            for name, cls in FIELD_CLASSES.items():
+                if cls in classes and name not in self._card and name not in self._fields:
+                    self._fields[name] = [] # Starts a field; nested fields are captured too.
+                    opened.append(name)
+        self._stack.append((tag, opened, is_card))
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS or all(open_tag != tag for open_tag, _, _ in self._stack):
+            return # Stray end tag.
+        while True: # Also closes elements left open inside this one (e.g. an unclosed <li>).
+            open_tag, opened, is_card = self._stack.pop()
+            if open_tag in self.BLOCK_TAGS:
+                self._line_break()
+            for name in opened:
+                self._card[name] = _normalise_text("".join(self._fields.pop(name))) # Closes the field.
+            if is_card:
+                self.cards.append(self._card) # Closes the card.
+                self._card = None
+            if open_tag == tag:
+                return
+
+    def handle_data(self, data):
+        for chunks in self._fields.values():
+            chunks.append(data)
+
+
+def _normalise_text(text):
+    """Collapses whitespace within lines and drops empty lines, like innerText."""
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line) or None
+
+
+def parse_bus_cards(html) -> List[BusRecord]:
+    """Parses a page_source snapshot into one BusRecord per bus card."""
+    parser = _BusCardParser()
+    parser.feed(html)
+    parser.close()
+    return [BusRecord(*(card.get(name) for name in FIELD_NAMES)) for card in parser.cards]
+
+
+def extract_bus_records(driver, mode="script") -> List[BusRecord]:
+    """Extracts the loaded bus cards from a driver using `mode` ("script" or "source")."""
+    if mode == "script":
+        return extract_with_script(driver) # One in-browser pass over the DOM.
+    if mode == "source":
+        return parse_bus_cards(driver.page_source) # One DOM transfer, parsed locally.
+    raise ValueError(f"Unknown extraction mode: {mode!r}")
+
+
+def records_to_rows(records, route_name, route_link):
+    """Converts BusRecords into bus-details CSV rows for one route."""
+    return [record.to_row(route_name, route_link) for record in records]
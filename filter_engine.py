@@ -0,0 +1,269 @@
+"""Indexed in-memory filter engine for the Bus Routes page.
+
+Built once per data load. Categorical columns are stored as integer codes
+with a posting list (sorted row ids) per value, Price and Ratings keep a
+sorted order for range lookups, and the price/rating bounds are computed up
+front. A query starts from the smallest candidate set among the active
+filters and checks the remaining predicates on that subset only, so the
+frame is never copied and the cost follows the result size rather than the
+table size. Facet counts are computed the same way, leaving out each
+facet's own filter, so dropdowns can show only reachable options.
+
+Results are read a page at a time: each sortable column has a prebuilt
+(key, ID) order, and a page is the next `size` matches after a keyset
+cursor, so only one page of rows is ever materialised.
+"""
+
+import io # Imports io for the CSV export buffer.
+from dataclasses import dataclass, field # Imports dataclass for the result record.
+
+import numpy as np # Imports numpy for the index arrays.
+import pandas as pd # Imports the pandas library for data handling.
+
+from queries import SORT_COLUMNS, BusFilters # Imports the shared filter record and sortable columns.
+
+# Facet name -> column; facet names match the BusFilters fields.
+FACETS = {
+    "source_city": "Source_City",
+    "operator": "Bus_Name",
+    "bus_type": "Bus_Type",
+}
+
+
+@dataclass
+class FilterResult:
+    """Rows matching a filter set plus the facet counts under it."""
+    rows: np.ndarray # Sorted row positions into FilterEngine.df.
+    facets: dict = field(default_factory=dict) # Facet name -> {value: count} of reachable values.
+
+    def __len__(self):
+        return len(self.rows)
+
+
+@dataclass
+class ResultPage:
+    """One page of a sorted result plus the keyset cursor of the next page."""
+    rows: np.ndarray # Row positions into FilterEngine.df, in display order.
+    next_cursor: tuple = None # (sort key, ID) of the last row; None on the last page.
+
+
+class _CategoryIndex:
+    """Integer codes and per-value posting lists for one categorical column."""
+
+    def __init__(self, series):
+        categorical = pd.Categorical(series)
+        self.values = list(categorical.categories) # Code -> value.
+        self.lookup = {value: code for code, value in enumerate(self.values)} # Value -> code.
+        self.codes = categorical.codes.astype(np.int32) # -1 for missing.
+        order = np.argsort(self.codes, kind="stable") # Row ids grouped by code, ascending within a group.
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.values))
+        offsets = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(self.codes < 0)
+        self._order, self._offsets, self.counts = order, offsets, counts
+
+    def postings(self, code):
+        """Sorted row ids holding `code`."""
+        return self._order[self._offsets[code]:self._offsets[code + 1]]
+
+
+class _RangeIndex:
+    """Sorted order of one numeric column for range lookups."""
+
+    def __init__(self, series):
+        self.values = series.to_numpy(dtype=np.float64)
+        self._order = np.argsort(self.values, kind="stable")
+        self._sorted = self.values[self._order]
+        finite = self._sorted[~np.isnan(self._sorted)]
+        self.bounds = (float(finite[0]), float(finite[-1])) if len(finite) else (0.0, 0.0)
+
+    def span(self, low, high):
+        """Row ids with low <= value <= high (unordered)."""
+        lo = np.searchsorted(self._sorted, low, side="left") if low is not None else 0
+        hi = np.searchsorted(self._sorted, high, side="right") if high is not None else len(self._sorted)
+        return self._order[lo:hi]
+
+    def size(self, low, high):
+        """Number of rows in [low, high] without materialising them."""
+        return len(self.span(low, high))
+
+
+class _SortIndex:
+    """Rows ordered by (sort key, ID), with each row's rank in that order."""
+
+    def __init__(self, keys, ids):
+        keys = np.where(np.isnan(keys), np.inf, keys) # Missing keys sort last.
+        self.order = np.lexsort((ids, keys)) # ID breaks ties, so the order is total.
+        self.keys, self.ids = keys[self.order], ids[self.order]
+        self.rank = np.empty(len(keys), dtype=np.intp)
+        self.rank[self.order] = np.arange(len(keys))
+
+    def start(self, cursor):
+        """Rank of the first row after the keyset cursor (key, ID)."""
+        if cursor is None:
+            return 0
+        key, row_id = cursor
+        lo = np.searchsorted(self.keys, key, side="left")
+        hi = np.searchsorted(self.keys, key, side="right")
+        return lo + np.searchsorted(self.ids[lo:hi], row_id, side="right")
+
+
+class FilterEngine:
+    """Evaluates BusFilters against a frame through prebuilt indexes."""
+
+    def __init__(self, df):
+        self.df = df # Kept by reference; never copied.
+        self.n_rows = len(df)
+        self.categories = {name: _CategoryIndex(df[column]) for name, column in FACETS.items()}
+        self.price = _RangeIndex(df['Price'])
+        self.ratings = _RangeIndex(df['Ratings'])
+        self.seats = df['Seats_Available'].to_numpy()
+        self._with_seats = np.flatnonzero(self.seats > 0) # Precomputed seats-available posting list.
+        self._ids = df['ID'].to_numpy(dtype=np.int64)
+        self._sorts = {} # (column, descending) -> _SortIndex, built on first use.
+
+    # --- Bounds and options ---
+
+    @property
+    def price_bounds(self):
+        """(min price, max price) of the loaded data."""
+        return self.price.bounds
+
+    @property
+    def rating_bounds(self):
+        """(min rating, max rating) of the loaded data."""
+        return self.ratings.bounds
+
+    def options(self, facet):
+        """All values of a facet, sorted."""
+        return sorted(self.categories[facet].values)
+
+    # --- Evaluation ---
+
+    def _predicates(self, filters, skip=None):
+        """Returns [(candidate size, candidates(), check(rows) -> mask)] for the active filters."""
+        predicates = []
+        for name, index in self.categories.items():
+            value = getattr(filters, name)
+            if name == skip or value in (None, "All"):
+                continue
+            code = index.lookup.get(value)
+            if code is None:
+                return None # Unknown value: nothing matches.
+            predicates.append((
+                int(index.counts[code]),
+                lambda index=index, code=code: index.postings(code),
+                lambda rows, index=index, code=code: index.codes[rows] == code,
+            ))
+
+        low, high = filters.price_min, filters.price_max
+        if (low is not None and low > self.price.bounds[0]) or (high is not None and high < self.price.bounds[1]):
+            predicates.append((
+                self.price.size(low, high),
+                lambda: self.price.span(low, high),
+                lambda rows: (self.price.values[rows] >= (low if low is not None else -np.inf))
+                & (self.price.values[rows] <= (high if high is not None else np.inf)),
+            ))
+
+        cutoff = filters.min_rating
+        if cutoff:
+            predicates.append((
+                self.ratings.size(cutoff, None),
+                lambda: self.ratings.span(cutoff, None),
+                lambda rows: self.ratings.values[rows] >= cutoff,
+            ))
+
+        if filters.seats_only:
+            predicates.append((
+                len(self._with_seats),
+                lambda: self._with_seats,
+                lambda rows: self.seats[rows] > 0,
+            ))
+        return predicates
+
+    def _match(self, filters, skip=None):
+        """Sorted row ids matching every active filter except `skip`."""
+        predicates = self._predicates(filters, skip)
+        if predicates is None:
+            return np.empty(0, dtype=np.intp)
+        if not predicates:
+            return np.arange(self.n_rows)
+        predicates.sort(key=lambda p: p[0]) # Most selective first.
+        rows = predicates[0][1]() # Candidate set from the cheapest index.
+        for _, _, check in predicates[1:]:
+            if not len(rows):
+                break
+            rows = rows[check(rows)] # Remaining predicates only touch the candidates.
+        return np.sort(rows)
+
+    def query(self, filters, facets=True):
+        """Evaluates `filters`; with `facets`, also returns cascading facet counts."""
+        result = FilterResult(self._match(filters))
+        if facets:
+            for name, index in self.categories.items():
+                if self._predicates(filters, skip=name) == []:
+                    counts = index.counts # No other filter active: prebuilt totals.
+                else:
+                    rows = self._match(filters, skip=name) # Every filter except this facet's own.
+                    codes = index.codes[rows]
+                    counts = np.bincount(codes[codes >= 0], minlength=len(index.values))
+                result.facets[name] = {index.values[c]: int(counts[c]) for c in np.flatnonzero(counts)}
+        return result
+
+    def frame(self, rows, columns=None):
+        """Materialises only the given rows (and columns) of the frame."""
+        if columns is None:
+            return self.df.iloc[rows]
+        return self.df.iloc[rows, [self.df.columns.get_loc(c) for c in columns]]
+
+    # --- Pagination and Export ---
+
+    def _sort_keys(self, column):
+        """Numeric sort keys for a SORT_COLUMNS column (times as seconds since midnight)."""
+        if column == "ID":
+            return self._ids.astype(np.float64)
+        if column == "Departure_Time":
+            return pd.to_timedelta(self.df[column].astype(str), errors="coerce").dt.total_seconds().to_numpy()
+        return self.df[column].to_numpy(dtype=np.float64)
+
+    def _sort_index(self, column, descending):
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {column!r}; expected one of {SORT_COLUMNS}")
+        key = (column, descending)
+        if key not in self._sorts:
+            keys = self._sort_keys(column)
+            self._sorts[key] = _SortIndex(-keys, -self._ids) if descending else _SortIndex(keys, self._ids)
+        return self._sorts[key]
+
+    def page(self, rows, sort="ID", descending=False, after=None, size=50):
+        """Returns the `size` rows of `rows` that follow the keyset cursor `after` in sort order.
+
+        `rows` is a FilterResult's row array; pass the previous page's
+        `next_cursor` as `after` to continue. Ties on the sort key are broken
+        by ID in the same direction (as in queries.fetch_page), so pages
+        never overlap or skip rows.
+        """
+        index = self._sort_index(sort, descending)
+        start = index.start(after)
+        if len(rows) == self.n_rows:
+            ranks = np.arange(start, min(start + size + 1, self.n_rows)) # Unfiltered: walk the order directly.
+        else:
+            ranks = index.rank[rows]
+            ranks = ranks[ranks >= start]
+            if len(ranks) > size + 1:
+                ranks = np.partition(ranks, size)[:size + 1] # Smallest size + 1 ranks, unordered.
+            ranks = np.sort(ranks)
+        more = len(ranks) > size
+        ranks = ranks[:size]
+        cursor = (float(index.keys[ranks[-1]]), int(index.ids[ranks[-1]])) if more else None
+        return ResultPage(index.order[ranks], cursor)
+
+    def iter_csv(self, rows, columns=None, sort="ID", descending=False, chunk_size=10_000):
+        """Yields the full result as CSV text, one keyset page of `chunk_size` rows at a time."""
+        cursor, header = None, True
+        while True:
+            page = self.page(rows, sort, descending, cursor, chunk_size)
+            buffer = io.StringIO()
+            self.frame(page.rows, columns).to_csv(buffer, header=header, index=False)
+            yield buffer.getvalue()
+            if page.next_cursor is None:
+                return
+            cursor, header = page.next_cursor, False
@@ -0,0 +1,62 @@
+"""Local HTTP server for saved Redbus HTML fixtures.
+
+Serves a folder of saved pages so the scrapers can be pointed at
+http://127.0.0.1:<port> instead of redbus.in. A request for
+/bus-tickets/vijayawada-to-hyderabad is answered with
+<root>/bus-tickets/vijayawada-to-hyderabad.html when that file exists.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import functools # Imports functools to bind the fixture folder to the handler.
+import os # Imports os for path handling.
+import threading # Imports threading to run the server in the background.
+from contextlib import contextmanager # Imports contextmanager for serve_fixtures().
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer # Imports the stdlib HTTP server.
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Static handler that maps extension-less Redbus paths to saved .html files."""
+
+    def translate_path(self, path):
+        """Resolves /a/b to /a/b.html when only the saved page exists."""
+        local_path = super().translate_path(path) # Default static-file mapping.
+        if not os.path.exists(local_path) and os.path.exists(local_path + ".html"):
+            return local_path + ".html" # Serves the saved page.
+        return local_path
+
+    def log_message(self, format, *args):
+        """Keeps test output quiet."""
+        pass
+
+
+@contextmanager
+def serve_fixtures(root, host="127.0.0.1", port=0):
+    """Serves `root` in a background thread and yields its base URL."""
+    handler = functools.partial(FixtureHandler, directory=root) # Binds the fixture folder.
+    server = ThreadingHTTPServer((host, port), handler) # Port 0 picks a free port.
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}" # Base URL for rebase_link().
+    finally:
+        server.shutdown() # Stops the serving loop.
+        server.server_close() # Releases the socket.
+
+
+def main(argv=None):
+    """Serves a fixture folder until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve saved Redbus pages locally.")
+    parser.add_argument("root", help="Folder containing the saved pages.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    args = parser.parse_args(argv)
+
+    with serve_fixtures(args.root, port=args.port) as base_url:
+        print(f"Serving {args.root} at {base_url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait() # Blocks until interrupted.
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
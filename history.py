@@ -0,0 +1,286 @@
+"""Append-only price and seat history across crawls.
+
+bus_routes only holds the latest scrape, so every crawl overwrites Price and
+Seats_Available. Here each crawl is appended to a small Parquet store under
+`history/`:
+
+    buses.parquet                          one row per bus (Bus_Key, route, name, type, times)
+    state.parquet                          latest Price / Seats_Available / Listed per Bus_Key
+    events/scrape_date=YYYY-MM-DD/*.parquet  change events only
+    series/scrape.parquet                  per-route price and seat stats, one row per crawl
+    series/daily.parquet                   the same, downsampled to one row per route and day
+
+A bus is identified by the loader's Bus_Key, a hash of Route_Link, Bus_Name,
+Departure_Time and Bus_Type. An event is written only when a bus is new,
+when its price or seat count changed, or when it stopped being listed, so
+an unchanged crawl adds almost nothing. Events are partitioned by scrape
+date, which lets time-range reads skip whole days. The dashboard reads the
+series files, which are a few rows per route per crawl, instead of
+replaying events.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import os # Imports os for paths and atomic replacement.
+from dataclasses import dataclass # Imports dataclass for the append report.
+
+import pandas as pd # Imports the pandas library for data handling.
+import pyarrow as pa # Imports Arrow for the Parquet tables.
+import pyarrow.dataset as ds # Imports Arrow datasets for partition-pruned reads.
+import pyarrow.parquet as pq # Imports the Parquet reader/writer.
+
+from cleaning import CLEANED_PATH, clean_files # Imports the cleaning pipeline.
+from loader import prepare_frame # Imports Bus_Key hashing and SQL-ready values.
+
+HISTORY_DIR = "history" # Default store location.
+
+BUS_COLUMNS = ['Bus_Key', 'Route_Link', 'Route_name', 'Bus_Name', 'Bus_Type', 'Departure_Time',
+               'Source_City', 'Destination_City', 'First_Seen']
+STATE_COLUMNS = ['Bus_Key', 'Price', 'Seats_Available', 'Listed', 'Last_Seen']
+
+EVENT_SCHEMA = pa.schema([
+    ('Bus_Key', pa.string()),
+    ('Scraped_At', pa.timestamp('s')),
+    ('Price', pa.float32()), # Null when the bus stopped being listed.
+    ('Seats_Available', pa.int16()),
+    ('Listed', pa.bool_()),
+])
+
+SERIES_STATS = {
+    'Buses': ('Price', 'size'),
+    'Price_Min': ('Price', 'min'),
+    'Price_Median': ('Price', 'median'),
+    'Price_Mean': ('Price', 'mean'),
+    'Price_Max': ('Price', 'max'),
+    'Seats_Mean': ('Seats_Available', 'mean'),
+    'Sold_Out': ('Sold_Out', 'sum'),
+}
+
+
+@dataclass
+class AppendReport:
+    """What one crawl added to the store."""
+    scraped_at: pd.Timestamp
+    buses: int = 0 # Distinct buses in the crawl.
+    new: int = 0 # Buses seen for the first time.
+    changed: int = 0 # Known buses whose price or seats changed.
+    delisted: int = 0 # Known buses on crawled routes that were no longer listed.
+
+    @property
+    def events(self):
+        return self.new + self.changed + self.delisted
+
+    def __str__(self):
+        return (f"{self.scraped_at:%Y-%m-%d %H:%M:%S}: {self.buses} buses, {self.events} events "
+                f"({self.new} new, {self.changed} changed, {self.delisted} delisted)")
+
+
+def _write_parquet(df, path, schema=None):
+    """Writes a frame to Parquet atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path) # Readers never see a half-written file.
+
+
+def _utc_naive(when):
+    """Timestamp in naive UTC, the form the store keeps ('...Z' / '+05:30' inputs are converted)."""
+    when = pd.Timestamp(when)
+    return when.tz_convert("UTC").tz_localize(None) if when.tzinfo is not None else when
+
+
+def _read_parquet(path, columns):
+    """Reads a Parquet file, or returns an empty frame with `columns` if there is none."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    return pq.read_table(path).to_pandas()
+
+
+class HistoryStore:
+    """Partitioned, change-only history of bus prices and seats."""
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self.events_dir = os.path.join(root, "events")
+        self.buses_path = os.path.join(root, "buses.parquet")
+        self.state_path = os.path.join(root, "state.parquet")
+        self.scrape_series_path = os.path.join(root, "series", "scrape.parquet")
+        self.daily_series_path = os.path.join(root, "series", "daily.parquet")
+
+    # --- Writes ---
+
+    def append(self, df, scraped_at=None):
+        """Adds one crawl (a cleaned frame, see cleaning.clean_files) and returns an AppendReport.
+
+        Every file is computed before any is written. The series, events
+        and bus files are replaced first and the state file last, so an
+        interrupted append leaves the state as it was and re-running the
+        same crawl rewrites the same files.
+        """
+        scraped_at = _utc_naive(scraped_at or pd.Timestamp.now("UTC")).floor("s")
+        crawl = prepare_frame(df).drop_duplicates('Bus_Key', keep='last') # Same identity as bus_routes.
+        crawl = crawl.dropna(subset=['Price'])
+        report = AppendReport(scraped_at, buses=len(crawl))
+        writes = [] # (frame, path, schema), in commit order.
+
+        buses = _read_parquet(self.buses_path, BUS_COLUMNS)
+        state = _read_parquet(self.state_path, STATE_COLUMNS).set_index('Bus_Key')
+
+        # New buses and changed values, compared with the latest known state.
+        current = crawl.set_index('Bus_Key')[['Price', 'Seats_Available']]
+        previous = state.reindex(current.index)
+        is_new = previous['Price'].isna() & previous['Listed'].isna()
+        changed = ~is_new & (
+            (previous['Price'] != current['Price'])
+            | (previous['Seats_Available'] != current['Seats_Available'])
+            | (previous['Listed'] != True) # Listed again after a gap.
+        )
+        report.new, report.changed = int(is_new.sum()), int(changed.sum())
+        events = current[is_new | changed].assign(Listed=True)
+
+        # Known buses on the crawled routes that are no longer listed.
+        on_routes = buses[buses['Route_Link'].isin(crawl['Route_Link'].unique())]['Bus_Key']
+        gone = state.index.intersection(on_routes).difference(current.index)
+        gone = gone[state.loc[gone, 'Listed'].astype(bool).to_numpy()]
+        report.delisted = len(gone)
+        if len(gone):
+            events = pd.concat([events, pd.DataFrame({'Price': None, 'Seats_Available': None, 'Listed': False}, index=gone)])
+
+        if not events.empty:
+            events = events.rename_axis('Bus_Key').reset_index()
+            events.insert(1, 'Scraped_At', scraped_at)
+            events['Seats_Available'] = events['Seats_Available'].astype('Int16')
+            partition = os.path.join(self.events_dir, f"scrape_date={scraped_at:%Y-%m-%d}")
+            writes.append((events, os.path.join(partition, f"part-{scraped_at:%Y%m%dT%H%M%S}.parquet"), EVENT_SCHEMA))
+
+        # Dimension rows for first-seen buses.
+        if report.new:
+            fresh = crawl[crawl['Bus_Key'].isin(current.index[is_new])].assign(First_Seen=scraped_at)
+            buses = pd.concat([buses, fresh[BUS_COLUMNS]], ignore_index=True)
+            writes.append((buses, self.buses_path, None))
+
+        # Latest state.
+        state = state.astype({'Price': 'float64', 'Seats_Available': 'float64', 'Listed': bool})
+        state.loc[gone, ['Price', 'Seats_Available', 'Listed']] = [None, None, False]
+        update = current.astype('float64').assign(Listed=True, Last_Seen=scraped_at)
+        state = pd.concat([state.drop(update.index, errors='ignore'), update])
+        writes.append((state.rename_axis('Bus_Key').reset_index()[STATE_COLUMNS], self.state_path, None))
+
+        writes[:0] = self._series_writes(crawl, scraped_at) # Series first, state last.
+        for frame, path, schema in writes:
+            _write_parquet(frame, path, schema)
+        return report
+
+    def _series_writes(self, crawl, scraped_at):
+        """Returns the per-route series files with this crawl's stats added and that day's row refreshed."""
+        crawl = crawl.assign(Sold_Out=crawl['Seats_Available'] == 0)
+        stats = crawl.groupby(['Route_Link', 'Route_name'], observed=True).agg(**SERIES_STATS).reset_index()
+        stats.insert(0, 'Scraped_At', scraped_at)
+        if os.path.exists(self.scrape_series_path):
+            series = _read_parquet(self.scrape_series_path, stats.columns)
+            series = series[series['Scraped_At'] != scraped_at] # Re-appending a crawl replaces it.
+            stats = pd.concat([series, stats], ignore_index=True)
+        series = stats.sort_values(['Scraped_At', 'Route_Link'], ignore_index=True)
+
+        day = scraped_at.normalize()
+        daily = downsample(series[series['Scraped_At'].dt.normalize() == day], 'D').rename(columns={'Scraped_At': 'Date'})
+        if os.path.exists(self.daily_series_path):
+            previous = _read_parquet(self.daily_series_path, daily.columns)
+            daily = pd.concat([previous[previous['Date'] != day], daily], ignore_index=True)
+        daily = daily.sort_values(['Date', 'Route_Link'], ignore_index=True)
+        return [(series, self.scrape_series_path, None), (daily, self.daily_series_path, None)]
+
+    # --- Reads ---
+
+    def buses(self):
+        """The bus dimension table (one row per Bus_Key)."""
+        return _read_parquet(self.buses_path, BUS_COLUMNS)
+
+    def events(self, start=None, end=None, route_link=None, bus_keys=None):
+        """Change events in [start, end], optionally for one route or some buses; reads only the needed days."""
+        if not os.path.isdir(self.events_dir):
+            return EVENT_SCHEMA.empty_table().to_pandas()
+        dataset = ds.dataset(self.events_dir, format="parquet", partitioning="hive")
+        condition = None
+        for part in _range_filter(start, end):
+            condition = part if condition is None else condition & part
+        if route_link is not None:
+            buses = self.buses()
+            bus_keys = buses.loc[buses['Route_Link'] == route_link, 'Bus_Key'].tolist()
+        if bus_keys is not None:
+            part = ds.field('Bus_Key').isin(list(bus_keys))
+            condition = part if condition is None else condition & part
+        table = dataset.to_table(columns=EVENT_SCHEMA.names, filter=condition)
+        return table.to_pandas().sort_values(['Scraped_At', 'Bus_Key'], ignore_index=True)
+
+    def as_of(self, when):
+        """Reconstructs every bus's Price / Seats_Available / Listed as of `when` from the events."""
+        events = self.events(end=when)
+        return events.drop_duplicates('Bus_Key', keep='last').reset_index(drop=True)
+
+    def bus_trend(self, bus_key, start=None, end=None):
+        """The value changes of one bus, one row per change."""
+        return self.events(start, end, bus_keys=[bus_key])
+
+    def route_series(self, start=None, end=None, route_links=None, resolution="daily"):
+        """Pre-downsampled per-route stats: 'scrape' (one row per crawl), 'daily' or 'weekly'."""
+        path = self.scrape_series_path if resolution == "scrape" else self.daily_series_path
+        series = _read_parquet(path, ['Route_Link'])
+        if series.empty:
+            return series
+        time_column = 'Scraped_At' if resolution == "scrape" else 'Date'
+        if start is not None:
+            series = series[series[time_column] >= _utc_naive(start)]
+        if end is not None:
+            series = series[series[time_column] <= _utc_naive(end)]
+        if route_links is not None:
+            series = series[series['Route_Link'].isin(route_links)]
+        if resolution == "weekly":
+            series = downsample(series.rename(columns={'Date': 'Scraped_At'}), 'W').rename(columns={'Scraped_At': 'Date'})
+        return series.reset_index(drop=True)
+
+
+def _range_filter(start, end):
+    """Partition (scrape_date) and row (Scraped_At) filters for a time range."""
+    filters = []
+    if start is not None:
+        start = _utc_naive(start)
+        filters += [ds.field('scrape_date') >= f"{start:%Y-%m-%d}", ds.field('Scraped_At') >= start.to_pydatetime()]
+    if end is not None:
+        end = _utc_naive(end)
+        filters += [ds.field('scrape_date') <= f"{end:%Y-%m-%d}", ds.field('Scraped_At') <= end.to_pydatetime()]
+    return filters
+
+
+def downsample(series, freq):
+    """Folds per-crawl (or daily) route stats into one row per route and `freq` period."""
+    if series.empty:
+        return series.copy()
+    period = series['Scraped_At'].dt.to_period(freq).dt.start_time
+    grouped = series.assign(Scraped_At=period).groupby(['Scraped_At', 'Route_Link', 'Route_name'], observed=True)
+    return grouped.agg(
+        Buses=('Buses', 'max'),
+        Price_Min=('Price_Min', 'min'),
+        Price_Median=('Price_Median', 'median'),
+        Price_Mean=('Price_Mean', 'mean'),
+        Price_Max=('Price_Max', 'max'),
+        Seats_Mean=('Seats_Mean', 'mean'),
+        Sold_Out=('Sold_Out', 'max'),
+    ).reset_index()
+
+
+def main(argv=None):
+    """Appends one crawl's cleaned data to the history store."""
+    parser = argparse.ArgumentParser(description="Append a crawl to the price/seat history store.")
+    parser.add_argument("paths", nargs="*", help=f"Scraped or cleaned CSVs (default: {CLEANED_PATH}).")
+    parser.add_argument("--history", default=HISTORY_DIR, help="History store directory.")
+    parser.add_argument("--scraped-at", help="Crawl time (ISO 8601, UTC; default: now).")
+    args = parser.parse_args(argv)
+
+    df = clean_files(args.paths or [CLEANED_PATH])
+    report = HistoryStore(args.history).append(df, args.scraped_at)
+    print(f"Appended {report}")
+
+
+if __name__ == "__main__":
+    main()
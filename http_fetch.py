@@ -0,0 +1,229 @@
+"""Browserless asyncio fetcher for Redbus route pages.
+
+Fetches the route links over one pooled aiohttp session with bounded
+concurrency and per-host rate limiting, then reads the bus cards straight
+from the server-rendered HTML or from JSON embedded in the page. Routes
+whose HTML carries no bus data are handed back for the Selenium scraper, so
+both paths produce the same bus-details rows.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import asyncio # Imports asyncio for concurrent fetching.
+import json # Imports json for embedded page data.
+import os # Imports os for building dataset paths.
+import re # Imports re to locate embedded JSON.
+from collections import defaultdict # Imports defaultdict for per-host state.
+from dataclasses import dataclass, field # Imports dataclass for result records.
+from urllib.parse import urlsplit # Imports urlsplit to find each link's host.
+
+import aiohttp # Imports aiohttp for the pooled async HTTP client.
+import pandas as pd # Imports the pandas library for data handling.
+
+from extraction import COLUMNS, FIELD_NAMES, BusRecord, parse_bus_cards, records_to_rows # Imports the shared record schema.
+from checkpoint import CheckpointStore # Imports the resumable crawl store.
+from scraper import OPERATOR_FILES, ROUTE_LINKS_DIR, RetryPolicy, ScrapeFailure, load_jobs, run_scrape # Imports the shared job model and Selenium fallback.
+
+# Browser-like headers so the server returns the same markup Chrome receives.
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+# Matches JSON state assigned in an inline script, e.g. window.__INITIAL_STATE__ = {...};
+STATE_PATTERN = re.compile(r"window\.__[A-Z_]+__\s*=\s*(\{.*?\})\s*;?\s*</script>", re.S)
+# Matches JSON data islands, e.g. <script id="__NEXT_DATA__" type="application/json">{...}</script>
+DATA_ISLAND_PATTERN = re.compile(r"<script[^>]*type=\"application/(?:ld\+)?json\"[^>]*>(.*?)</script>", re.S)
+
+# Candidate keys for each field in embedded inventory JSON; the first key present wins.
+JSON_FIELD_KEYS = {
+    "bus_name": ("travelsName", "Tvs", "operatorName"),
+    "bus_type": ("busType", "bt", "busTypeName"),
+    "departure_time": ("departureTime", "dt", "depTime"),
+    "destination_time": ("arrivalTime", "at", "arrTime"),
+    "total_duration": ("duration", "dur", "journeyDuration"),
+    "ratings": ("rating", "rt", "totalRatings"),
+    "price": ("fare", "minFare", "price"),
+    "seats_available": ("availableSeats", "nsa", "seatsAvailable"),
+}
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one route without a browser."""
+    job: object # The ScrapeJob that was fetched.
+    rows: list = field(default_factory=list) # Bus-details rows read from the page.
+    needs_browser: bool = False # True when the page had no bus data in its HTML.
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart."""
+
+    def __init__(self, rate_per_host):
+        self.interval = 1.0 / rate_per_host if rate_per_host else 0.0 # Seconds between requests.
+        self._next_slot = {} # Host -> loop time of its next free slot.
+        self._locks = defaultdict(asyncio.Lock) # One lock per host.
+
+    async def wait(self, host):
+        """Waits until a request to `host` is allowed."""
+        if not self.interval:
+            return
+        async with self._locks[host]:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now)) # Earliest allowed start.
+            self._next_slot[host] = slot + self.interval # Reserves the following slot.
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# --- Parsing ---
+
+def _iter_inventory(node):
+    """Yields every dict in a JSON tree that looks like a bus inventory item."""
+    if isinstance(node, dict):
+        if any(key in node for key in JSON_FIELD_KEYS["bus_name"]):
+            yield node
+            return
+        for value in node.values():
+            yield from _iter_inventory(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_inventory(value)
+
+
+def _first_value(item, keys):
+    """Returns the first present key's value as text, or None."""
+    for key in keys:
+        if item.get(key) is not None:
+            return str(item[key])
+    return None
+
+
+def parse_embedded_json(html):
+    """Reads BusRecords from JSON state embedded in the page, if any."""
+    records = []
+    for pattern in (STATE_PATTERN, DATA_ISLAND_PATTERN):
+        for blob in pattern.findall(html):
+            try:
+                data = json.loads(blob)
+            except ValueError:
+                continue # Not plain JSON (e.g. a JS object literal); skip it.
+            for item in _iter_inventory(data):
+                records.append(BusRecord(*(_first_value(item, JSON_FIELD_KEYS[name]) for name in FIELD_NAMES)))
+    return records
+
+
+def parse_route_page(html):
+    """Returns the BusRecords of a route page: server-rendered cards first, then embedded JSON."""
+    return parse_bus_cards(html) or parse_embedded_json(html)
+
+
+# --- Fetching ---
+
+async def fetch_route(session, job, semaphore, limiter, policy):
+    """Fetches and parses one route page; any error is retried with backoff, then re-raised."""
+    host = urlsplit(job.route_link).netloc
+    for attempt in range(1, policy.max_attempts + 1):
+        await limiter.wait(host) # Per-host politeness.
+        try:
+            async with semaphore: # Bounds the number of requests in flight.
+                async with session.get(job.route_link) as response:
+                    response.raise_for_status()
+                    html = await response.text()
+            records = parse_route_page(html)
+            if not records:
+                return FetchResult(job, needs_browser=True) # Data is rendered client-side only.
+            return FetchResult(job, rows=records_to_rows(records, job.route_name, job.route_link))
+        except Exception:
+            if attempt == policy.max_attempts:
+                raise # Reported by fetch_routes() as this route's failure.
+            await asyncio.sleep(policy.backoff * 2 ** (attempt - 1)) # Exponential backoff.
+
+
+async def fetch_routes(jobs, concurrency=16, rate_per_host=4.0, policy=None, checkpoint=None):
+    """Fetches all jobs concurrently; returns (rows, browser_jobs, failures)."""
+    policy = policy or RetryPolicy()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(rate_per_host)
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300) # Pooled keep-alive connections.
+    timeout = aiohttp.ClientTimeout(total=policy.page_timeout)
+
+    rows, browser_jobs, failures = [], [], []
+
+    async def run(job):
+        """Fetches one job and files its outcome as soon as it arrives."""
+        try:
+            result = await fetch_route(session, job, semaphore, limiter, policy)
+            if result.needs_browser:
+                browser_jobs.append(job) # Left for the Selenium fallback.
+                return
+            if checkpoint is not None:
+                checkpoint.record_success(job, result.rows) # Persists the route immediately.
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}" # Any error fails this route only, never the whole batch.
+            failures.append(ScrapeFailure(job, policy.max_attempts, error))
+            if checkpoint is not None:
+                checkpoint.record_failure(job, error)
+            return
+        rows.extend(result.rows)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+        await asyncio.gather(*(run(job) for job in jobs))
+    return rows, browser_jobs, failures
+
+
+def run_fetch(jobs, concurrency=16, rate_per_host=4.0, policy=None, checkpoint=None):
+    """Synchronous wrapper around fetch_routes(); returns (DataFrame, browser_jobs, failures)."""
+    rows, browser_jobs, failures = asyncio.run(
+        fetch_routes(jobs, concurrency, rate_per_host, policy, checkpoint)
+    )
+    return pd.DataFrame(rows, columns=COLUMNS), browser_jobs, failures
+
+
+# --- Command Line ---
+
+def main(argv=None):
+    """Fetches route pages without a browser, falling back to Selenium where needed."""
+    parser = argparse.ArgumentParser(description="Fetch Redbus bus details over HTTP.")
+    parser.add_argument("--operators", nargs="*", choices=sorted(OPERATOR_FILES), help="Operators to fetch (default: all).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight.")
+    parser.add_argument("--rate", type=float, default=4.0, help="Maximum requests per second per host.")
+    parser.add_argument("--attempts", type=int, default=3, help="Attempts per route.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds.")
+    parser.add_argument("--links-dir", default=ROUTE_LINKS_DIR, help="Folder with the route-link CSVs.")
+    parser.add_argument("--links-table", help="Combined route-link table from route_discovery.py.")
+    parser.add_argument("--base-url", help="Serve route paths from this host (e.g. a local fixture server).")
+    parser.add_argument("--output", default=os.path.join("Bus details dataset", "df_fetched.csv"), help="Output CSV.")
+    parser.add_argument("--checkpoint", default="scrape_checkpoint.sqlite", help="SQLite checkpoint store ('' to disable).")
+    parser.add_argument("--refresh-stale", type=float, metavar="HOURS", help="Only re-fetch routes older than HOURS.")
+    parser.add_argument("--export-all", action="store_true", help="Write every route in the checkpoint, not just this run's.")
+    parser.add_argument("--fallback-workers", type=int, default=2, help="Browser workers for pages that need Selenium (0 to skip).")
+    args = parser.parse_args(argv)
+
+    policy = RetryPolicy(max_attempts=args.attempts, page_timeout=args.timeout)
+    selected = jobs = load_jobs(args.links_dir, args.operators, args.base_url, args.links_table)
+    checkpoint = CheckpointStore(args.checkpoint) if args.checkpoint else None
+    if checkpoint is not None:
+        max_age = None if args.refresh_stale is None else args.refresh_stale * 3600
+        jobs = checkpoint.pending(selected, max_age=max_age) # Skips completed (or still fresh) routes.
+    df, browser_jobs, failures = run_fetch(jobs, args.concurrency, args.rate, policy, checkpoint)
+
+    if browser_jobs and args.fallback_workers:
+        browser_df, browser_failures = run_scrape(
+            browser_jobs, workers=args.fallback_workers, policy=policy, checkpoint=checkpoint
+        )
+        df = pd.concat([df, browser_df], ignore_index=True)
+        failures += browser_failures
+
+    if checkpoint is not None:
+        df = checkpoint.results(None if args.export_all else selected) # Includes this run's routes completed earlier.
+        checkpoint.close()
+    df.to_csv(args.output, index=False)
+    print(f"Fetched {len(df)} buses from {len(jobs)} routes ({len(browser_jobs)} via Selenium) -> {args.output}")
+    for failure in failures:
+        print(f"FAILED after {failure.attempts} attempts: {failure.job.route_link} ({failure.error})")
+
+
+if __name__ == "__main__":
+    main()
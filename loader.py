@@ -0,0 +1,364 @@
+"""Idempotent, batched bulk loader for the bus_routes table.
+
+Replaces the notebook's single executemany() of df_final.values.tolist().
+Every bus gets a natural key (Route_Link, Bus_Name, Departure_Time,
+Bus_Type) hashed into Bus_Key, which is UNIQUE in the table, so reloading
+the same data updates rows instead of duplicating them. Rows go in as
+multi-row INSERT ... upsert statements (or LOAD DATA LOCAL INFILE on MySQL)
+with one commit per batch, and the loader reports its throughput and how
+many buses were new, already stored or duplicated.
+
+The scraped data does contain natural-key collisions: a route page saved
+under two route names, or the same service listed twice, gives rows that
+share Bus_Key but differ elsewhere. Only the last such row is stored, so a
+load stores fewer rows than it reads; the report counts them as duplicates.
+
+Works against MySQL/TiDB (mysql.connector) and against a local SQLite file.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import csv # Imports csv for LOAD DATA temp files.
+import hashlib # Imports hashlib for the natural-key hash.
+import os # Imports os for temp-file cleanup.
+import sqlite3 # Imports sqlite3 for the local stand-in database.
+import tempfile # Imports tempfile for LOAD DATA batches.
+import time # Imports time to measure throughput.
+from dataclasses import dataclass # Imports dataclass for the load report.
+
+import numpy as np # Imports numpy to count the distinct stored buses a load matched.
+
+from cleaning import iter_clean_chunks, to_export_frame # Imports the cleaning pipeline.
+from queries import ensure_indexes, is_sqlite, refresh_lookups # Imports the filter indexes and lookup tables.
+
+STAGE_TABLE = "bus_routes_stage" # Session-private staging table for LOAD DATA batches.
+
+NATURAL_KEY = ['Route_Link', 'Bus_Name', 'Departure_Time', 'Bus_Type'] # Identifies one bus service.
+
+# Columns written by the loader, in statement order.
+LOAD_COLUMNS = [
+    'Bus_Key',
+    'Bus_Name',
+    'Bus_Type',
+    'Departure_Time',
+    'Destination_Time',
+    'Total_Duration',
+    'Duration_Minutes',
+    'Ratings',
+    'Price',
+    'Seats_Available',
+    'Route_name',
+    'Route_Link',
+    'Source_City',
+    'Destination_City',
+]
+
+# Columns refreshed when a bus that is already stored is loaded again.
+UPDATE_COLUMNS = [c for c in LOAD_COLUMNS if c != 'Bus_Key' and c not in NATURAL_KEY]
+
+MYSQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bus_routes (
+    ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+    Bus_Key CHAR(40) NOT NULL,
+    Bus_Name VARCHAR(255) NOT NULL,
+    Bus_Type VARCHAR(255) NOT NULL,
+    Departure_Time TIME NOT NULL,
+    Destination_Time TIME NOT NULL,
+    Total_Duration VARCHAR(32) NOT NULL,
+    Duration_Minutes INT,
+    Ratings DECIMAL(2,1) NOT NULL,
+    Price DECIMAL(8,2) NOT NULL,
+    Seats_Available INT NOT NULL,
+    Route_name VARCHAR(255) NOT NULL,
+    Route_Link VARCHAR(512) NOT NULL,
+    Source_City VARCHAR(128),
+    Destination_City VARCHAR(128),
+    Updated_At TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_bus_routes_bus_key (Bus_Key)
+)
+"""
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bus_routes (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Bus_Key TEXT NOT NULL UNIQUE,
+    Bus_Name TEXT NOT NULL,
+    Bus_Type TEXT NOT NULL,
+    Departure_Time TEXT NOT NULL,
+    Destination_Time TEXT NOT NULL,
+    Total_Duration TEXT NOT NULL,
+    Duration_Minutes INTEGER,
+    Ratings REAL NOT NULL,
+    Price REAL NOT NULL,
+    Seats_Available INTEGER NOT NULL,
+    Route_name TEXT NOT NULL,
+    Route_Link TEXT NOT NULL,
+    Source_City TEXT,
+    Destination_City TEXT,
+    Updated_At TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+class SchemaError(Exception):
+    """bus_routes exists but lacks columns the loader writes (e.g. a table from before Bus_Key)."""
+
+
+@dataclass
+class LoadReport:
+    """Outcome and throughput of one load."""
+    rows: int = 0 # Rows read from the cleaned chunks.
+    inserted: int = 0 # Buses new to the table.
+    updated: int = 0 # Buses already stored before this load (rewritten only if a value changed).
+    duplicates: int = 0 # Rows whose natural key repeats an earlier row of this load; the last one is stored.
+    batches: int = 0 # Batches committed.
+    seconds: float = 0.0 # Wall time spent loading.
+
+    @property
+    def stored(self):
+        """Distinct buses this load wrote (new plus already stored)."""
+        return self.inserted + self.updated
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.rows} rows -> {self.stored} buses ({self.inserted} new, {self.updated} already stored, "
+            f"{self.duplicates} duplicate keys) in {self.batches} batches, "
+            f"{self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+# --- Helpers ---
+
+def bus_key(df):
+    """Hashes the natural key of each row into a stable 40-character hex id."""
+    parts = [df[c].astype("string").fillna("") for c in NATURAL_KEY]
+    joined = parts[0].str.cat(parts[1:], sep="\x1f") # Unit separator keeps fields unambiguous.
+    return joined.map(lambda s: hashlib.sha1(s.encode("utf-8")).hexdigest())
+
+
+def prepare_frame(df):
+    """Returns the LOAD_COLUMNS frame for a cleaned chunk, with Bus_Key and SQL-ready values."""
+    out = to_export_frame(df) # Times as 'HH:MM:SS' text.
+    out['Bus_Key'] = bus_key(out)
+    return out[LOAD_COLUMNS]
+
+
+def _rows(frame):
+    """Converts a prepared frame into parameter tuples with None for missing values."""
+    columns = [frame[c].astype(object).where(frame[c].notna(), None).tolist() for c in frame.columns] # Python scalars.
+    return list(zip(*columns))
+
+
+def _table_columns(conn, cursor):
+    """Returns the column names of bus_routes."""
+    if is_sqlite(conn):
+        cursor.execute("PRAGMA table_info(bus_routes)")
+        return {row[1] for row in cursor.fetchall()}
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'bus_routes'"
+    )
+    return {str(row[0]) for row in cursor.fetchall()}
+
+
+def _column_type(cursor, column):
+    """Returns the MySQL DATA_TYPE of a bus_routes column, or None if the column does not exist."""
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'bus_routes' AND COLUMN_NAME = %s",
+        (column,),
+    )
+    row = cursor.fetchone()
+    return str(row[0]).lower() if row else None
+
+
+def ensure_schema(conn):
+    """Creates bus_routes (with its natural-key constraint), its filter indexes and lookup tables.
+
+    CREATE TABLE IF NOT EXISTS keeps an existing table as it is, so a
+    bus_routes created by the notebook (no Bus_Key, cities or Updated_At)
+    raises SchemaError here instead of failing on the first upsert. On
+    MySQL, a Ratings column from the older FLOAT(2,1) schema is converted
+    to DECIMAL(2,1): an approximate FLOAT never equals the cursor value
+    in the keyset condition, so paging by Ratings would repeat or skip rows.
+    """
+    cursor = conn.cursor()
+    cursor.execute(SQLITE_SCHEMA if is_sqlite(conn) else MYSQL_SCHEMA)
+    missing = [c for c in LOAD_COLUMNS + ['Updated_At'] if c not in _table_columns(conn, cursor)]
+    if missing:
+        cursor.close()
+        raise SchemaError(
+            f"bus_routes exists without the loader's columns {missing}; it predates the Bus_Key schema. "
+            "Rename it (e.g. to bus_routes_old) and run the loader again to rebuild the table."
+        )
+    if not is_sqlite(conn) and _column_type(cursor, 'Ratings') in ('float', 'double'):
+        cursor.execute("ALTER TABLE bus_routes MODIFY Ratings DECIMAL(2,1) NOT NULL")
+    conn.commit()
+    cursor.close()
+    ensure_indexes(conn)
+
+
+def _existing_ids(conn, cursor, keys):
+    """Returns the IDs of the stored buses among `keys` (one Bus_Key index lookup per batch)."""
+    mark = "?" if is_sqlite(conn) else "%s"
+    cursor.execute(f"SELECT ID FROM bus_routes WHERE Bus_Key IN ({','.join([mark] * len(keys))})", list(keys))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def upsert_statement(conn, n_rows):
+    """Builds one multi-row INSERT ... upsert for `n_rows` rows."""
+    mark = "?" if is_sqlite(conn) else "%s"
+    row = "(" + ",".join([mark] * len(LOAD_COLUMNS)) + ")"
+    sql = f"INSERT INTO bus_routes ({', '.join(LOAD_COLUMNS)}) VALUES " + ",".join([row] * n_rows)
+    if is_sqlite(conn):
+        updates = ", ".join(f"{c} = excluded.{c}" for c in UPDATE_COLUMNS)
+        # Only rows whose values differ are touched, so Updated_At (and the snapshot's
+        # incremental refresh) moves for real changes only, as ON UPDATE CURRENT_TIMESTAMP does on MySQL.
+        changed = " OR ".join(f"bus_routes.{c} IS NOT excluded.{c}" for c in UPDATE_COLUMNS)
+        return sql + f" ON CONFLICT(Bus_Key) DO UPDATE SET {updates}, Updated_At = CURRENT_TIMESTAMP WHERE {changed}"
+    updates = ", ".join(f"{c} = VALUES({c})" for c in UPDATE_COLUMNS)
+    return sql + f" ON DUPLICATE KEY UPDATE {updates}"
+
+
+# --- Loading ---
+
+def _load_batch_insert(conn, cursor, rows):
+    """Sends one batch as a single multi-row upsert."""
+    cursor.execute(upsert_statement(conn, len(rows)), [v for row in rows for v in row])
+
+
+def _create_stage(cursor):
+    """Creates the empty staging table (LOAD_COLUMNS only, no keys or indexes) for this session."""
+    cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGE_TABLE}")
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {STAGE_TABLE} AS SELECT {', '.join(LOAD_COLUMNS)} FROM bus_routes WHERE 1 = 0"
+    )
+
+
+def _load_batch_infile(conn, cursor, rows):
+    """Sends one batch through LOAD DATA LOCAL INFILE (MySQL only; needs allow_local_infile=True).
+
+    The file goes into the staging table and is then upserted with
+    INSERT ... SELECT ... ON DUPLICATE KEY UPDATE. LOAD DATA ... REPLACE
+    would delete and reinsert every stored bus under a new ID, which the
+    snapshot's ID high-water mark would pick up as new rows.
+    """
+    handle, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(handle, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([["\\N" if v is None else v for v in row] for row in rows])
+        cursor.execute(f"DELETE FROM {STAGE_TABLE}")
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {STAGE_TABLE} "
+            f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\r\\n' ({', '.join(LOAD_COLUMNS)})",
+            (path,),
+        )
+    finally:
+        os.remove(path)
+    columns = ", ".join(LOAD_COLUMNS)
+    updates = ", ".join(f"{c} = VALUES({c})" for c in UPDATE_COLUMNS)
+    cursor.execute(
+        f"INSERT INTO bus_routes ({columns}) SELECT {columns} FROM {STAGE_TABLE} ON DUPLICATE KEY UPDATE {updates}"
+    ) # Same upsert as the INSERT path: stored buses keep their IDs.
+
+
+def load_chunks(conn, chunks, batch_size=1000, method="insert"):
+    """Upserts cleaned chunks into bus_routes, committing every `batch_size` rows.
+
+    `method` is "insert" (multi-row INSERT upsert) or "infile" (LOAD DATA
+    LOCAL INFILE into a staging table, then an upsert; MySQL only).
+    Returns a LoadReport.
+    """
+    if method == "infile" and is_sqlite(conn):
+        raise ValueError("LOAD DATA LOCAL INFILE is only available on MySQL")
+    send = _load_batch_infile if method == "infile" else _load_batch_insert
+
+    ensure_schema(conn)
+    report = LoadReport()
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        if method == "infile":
+            _create_stage(cursor)
+        cursor.execute("SELECT COALESCE(MAX(ID), 0) FROM bus_routes")
+        high_water = cursor.fetchone()[0] # IDs above this were inserted by this load.
+        matched = [] # IDs of buses stored before this load, per batch (a key may recur in later chunks).
+        for chunk in chunks:
+            frame = prepare_frame(chunk)
+            # Keeps the last row per natural key, as the upsert would; sending both would rewrite
+            # the stored bus (and its Updated_At) twice on every reload of the same data.
+            unique = frame.drop_duplicates('Bus_Key', keep='last')
+            report.rows += len(frame)
+            report.duplicates += len(frame) - len(unique)
+            rows = _rows(unique)
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                existing = _existing_ids(conn, cursor, [row[0] for row in batch]) # Bus_Key is the first column.
+                send(conn, cursor, batch)
+                conn.commit() # Per-batch commit: a failure only loses the current batch.
+                report.inserted += len(batch) - len(existing)
+                matched.append(np.array(existing, dtype=np.int64))
+                report.batches += 1
+        matched = np.concatenate(matched) if matched else np.empty(0, dtype=np.int64)
+        report.updated = len(np.unique(matched[matched <= high_water]))
+        report.duplicates += len(matched) - report.updated
+        refresh_lookups(conn) # Keeps the dashboard dropdowns in step with the data.
+        if method == "infile":
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGE_TABLE}")
+    finally:
+        cursor.close()
+        report.seconds = time.perf_counter() - started
+    return report
+
+
+def load_dataframe(conn, df, batch_size=1000, method="insert"):
+    """Upserts one cleaned DataFrame (see cleaning.clean_files)."""
+    return load_chunks(conn, [df], batch_size, method)
+
+
+def connect_mysql(host, port, user, password, database, allow_local_infile=False):
+    """Opens a mysql.connector connection (imported lazily so SQLite runs need no MySQL driver)."""
+    import mysql.connector # Imports the connector for MySQL database access.
+    return mysql.connector.connect(
+        host=host, port=port, user=user, password=password, database=database,
+        allow_local_infile=allow_local_infile,
+    )
+
+
+def main(argv=None):
+    """Cleans the operator CSVs and upserts them into bus_routes."""
+    parser = argparse.ArgumentParser(description="Bulk-load cleaned bus details into bus_routes.")
+    parser.add_argument("paths", nargs="*", help="Operator CSVs (default: Bus details dataset/df_*.csv).")
+    parser.add_argument("--sqlite", help="Load into this SQLite file instead of MySQL.")
+    parser.add_argument("--host", default=os.environ.get("REDBUS_DB_HOST", "127.0.0.1"), help="MySQL host.")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("REDBUS_DB_PORT", 3306)), help="MySQL port.")
+    parser.add_argument("--user", default=os.environ.get("REDBUS_DB_USER", "root"), help="MySQL user.")
+    parser.add_argument("--database", default=os.environ.get("REDBUS_DB_NAME", "Bus_details"), help="MySQL database.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT/commit.")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Raw CSV rows cleaned at a time.")
+    parser.add_argument("--method", choices=["insert", "infile"], default="insert", help="Bulk insert method.")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        conn = sqlite3.connect(args.sqlite)
+    else:
+        conn = connect_mysql(
+            args.host, args.port, args.user, os.environ.get("REDBUS_DB_PASSWORD", ""), args.database,
+            allow_local_infile=args.method == "infile",
+        )
+    try:
+        report = load_chunks(conn, iter_clean_chunks(args.paths or None, args.chunksize), args.batch_size, args.method)
+    finally:
+        conn.close()
+    print(f"Loaded {report}")
+    if report.duplicates:
+        print(f"Note: {report.duplicates} rows repeat the natural key ({', '.join(NATURAL_KEY)}) of another row; "
+              "only the last of each is stored.")
+
+
+if __name__ == "__main__":
+    main()
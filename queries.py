@@ -0,0 +1,241 @@
+"""Query layer that pushes the dashboard filters down to SQL.
+
+The Bus Routes page used to load the whole bus_routes table into pandas and
+filter it in memory. Here the sidebar selections become one parameterized
+SELECT against indexed columns, so only the matching rows leave the
+database, and the dropdown options come from small lookup tables that the
+loader refreshes after every load.
+"""
+
+import sqlite3 # Imports sqlite3 for the dialect check.
+from dataclasses import dataclass # Imports dataclass for the filter record.
+from typing import Optional # Imports typing helpers.
+
+import pandas as pd # Imports the pandas library for data handling.
+
+from cleaning import format_time_of_day # Imports the TIME -> 'HH:MM:SS' formatter.
+
+# Columns shown in the results table, in display order.
+DISPLAY_COLUMNS = [
+    'ID',
+    'Route_name',
+    'Bus_Name',
+    'Bus_Type',
+    'Departure_Time',
+    'Destination_Time',
+    'Total_Duration',
+    'Price',
+    'Ratings',
+    'Seats_Available',
+    'Source_City',
+    'Destination_City',
+]
+
+# Secondary indexes for every column the sidebar filters on (name, columns).
+INDEXES = [
+    ("idx_bus_routes_operator", "Bus_Name"),
+    ("idx_bus_routes_type", "Bus_Type"),
+    ("idx_bus_routes_route", "Source_City, Destination_City"),
+    ("idx_bus_routes_price", "Price"),
+    ("idx_bus_routes_ratings", "Ratings"),
+    ("idx_bus_routes_updated", "Updated_At"), # Incremental snapshot refresh (snapshot.py).
+    ("idx_bus_routes_departure", "Departure_Time"), # Keyset pagination by departure time.
+]
+
+# Columns the results table can be ordered by; each is indexed (ID is the primary key).
+SORT_COLUMNS = ("ID", "Price", "Ratings", "Departure_Time")
+
+# Lookup tables feeding the sidebar dropdowns: table -> source column in bus_routes.
+LOOKUPS = {
+    "bus_operators": "Bus_Name",
+    "bus_types": "Bus_Type",
+    "source_cities": "Source_City",
+}
+
+
+@dataclass(frozen=True)
+class BusFilters:
+    """Sidebar selections; None (or "All") means the filter is off."""
+    source_city: Optional[str] = None
+    operator: Optional[str] = None
+    bus_type: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    min_rating: Optional[float] = None
+    seats_only: bool = False
+
+
+# --- Schema ---
+
+def is_sqlite(conn):
+    """True for a sqlite3 connection, False for a MySQL one."""
+    return isinstance(conn, sqlite3.Connection)
+
+
+def ensure_indexes(conn):
+    """Creates the filter indexes and lookup tables if they are missing."""
+    cursor = conn.cursor()
+    if is_sqlite(conn):
+        for name, columns in INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON bus_routes ({columns})")
+        for table in LOOKUPS:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (Name TEXT PRIMARY KEY, Bus_Count INTEGER NOT NULL)")
+    else:
+        cursor.execute(
+            "SELECT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'bus_routes'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        for name, columns in INDEXES:
+            if name not in existing:
+                cursor.execute(f"CREATE INDEX {name} ON bus_routes ({columns})")
+        for table in LOOKUPS:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (Name VARCHAR(255) PRIMARY KEY, Bus_Count INT NOT NULL)"
+            )
+    conn.commit()
+    cursor.close()
+
+
+def refresh_lookups(conn):
+    """Rebuilds the lookup tables from bus_routes (a handful of rows each)."""
+    cursor = conn.cursor()
+    for table, column in LOOKUPS.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(
+            f"INSERT INTO {table} (Name, Bus_Count) "
+            f"SELECT {column}, COUNT(*) FROM bus_routes WHERE {column} IS NOT NULL GROUP BY {column}"
+        )
+    conn.commit()
+    cursor.close()
+
+
+# --- Queries ---
+
+def _placeholder(conn):
+    return "?" if is_sqlite(conn) else "%s"
+
+
+def where_clause(filters, mark="%s"):
+    """Turns BusFilters into (" WHERE ...", params) using `mark` as the placeholder."""
+    conditions, params = [], []
+    for column, value in (
+        ("Source_City", filters.source_city),
+        ("Bus_Name", filters.operator),
+        ("Bus_Type", filters.bus_type),
+    ):
+        if value not in (None, "All"):
+            conditions.append(f"{column} = {mark}")
+            params.append(value)
+    if filters.price_min is not None:
+        conditions.append(f"Price >= {mark}")
+        params.append(filters.price_min)
+    if filters.price_max is not None:
+        conditions.append(f"Price <= {mark}")
+        params.append(filters.price_max)
+    if filters.min_rating:
+        conditions.append(f"Ratings >= {mark}")
+        params.append(filters.min_rating)
+    if filters.seats_only:
+        conditions.append("Seats_Available > 0")
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _fetch(conn, sql, params=()):
+    """Runs a query and returns a DataFrame named after the cursor columns."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    finally:
+        cursor.close()
+
+
+def tidy_results(df):
+    """Normalises driver-specific values (TIME timedeltas, Decimal prices) for display."""
+    for column in ('Departure_Time', 'Destination_Time'):
+        if column in df.columns and pd.api.types.is_timedelta64_dtype(df[column]):
+            df[column] = format_time_of_day(df[column])
+    for column in ('Price', 'Ratings'):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def count_buses(conn, filters):
+    """Returns the number of rows matching `filters` (index-assisted COUNT)."""
+    where, params = where_clause(filters, _placeholder(conn))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM bus_routes{where}", params)
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+
+def _keyset_condition(sort, descending, mark):
+    """Condition selecting rows after a (sort value, ID) cursor in the given direction."""
+    op = "<" if descending else ">"
+    if sort == "ID":
+        return f"ID {op} {mark}"
+    return f"({sort} {op} {mark} OR ({sort} = {mark} AND ID {op} {mark}))"
+
+
+def fetch_page(conn, filters, sort="ID", descending=False, after=None, size=50, columns=DISPLAY_COLUMNS):
+    """Returns (page DataFrame, next cursor) using keyset pagination on (sort, ID).
+
+    `after` is the cursor returned for the previous page (None for the
+    first). The cursor holds the driver's raw values (e.g. Decimal for the
+    DECIMAL Ratings and Price columns on MySQL), so the equality branch of
+    the keyset condition matches the stored value exactly. Each page is one index range scan of `size` + 1 rows, so its cost
+    does not grow with the number of matches or the page number. The next
+    cursor is None on the last page.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by {sort!r}; expected one of {SORT_COLUMNS}")
+    mark = _placeholder(conn)
+    where, params = where_clause(filters, mark)
+    if after is not None:
+        value, row_id = after
+        where += (" AND " if where else " WHERE ") + _keyset_condition(sort, descending, mark)
+        params += [row_id] if sort == "ID" else [value, value, row_id]
+    direction = " DESC" if descending else ""
+    order = f"ID{direction}" if sort == "ID" else f"{sort}{direction}, ID{direction}"
+    selected = list(dict.fromkeys([*columns, "ID", sort])) # The cursor needs both (each selected once).
+    sql = f"SELECT {', '.join(selected)} FROM bus_routes{where} ORDER BY {order} LIMIT {int(size) + 1}"
+    page = _fetch(conn, sql, params)
+    cursor = None
+    if len(page) > size:
+        page = page.iloc[:size]
+        cursor = (page[sort].tolist()[-1], page['ID'].tolist()[-1]) # Python scalars from the raw driver values.
+    return tidy_results(page[list(columns)].copy()), cursor
+
+
+def iter_buses(conn, filters, sort="ID", descending=False, batch_size=10_000, columns=DISPLAY_COLUMNS):
+    """Yields every matching row as DataFrame batches, one keyset page at a time (for streamed exports)."""
+    cursor = None
+    while True:
+        page, cursor = fetch_page(conn, filters, sort, descending, cursor, batch_size, columns)
+        if not page.empty:
+            yield page
+        if cursor is None:
+            return
+
+
+def fetch_lookup(conn, table):
+    """Returns the sorted option list of one lookup table."""
+    if table not in LOOKUPS:
+        raise ValueError(f"Unknown lookup table: {table!r}")
+    return _fetch(conn, f"SELECT Name FROM {table} ORDER BY Name")['Name'].tolist()
+
+
+def fetch_price_bounds(conn):
+    """Returns (min price, max price) from the Price index."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MIN(Price), MAX(Price) FROM bus_routes")
+        low, high = cursor.fetchone()
+        return float(low or 0), float(high or 0)
+    finally:
+        cursor.close()
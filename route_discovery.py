@@ -0,0 +1,131 @@
+"""Concurrent route-link discovery for all operators.
+
+Replaces the per-operator cells of "bus_route_links_using selenium.ipynb".
+Instead of searching Google, clicking the first result and walking the
+Carousel by XPath, each worker opens the operator's direct online-booking
+URL, reads every route link on the page with one script call, and clicks
+through the DC_117_pageTabs pages with explicit waits (no per-element hover
+sleeps). All operators run concurrently and the result is one deduplicated
+route-link table.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import functools # Imports functools to bind the browser profile.
+import os # Imports os for building dataset paths.
+from concurrent.futures import ThreadPoolExecutor, as_completed # Imports the thread pool for operators.
+
+import pandas as pd # Imports the pandas library for data handling.
+from selenium.webdriver.support.ui import WebDriverWait # Imports explicit waits.
+
+from browser import add_browser_arguments, make_driver, profile_from_args # Imports the shared tuned browser factory.
+from scraper import ROUTE_LINKS_DIR # Imports the dataset folder.
+
+# Direct operator pages (the notebook's State_links), keyed like scraper.OPERATOR_FILES.
+OPERATOR_LINKS = {
+    "APSRTC": "https://www.redbus.in/online-booking/apsrtc",
+    "TSRTC": "https://www.redbus.in/online-booking/tsrtc",
+    "KSRTC_Kerala": "https://www.redbus.in/online-booking/ksrtc-kerala",
+    "SBSTC_State": "https://www.redbus.in/online-booking/south-bengal-state-transport-corporation-sbstc",
+    "WBSTC_State": "https://www.redbus.in/online-booking/wbtc-ctc",
+    "BSRTC": "https://www.redbus.in/online-booking/bihar-state-road-transport-corporation-bsrtc",
+    "HRTC": "https://www.redbus.in/online-booking/hrtc",
+    "PEPSU": "https://www.redbus.in/online-booking/pepsu-punjab",
+    "ASTC": "https://www.redbus.in/online-booking/astc",
+    "KAAC_TRANSPORT": "https://www.redbus.in/online-booking/kaac-transport",
+}
+
+LINKS_TABLE = os.path.join(ROUTE_LINKS_DIR, "df_route_links.csv") # Combined output table.
+
+# Returns [[route name, href], ...] for every route link on the current page.
+ROUTES_JS = """
+return Array.from(document.querySelectorAll('a.route'), a => [
+    (a.getAttribute('title') || a.innerText || '').trim(), a.href
+]);
+"""
+
+# Clicks the tab after the active one and returns its label, or null on the last page.
+NEXT_PAGE_JS = """
+const active = document.querySelector('div.DC_117_pageTabs.DC_117_pageActive');
+const next = active && active.nextElementSibling;
+if (!next || !next.classList.contains('DC_117_pageTabs')) return null;
+next.scrollIntoView({block: 'center'});
+next.click();
+return next.innerText.trim();
+"""
+
+# Returns the label of the active page tab.
+ACTIVE_PAGE_JS = """
+const active = document.querySelector('div.DC_117_pageTabs.DC_117_pageActive');
+return active ? active.innerText.trim() : null;
+"""
+
+
+def discover_operator_routes(driver, operator, url, timeout=15.0, max_pages=50):
+    """Collects (operator, route name, route link) tuples across all pages of one operator."""
+    driver.get(url) # Opens the operator page directly.
+    wait = WebDriverWait(driver, timeout)
+    wait.until(lambda d: d.execute_script(ROUTES_JS)) # Waits for the first page of routes.
+
+    routes = []
+    for _ in range(max_pages):
+        routes.extend((operator, name, href) for name, href in driver.execute_script(ROUTES_JS) if href)
+        label = driver.execute_script(NEXT_PAGE_JS) # Moves to the next page tab.
+        if label is None:
+            break # Last page reached.
+        wait.until(lambda d: d.execute_script(ACTIVE_PAGE_JS) == label) # Waits for the tab switch.
+    return routes
+
+
+def _discover(operator, url, driver_factory, timeout):
+    """Runs one operator on its own browser."""
+    driver = driver_factory()
+    try:
+        return discover_operator_routes(driver, operator, url, timeout)
+    finally:
+        driver.quit()
+
+
+def discover_routes(operators=None, workers=4, driver_factory=make_driver, timeout=15.0):
+    """Discovers all operators concurrently; returns (DataFrame, {operator: error})."""
+    targets = {op: url for op, url in OPERATOR_LINKS.items() if not operators or op in operators}
+    routes, errors = [], {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+        futures = {
+            pool.submit(_discover, op, url, driver_factory, timeout): op
+            for op, url in targets.items()
+        }
+        for future in as_completed(futures):
+            try:
+                routes.extend(future.result())
+            except Exception as e:
+                errors[futures[future]] = str(e) # Keeps the other operators' results.
+
+    df = pd.DataFrame(routes, columns=["Operator", "Bus Routes Name", "Bus Routes Link"])
+    df = df.drop_duplicates(subset=["Operator", "Bus Routes Link"]).reset_index(drop=True) # One row per route page.
+    return df, errors
+
+
+def main(argv=None):
+    """Discovers route links for the selected operators and writes one table."""
+    parser = argparse.ArgumentParser(description="Discover Redbus route links for all operators.")
+    parser.add_argument("--operators", nargs="*", choices=sorted(OPERATOR_LINKS), help="Operators to discover (default: all).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of browser workers.")
+    parser.add_argument("--timeout", type=float, default=15.0, help="Explicit wait timeout in seconds.")
+    parser.add_argument("--output", default=LINKS_TABLE, help="Combined route-link CSV.")
+    add_browser_arguments(parser)
+    args = parser.parse_args(argv)
+
+    df, errors = discover_routes(
+        args.operators,
+        workers=args.workers,
+        driver_factory=functools.partial(make_driver, profile_from_args(args)),
+        timeout=args.timeout,
+    )
+    df.to_csv(args.output, index=False)
+    print(f"Discovered {len(df)} routes for {df['Operator'].nunique()} operators -> {args.output}")
+    for operator, error in errors.items():
+        print(f"FAILED {operator}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Parallel bus-details scraper for the Redbus route links.
+
+Replaces the copy-pasted per-operator cells in bus_details.ipynb with a single
+work queue of (operator, route link) jobs that is drained by a pool of
+headless Chrome workers (tuned by browser.py). Results from every worker are
+merged into one DataFrame with the same columns as the notebook's
+df_<OPERATOR>_<n>.csv files.
+"""
+
+import argparse # Imports argparse for the command line interface.
+import functools # Imports functools to bind scrape_route() options.
+import os # Imports os for building dataset paths.
+import queue # Imports queue for the shared job queue.
+import threading # Imports threading for the browser worker pool.
+import time # Imports the time module for retry backoff.
+from dataclasses import dataclass # Imports dataclass for the job/policy records.
+from urllib.parse import urlsplit, urlunsplit # Imports URL helpers for rebasing links.
+
+import pandas as pd # Imports the pandas library for data handling.
+from selenium.webdriver.common.by import By # Imports locator strategies.
+from selenium.webdriver.support.ui import WebDriverWait # Imports explicit waits.
+from selenium.webdriver.support import expected_conditions as EC # Imports wait conditions.
+from selenium.common.exceptions import TimeoutException, WebDriverException # Imports Selenium errors.
+
+import telemetry # Imports the span timings and profiling switch.
+from browser import add_browser_arguments, make_driver, profile_from_args # Imports the shared tuned browser factory.
+from checkpoint import CheckpointStore # Imports the resumable crawl store.
+from extraction import CARD_CLASSES, COLUMNS, extract_bus_records, records_to_rows # Imports the single-round-trip card extractor.
+
+# --- Dataset Configuration ---
+
+ROUTE_LINKS_DIR = "Bus route links dataset" # Folder holding the route-link CSVs.
+
+# Maps each operator to the route-link CSV produced by bus_route_links_using selenium.ipynb.
+OPERATOR_FILES = {
+    "APSRTC": "df_APSRTC.csv",
+    "TSRTC": "df_TSRTC.csv",
+    "KSRTC_Kerala": "df_KSRTC_Kerala.csv",
+    "SBSTC_State": "df_SBSTC_State.csv",
+    "WBSTC_State": "df_WBSTC_State.csv",
+    "BSRTC": "df_BSRTC_routes.csv",
+    "HRTC": "df_HRTC_State.csv",
+    "PEPSU": "df_PEPSU.csv",
+    "ASTC": "df_ASTC_State.csv",
+    "KAAC_TRANSPORT": "df_KAAC_TRANSPORT.csv",
+}
+
+
+@dataclass(frozen=True)
+class ScrapeJob:
+    """One unit of work: a single route page of a single operator."""
+    operator: str # Operator key from OPERATOR_FILES.
+    route_name: str # Value of the "Bus Routes Name" column.
+    route_link: str # Value of the "Bus Routes Link" column.
+
+
+@dataclass
+class RetryPolicy:
+    """Per-worker retry and timeout settings."""
+    max_attempts: int = 3 # Attempts per job before it is reported as failed.
+    page_timeout: float = 30.0 # Seconds allowed for page loads and explicit waits.
+    backoff: float = 2.0 # Base delay in seconds between attempts (doubles each retry).
+    restart_driver: bool = True # Restarts the browser after a WebDriver error.
+
+
+@dataclass
+class ScrapeFailure:
+    """A job that exhausted its retries."""
+    job: ScrapeJob # The job that failed.
+    attempts: int # Number of attempts made.
+    error: str # Last error message.
+
+
+# --- Job Queue Helpers ---
+
+def rebase_link(link, base_url):
+    """Points a Redbus link at another host (e.g. a local fixture server), keeping the path."""
+    if not base_url:
+        return link # Nothing to rebase.
+    base = urlsplit(base_url) # Parses the replacement scheme and host.
+    parts = urlsplit(link) # Parses the original link.
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+def load_jobs(links_dir=ROUTE_LINKS_DIR, operators=None, base_url=None, links_table=None):
+    """Builds the (operator, route link) job list from the route-link CSVs.
+
+    `links_table` reads the combined table written by route_discovery.py
+    instead of the per-operator files.
+    """
+    if links_table:
+        frames = [pd.read_csv(links_table)] # One table with an Operator column.
+    else:
+        frames = [
+            pd.read_csv(os.path.join(links_dir, file_name)).assign(Operator=operator) # Reads the operator's route links.
+            for operator, file_name in OPERATOR_FILES.items()
+        ]
+
+    jobs = [] # Collected jobs, in file order.
+    for df in frames:
+        if operators:
+            df = df[df["Operator"].isin(operators)] # Skips operators that were not requested.
+        df = df.drop_duplicates(subset=["Bus Routes Link"]) # Each route page only needs one visit.
+        for operator, route_name, route_link in zip(df["Operator"], df["Bus Routes Name"], df["Bus Routes Link"]):
+            jobs.append(ScrapeJob(operator, route_name, rebase_link(route_link, base_url)))
+    return jobs
+
+
+# --- Browser Helpers ---
+
+@dataclass
+class ScrollResult:
+    """Outcome of scroll_to_end()."""
+    iterations: int # Scroll/poll iterations used.
+    cards: int # Bus cards loaded when scrolling stopped.
+    reached_end: bool # False when the hard cap stopped the loop.
+
+
+# Scrolls to the bottom and returns [bus card count, document height] in one round trip.
+SCROLL_JS = """
+window.scrollTo(0, document.body.scrollHeight);
+return [document.querySelectorAll(arguments[0]).length, document.body.scrollHeight];
+"""
+
+# Returns [bus card count, document height] without scrolling.
+LIST_STATE_JS = """
+return [document.querySelectorAll(arguments[0]).length, document.body.scrollHeight];
+"""
+
+
+def scroll_to_end(driver, max_iterations=200, settle_timeout=1.0, poll=0.1):
+    """Scrolls an infinite list until the card count and page height stop changing.
+
+    After each scroll an explicit wait polls the list state every `poll`
+    seconds and scrolls again as soon as more buses arrive, instead of
+    sleeping a fixed interval. The list is complete when nothing changes for
+    `settle_timeout` seconds; `max_iterations` caps the number of scrolls.
+    """
+    selector = "div." + ".".join(CARD_CLASSES) # Same card selector the extractor uses.
+    wait = WebDriverWait(driver, settle_timeout, poll_frequency=poll)
+    state = tuple(driver.execute_script(SCROLL_JS, selector)) # (cards, height) after scrolling.
+    for iteration in range(1, max_iterations + 1):
+        try:
+            wait.until(lambda d: tuple(d.execute_script(LIST_STATE_JS, selector)) != state) # Waits for growth.
+        except TimeoutException:
+            return ScrollResult(iteration, state[0], True) # Nothing new loaded: list is complete.
+        state = tuple(driver.execute_script(SCROLL_JS, selector)) # More buses arrived: keep scrolling.
+    return ScrollResult(max_iterations, state[0], False)
+
+
+def scrape_route(driver, job, timeout=30.0, extract_mode="script", max_scrolls=200, card_timeout=3.0):
+    """Scrapes every bus on one route page and returns a list of row dicts.
+
+    `card_timeout` bounds the wait for the first bus card, so a route
+    without buses costs seconds rather than the full page timeout; a list
+    that renders later is still picked up by scroll_to_end().
+    """
+    labels = dict(operator=job.operator, route=job.route_name) # Per-route and per-operator timings.
+    with telemetry.profiled("route", job.route_link), telemetry.span("scraper.route", **labels) as route_span:
+        with telemetry.span("scraper.page_load", **labels):
+            driver.get(job.route_link) # Opens the route page.
+        wait = WebDriverWait(driver, timeout) # Explicit wait bounded by the policy timeout.
+
+        # Clicks "View Buses" to reveal the government buses, when present.
+        with telemetry.span("scraper.click", **labels) as click_span:
+            try:
+                button = wait.until(EC.element_to_be_clickable((By.XPATH, "//div[@class='button']")))
+                button.click()
+                click_span.set(clicked=True)
+            except TimeoutException:
+                click_span.set(clicked=False) # Some routes list the buses directly.
+            try:
+                WebDriverWait(driver, card_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "div." + ".".join(CARD_CLASSES)))
+                )
+            except TimeoutException:
+                pass # No buses on this route; the scroll finds nothing and the route yields no rows.
+
+        # Scrolls until the lazily-loaded list stops growing.
+        with telemetry.span("scraper.scroll", **labels) as scroll_span:
+            scroll = scroll_to_end(driver, max_iterations=max_scrolls)
+            scroll_span.set(iterations=scroll.iterations, cards=scroll.cards, reached_end=scroll.reached_end)
+
+        # Extracts every bus card in one round trip, one aligned record per bus.
+        with telemetry.span("scraper.extract", mode=extract_mode, **labels) as extract_span:
+            records = extract_bus_records(driver, mode=extract_mode)
+            extract_span.set(rows=len(records))
+        rows = records_to_rows(records, job.route_name, job.route_link)
+        route_span.set(rows=len(rows))
+        return rows
+
+
+# --- Worker Pool ---
+
+def _worker(jobs, rows, failures, lock, policy, driver_factory, scrape, checkpoint):
+    """Drains the job queue with one private browser, retrying failed jobs."""
+    driver = None
+    try:
+        while True:
+            try:
+                job = jobs.get_nowait() # Takes the next job.
+            except queue.Empty:
+                return # Queue drained: worker exits.
+
+            for attempt in range(1, policy.max_attempts + 1):
+                try:
+                    if driver is None:
+                        driver = driver_factory() # Starts (or restarts) this worker's browser.
+                    result = scrape(driver, job, policy.page_timeout)
+                    if checkpoint is not None:
+                        checkpoint.record_success(job, result) # Persists the route first, so a failed write is retried without duplicate rows.
+                    with lock:
+                        rows.extend(result) # Merges the route's rows into the shared output.
+                    break
+                except Exception as e:
+                    if isinstance(e, WebDriverException) and policy.restart_driver and driver is not None:
+                        try:
+                            driver.quit() # Discards a possibly wedged browser.
+                        except Exception:
+                            pass
+                        driver = None
+                    if attempt == policy.max_attempts:
+                        with lock:
+                            failures.append(ScrapeFailure(job, attempt, str(e))) # Records the final failure.
+                        if checkpoint is not None:
+                            checkpoint.record_failure(job, str(e))
+                    else:
+                        time.sleep(policy.backoff * 2 ** (attempt - 1)) # Exponential backoff.
+    finally:
+        if driver is not None:
+            driver.quit() # Closes the browser when the worker finishes.
+
+
+def run_scrape(jobs, workers=4, policy=None, driver_factory=None, scrape=scrape_route, checkpoint=None):
+    """Runs the jobs on a pool of browser workers and returns (DataFrame, failures).
+
+    Each worker thread owns its own Chrome process, so the pool uses one core
+    per browser while the Python side only waits on WebDriver I/O. When a
+    CheckpointStore is given, each route is written to it as it completes.
+    """
+    policy = policy or RetryPolicy() # Uses the default policy when none is given.
+    if driver_factory is None:
+        driver_factory = lambda: make_driver(page_timeout=policy.page_timeout)
+
+    job_queue = queue.Queue() # Shared queue of pending jobs.
+    for job in jobs:
+        job_queue.put(job)
+
+    rows, failures = [], [] # Shared outputs, guarded by the lock.
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(job_queue, rows, failures, lock, policy, driver_factory, scrape, checkpoint),
+            name=f"scraper-{i}",
+            daemon=True,
+        )
+        for i in range(max(1, min(workers, len(jobs))))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return pd.DataFrame(rows, columns=COLUMNS), failures
+
+
+# --- Command Line ---
+
+def main(argv=None):
+    """Scrapes the selected operators and writes one merged CSV."""
+    parser = argparse.ArgumentParser(description="Scrape Redbus bus details in parallel.")
+    parser.add_argument("--operators", nargs="*", choices=sorted(OPERATOR_FILES), help="Operators to scrape (default: all).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of browser workers.")
+    parser.add_argument("--attempts", type=int, default=3, help="Attempts per route.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Page timeout in seconds.")
+    parser.add_argument("--links-dir", default=ROUTE_LINKS_DIR, help="Folder with the route-link CSVs.")
+    parser.add_argument("--links-table", help="Combined route-link table from route_discovery.py.")
+    parser.add_argument("--base-url", help="Serve route paths from this host (e.g. a local fixture server).")
+    parser.add_argument("--output", default=os.path.join("Bus details dataset", "df_scraped.csv"), help="Merged output CSV.")
+    parser.add_argument("--max-scrolls", type=int, default=200, help="Hard cap on scroll iterations per route.")
+    parser.add_argument("--extract", choices=["script", "source"], default="script", help="Card extraction mode.")
+    parser.add_argument("--checkpoint", default="scrape_checkpoint.sqlite", help="SQLite checkpoint store ('' to disable).")
+    parser.add_argument("--refresh-stale", type=float, metavar="HOURS", help="Only re-scrape routes older than HOURS.")
+    parser.add_argument("--export-all", action="store_true", help="Write every route in the checkpoint, not just this run's.")
+    parser.add_argument("--metrics", action="store_true", help="Log per-route/per-operator timings as JSON lines.")
+    parser.add_argument("--metrics-log", help="Write the JSON timing lines to this file (default: stderr).")
+    parser.add_argument("--metrics-port", type=int, help="Serve aggregated timings on http://127.0.0.1:PORT/metrics.")
+    parser.add_argument("--profile-route", metavar="TEXT", help="Profile routes whose link contains TEXT.")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile", help="Profiler for --profile-route.")
+    add_browser_arguments(parser)
+    args = parser.parse_args(argv)
+
+    telemetry.configure(
+        enabled=args.metrics or bool(args.metrics_log) or args.metrics_port is not None,
+        log_path=args.metrics_log,
+        metrics_port=args.metrics_port,
+        profile=f"route:{args.profile_route}" if args.profile_route else None,
+        profiler=args.profiler,
+    )
+
+    policy = RetryPolicy(max_attempts=args.attempts, page_timeout=args.timeout)
+    selected = jobs = load_jobs(args.links_dir, args.operators, args.base_url, args.links_table)
+    checkpoint = CheckpointStore(args.checkpoint) if args.checkpoint else None
+    if checkpoint is not None:
+        max_age = None if args.refresh_stale is None else args.refresh_stale * 3600
+        jobs = checkpoint.pending(selected, max_age=max_age) # Skips completed (or still fresh) routes.
+        print(f"Checkpoint: {len(selected) - len(jobs)} routes up to date, {len(jobs)} to scrape")
+
+    df, failures = run_scrape(
+        jobs,
+        workers=args.workers,
+        policy=policy,
+        driver_factory=functools.partial(make_driver, profile_from_args(args, args.base_url, page_timeout=args.timeout)),
+        scrape=functools.partial(scrape_route, extract_mode=args.extract, max_scrolls=args.max_scrolls),
+        checkpoint=checkpoint,
+    )
+    if checkpoint is not None:
+        # Writes this run's routes (including ones completed by earlier runs), or with --export-all every stored route.
+        checkpoint.results(None if args.export_all else selected).to_csv(args.output, index=False)
+        checkpoint.close()
+    else:
+        df.to_csv(args.output, index=False) # Writes the merged result.
+
+    print(f"Scraped {len(df)} buses from {len(jobs) - len(failures)}/{len(jobs)} routes -> {args.output}")
+    for failure in failures:
+        print(f"FAILED after {failure.attempts} attempts: {failure.job.route_link} ({failure.error})")
+    for item in sorted(telemetry.snapshot(), key=lambda i: (i["labels"].get("operator", ""), i["name"])):
+        if item["name"] == "scraper.route" and item["labels"].get("status") == "ok":
+            print(f"{item['labels'].get('operator')}: {item['count']} routes, {item.get('rows', 0)} buses, "
+                  f"{item['seconds'] / item['count']:.1f}s avg, {item['max']:.1f}s max") # Per-operator summary.
+
+
+if __name__ == "__main__":
+    main()
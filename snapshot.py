@@ -0,0 +1,121 @@
+"""Local columnar snapshot of the cleaned bus_routes table.
+
+Keeps the dashboard-ready frame in an Arrow IPC file, so a new Streamlit
+process or an expired cache does not have to re-query the whole table from
+TiDB Cloud and re-run the cleaning. Loading converts the file to pandas, so
+the frame takes as much memory as a freshly queried one. Refreshes
+are incremental: only rows with an ID above the snapshot's high-water mark,
+or with Updated_At at/after the last refresh, are fetched, cleaned and
+merged in.
+"""
+
+import json # Imports json for the snapshot metadata.
+import os # Imports os for atomic file replacement.
+
+import pandas as pd # Imports the pandas library for data handling.
+import pyarrow as pa # Imports Arrow for the columnar snapshot file.
+
+import telemetry # Imports the span timings.
+from cleaning import split_route # Imports the shared route -> city parser.
+from queries import DISPLAY_COLUMNS, is_sqlite, tidy_results # Imports the query helpers.
+
+SNAPSHOT_PATH = os.path.join("cache", "bus_routes.arrow") # Default snapshot location.
+METADATA_KEY = b"redbus_snapshot" # Schema metadata key holding the refresh state.
+
+SNAPSHOT_COLUMNS = DISPLAY_COLUMNS + ['Route_Link', 'Updated_At'] # Columns kept in the snapshot.
+CATEGORY_COLUMNS = ['Route_name', 'Bus_Name', 'Bus_Type', 'Total_Duration', 'Source_City', 'Destination_City', 'Route_Link']
+
+
+def prepare_dashboard_frame(df):
+    """Cleans rows fetched from bus_routes into the frame the dashboard works on."""
+    df = tidy_results(df) # TIME -> 'HH:MM:SS', Price/Ratings -> numeric.
+    df['Seats_Available'] = pd.to_numeric(df['Seats_Available'], errors='coerce').fillna(0).astype(int) # Seats as int.
+    df = df.dropna(subset=['Price', 'Ratings']) # Removes rows with missing Price or Ratings.
+    if 'Source_City' not in df.columns or df['Source_City'].isna().any():
+        df['Source_City'], df['Destination_City'] = split_route(df['Route_name']) # Rows loaded before ingest-time cities.
+    if 'Updated_At' in df.columns:
+        df['Updated_At'] = df['Updated_At'].astype(str) # Same text form on MySQL and SQLite.
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category') # Repeated names stored once.
+    return df.reset_index(drop=True)
+
+
+# --- Snapshot File ---
+
+def write_snapshot(df, state, path=SNAPSHOT_PATH):
+    """Writes the frame and its refresh state atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(state).encode()})
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path) # Readers never see a half-written file.
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Reads the snapshot; returns (DataFrame, state) or (None, None) if there is none."""
+    if not os.path.exists(path):
+        return None, None
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all() # Zero-copy read; to_pandas() below copies into pandas.
+    state = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b"{}"))
+    return table.to_pandas(), state
+
+
+# --- Refresh ---
+
+def _fetch_changes(conn, state):
+    """Fetches rows added (ID above the high-water mark) or changed since the last refresh."""
+    mark = "?" if is_sqlite(conn) else "%s"
+    sql = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM bus_routes"
+    params = []
+    if state:
+        sql += f" WHERE ID > {mark} OR Updated_At >= {mark}"
+        params = [state['high_water_id'], state['last_updated_at']]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    finally:
+        cursor.close()
+
+
+def refresh_snapshot(conn, path=SNAPSHOT_PATH, rebuild=False):
+    """Brings the snapshot up to date with bus_routes and returns the dashboard frame.
+
+    Deleted rows are only dropped by a full `rebuild`.
+    """
+    with telemetry.span("snapshot.load", page="data"):
+        snapshot, state = (None, None) if rebuild else load_snapshot(path)
+    with telemetry.span("snapshot.query", page="data") as query_span:
+        changes = _fetch_changes(conn, state if snapshot is not None else None)
+        query_span.set(rows=len(changes))
+    if snapshot is not None and not changes.empty:
+        known = dict(zip(snapshot['ID'], snapshot['Updated_At'].astype(str))) # ID -> stored version.
+        fresh = [known.get(i) != str(u) for i, u in zip(changes['ID'], changes['Updated_At'])]
+        changes = changes[fresh].copy() # Drops rows re-read only because they share the last timestamp.
+    if snapshot is not None and changes.empty:
+        return snapshot # Already current: no rewrite.
+
+    with telemetry.span("snapshot.clean", page="data", rows=len(changes)):
+        changes = prepare_dashboard_frame(changes)
+    if snapshot is None:
+        merged = changes
+    else:
+        kept = snapshot[~snapshot['ID'].isin(changes['ID'])] # Drops the old versions of changed rows.
+        merged = pd.concat([kept, changes], ignore_index=True)
+        for column in CATEGORY_COLUMNS:
+            merged[column] = merged[column].astype('category') # Re-unifies categories after the merge.
+        merged = merged.sort_values('ID', ignore_index=True)
+
+    new_state = {
+        'high_water_id': int(merged['ID'].max()) if not merged.empty else 0,
+        'last_updated_at': str(merged['Updated_At'].astype(str).max()) if not merged.empty else "",
+        'rows': len(merged),
+    }
+    with telemetry.span("snapshot.write", page="data", rows=len(merged)):
+        write_snapshot(merged, new_state, path)
+    return merged
@@ -1,98 +1,94 @@
 import pandas as pd # Imports the pandas library for data handling.
 import streamlit as st # Imports the streamlit library for building the web app.
 import mysql.connector # Imports the connector for MySQL database access.
+import os # Imports os for the environment settings.
+import tempfile # Imports tempfile to spool CSV exports to disk.
 import time # Imports the time module for delays.
 import plotly.express as px # Imports Plotly for creating interactive charts.
+import plotly.graph_objects as go # Imports Plotly graph objects for charts drawn from precomputed stats.
 from PIL import Image # Imports the Image module from PIL to handle images.
 
+import telemetry # Imports the span timings and profiling switch.
+
+from aggregations import OUTLIERS_PER_TYPE, build_chart_aggregates # Imports the pre-aggregated chart data.
+from db_pool import ConnectionPool, DatabaseConfig, PoolTimeout # Imports the connection pool.
+from filter_engine import FilterEngine # Imports the indexed in-memory filter engine.
+from history import HistoryStore # Imports the price/seat history store.
+from queries import SORT_COLUMNS, BusFilters, count_buses, fetch_lookup, fetch_page, fetch_price_bounds, iter_buses # Imports the SQL query layer.
+from snapshot import load_snapshot, refresh_snapshot # Imports the local columnar snapshot cache.
+
 # --- MySQL Configuration and Utility Functions ---
 
-# Use st.cache_resource for the connection object
-# Caches the MySQL connection object so it's created only once.
-@st.cache_resource
-def get_connection():
-    """Establishes and returns a MySQL connection to TiDB Cloud."""
+# Tables with more rows than this are filtered in SQL instead of the in-memory FilterEngine.
+ENGINE_MAX_ROWS = int(os.environ.get("REDBUS_ENGINE_MAX_ROWS", 2_000_000))
+# Results larger than this are not offered as a CSV download (the served file is held in memory).
+EXPORT_MAX_ROWS = int(os.environ.get("REDBUS_EXPORT_MAX_ROWS", 500_000))
+
+def _database_config():
+    """Reads the connection settings from the [mysql] section of .streamlit/secrets.toml or REDBUS_DB_* variables."""
     try:
-        # Attempts to connect to the MySQL database.
-        connection = mysql.connector.connect(
-            host="gateway01.ap-southeast-1.prod.aws.tidbcloud.com", # Database host.
-            port=4000, # Database port.
-            user="g174YAijTsGambu.root", # Database username.
-            # **FINAL CORRECTED PASSWORD**
-            password="0d3UU1fEGvra4Dez", # Database password.
-            database="Bus_details" # Database name.
-        )
-        return connection # Returns the successful connection.
-    except mysql.connector.Error as err:
-        st.error(f"Error connecting to MySQL: {err}") # Shows an error if connection fails.
-        return None # Returns None on failure.
+        if "mysql" in st.secrets:
+            return DatabaseConfig.from_mapping(st.secrets["mysql"]) # Credentials stay out of the source.
+    except FileNotFoundError:
+        pass # No secrets file: fall back to the environment.
+    return DatabaseConfig.from_env()
+
+# Use st.cache_resource for the pool object
+# One pool per process; every session checks a connection out for each load and returns it afterwards.
+@st.cache_resource
+def get_pool():
+    """Creates the shared connection pool (connections are opened lazily on first checkout)."""
+    return ConnectionPool(_database_config())
 
-# Load all data from the database
-# Caches the data for 600 seconds (10 minutes) to avoid repeated queries.
-@st.cache_data(ttl=600) 
-def load_data_from_db():
-    """Loads bus route data, cleans it, and prepares columns for filtering."""
-    conn = get_connection() # Gets the cached database connection.
-    if conn is None:
-        st.warning("Failed to connect to the database. Displaying empty data.") # Shows warning if no connection.
+
+# Applies the REDBUS_METRICS* / REDBUS_PROFILE* settings once per process.
+@st.cache_resource
+def init_telemetry():
+    """Configures span logging, the optional metrics endpoint and page profiling from the environment."""
+    return telemetry.configure_from_env() # Returns the metrics port, if one was started.
+
+
+def _snapshot_fallback():
+    """Returns the last snapshot on disk, or an empty DataFrame if there is none."""
+    df, _ = load_snapshot() # Falls back to the last snapshot on disk.
+    if df is None:
+        st.warning("Failed to connect to the database. Displaying empty data.") # Shows warning if no data at all.
         return pd.DataFrame() # Returns an empty DataFrame.
+    st.warning("Database unavailable: showing the last local snapshot.") # Stale but usable data.
+    return df
 
+# Load all data from the local snapshot
+# Caches the data for 600 seconds (10 minutes); on expiry only new or changed rows are queried.
+@st.cache_data(ttl=600) 
+def load_data_from_db():
+    """Loads the cleaned bus route data from the local Arrow snapshot, refreshing it incrementally."""
     try:
-        with st.spinner('Loading data from database...'): # Displays a loading spinner.
-            # **CORRECTED SQL QUERY**
-            query = """
-            SELECT 
-                ID, Bus_Name, Bus_Type, Departure_Time, Destination_Time, 
-                Total_Duration, Ratings, Price, Seats_Available, Route_name, Route_Link 
-            FROM Bus_details.bus_routes 
-            """ # SQL query to fetch all route details.
-            df = pd.read_sql(query, conn) # Executes the query and loads data into a DataFrame.
-            conn.close() # Closes the database connection.
-
-            # --- Data Cleaning and Preparation ---
-            
-            # 1. Clean Time/Duration columns
-            if 'Departure_Time' in df.columns:
-                # Cleans the Departure_Time string to keep only the time part.
-                df['Departure_Time'] = df['Departure_Time'].apply(lambda x: str(x)[-8:] if 'days' in str(x) else str(x))
-
-            # 2. Ensure Price, Ratings, and Seats are numeric
-            df['Price'] = pd.to_numeric(df['Price'], errors='coerce') # Converts Price to numeric (NaN on error).
-            df['Ratings'] = pd.to_numeric(df['Ratings'], errors='coerce') # Converts Ratings to numeric (NaN on error).
-            # Converts Seats_Available to int, filling missing values with 0.
-            df['Seats_Available'] = pd.to_numeric(df['Seats_Available'], errors='coerce').fillna(0).astype(int)
-            
-            df.dropna(subset=['Price', 'Ratings'], inplace=True) # Removes rows with missing Price or Ratings.
-            
-            # 3. **ROBUST ROUTE SPLITTING FIX**
-            if 'Route_name' in df.columns:
-                # Replaces common delimiters with ' -> ' for consistent splitting.
-                df['Route_name'] = df['Route_name'].astype(str).str.replace(' - ', ' -> ', regex=False).str.replace('-', ' -> ', regex=False)
-                
-                # Splits the route name into Source and Destination, limiting to one split.
-                split_cols = df['Route_name'].str.split(' -> ', expand=True, n=1)
-                
-                # Assign Source and Destination columns safely
-                if split_cols.shape[1] >= 2:
-                    df['Source_City'] = split_cols[0].str.strip() # Extracts and strips Source City.
-                    df['Destination_City'] = split_cols[1].str.strip() # Extracts and strips Destination City.
-                elif split_cols.shape[1] == 1:
-                    df['Source_City'] = split_cols[0].str.strip() # Extracts Source City.
-                    df['Destination_City'] = 'Unknown Destination' # Sets destination as unknown.
-                else:
-                    df['Source_City'] = 'Unknown Source' # Sets source as unknown.
-                    df['Destination_City'] = 'Unknown Destination' # Sets destination as unknown.
-                    
-                df['Source_City'] = df['Source_City'].fillna('Unknown Source') # Fills any remaining NaN sources.
-                df['Destination_City'] = df['Destination_City'].fillna('Unknown Destination') # Fills any remaining NaN destinations.
-            else:
-                df['Source_City'] = 'N/A' # Default source if column is missing.
-                df['Destination_City'] = 'N/A' # Default destination if column is missing.
-
-        return df # Returns the cleaned DataFrame.
+        with st.spinner('Refreshing local snapshot...'): # Displays a loading spinner.
+            # Checks out a pinged connection, fetches only rows above the snapshot's ID high-water
+            # mark or updated since the last refresh, cleans them once (times, numeric columns,
+            # cities) and merges them into the local Arrow snapshot; the connection goes back
+            # to the pool when the block exits.
+            with get_pool().connection() as conn:
+                return refresh_snapshot(conn)
+    except (mysql.connector.Error, PoolTimeout) as err:
+        st.error(f"Error connecting to MySQL: {err}") # Shows an error if no connection could be used.
+        return _snapshot_fallback()
     except Exception as e:
         st.error(f"Failed to load data from the database: {e}") # Shows error if loading/cleaning fails.
-        return pd.DataFrame() # Returns an empty DataFrame on error.
+        return _snapshot_fallback() # Serves the last good snapshot if there is one.
+
+
+def pool_status_sidebar():
+    """Shows the connection pool's utilisation in the sidebar."""
+    stats = get_pool().stats()
+    with st.sidebar.expander("Database pool"):
+        st.progress(stats.utilisation, text=f"{stats.in_use} of {stats.size} connections in use")
+        st.caption(
+            f"Open: {stats.open} · Idle: {stats.idle} · Peak: {stats.peak_in_use}  \n"
+            f"Checkouts: {stats.checkouts} · Waits: {stats.waits} ({stats.wait_seconds:.2f}s) · "
+            f"Timeouts: {stats.timeouts}  \n"
+            f"Created: {stats.created} · Reconnects: {stats.reconnects} · Discarded: {stats.discarded}"
+        )
 
 
 # --- Streamlit Page Functions ---
@@ -201,109 +197,329 @@ def home_page():
     )
 
 
-def bus_routes_page_mysql():
-    """Displays the data table with dynamic sidebar filters, using whole numbers for the Ratings filter."""
-    st.title("🚌 Bus Routes Explorer") # Page title.
-    st.markdown("Use the sidebar filters to refine the list of available bus routes.") # Instructions.
-
+# Builds the filter indexes once per data load (same 600-second lifetime as the data cache).
+@st.cache_resource(ttl=600)
+def load_filter_engine():
+    """Returns a FilterEngine over the cleaned snapshot frame, or None when there is no data."""
     df = load_data_from_db() # Loads the bus data.
-
     if df.empty:
-        return # Stops if data is empty.
+        return None # Nothing to index.
+    with telemetry.span("dashboard.engine_build", page="Bus Routes", rows=len(df)):
+        return FilterEngine(df) # Categorical codes, posting lists and sorted price/rating indexes.
+
+
+# Columns shown in the results table and the CSV export, in display order.
+PROFESSIONAL_COLUMNS = [
+    'Route_name', 
+    'Bus_Name', 
+    'Bus_Type', 
+    'Departure_Time', 
+    'Destination_Time', 
+    'Total_Duration', 
+    'Price', 
+    'Ratings', 
+    'Seats_Available' 
+]
+
+# Sidebar dropdowns: (label, BusFilters field, widget key).
+FILTER_DROPDOWNS = [
+    ("Source City", "source_city", "filter_source"),
+    ("Bus Operator", "operator", "filter_operator"),
+    ("Bus Type", "bus_type", "filter_bus_type"),
+]
+
+
+def _facet_options(counts, selected):
+    """Returns "All" plus the reachable values (with the current selection kept even if unreachable)."""
+    values = sorted(counts) # Values still reachable under the other filters.
+    if selected not in ("All", None) and selected not in counts:
+        values = sorted(values + [selected]) # Keeps the widget value valid.
+    return ["All"] + values
+
+
+def _read_filters(price_bounds):
+    """Builds BusFilters from the sidebar widget state (defaults before the first render)."""
+    min_p, max_p = price_bounds # Precomputed min/max price.
+    price_range = st.session_state.get("filter_price", (float(min_p), float(max_p)))
+    return BusFilters(
+        source_city=st.session_state.get("filter_source", "All"), # "All" disables the filter.
+        operator=st.session_state.get("filter_operator", "All"),
+        bus_type=st.session_state.get("filter_bus_type", "All"),
+        price_min=price_range[0],
+        price_max=price_range[1],
+        min_rating=st.session_state.get("filter_rating", 0.0),
+        seats_only=st.session_state.get("filter_seats", False),
+    )
 
-    # --- Sidebar Filters ---
-    st.sidebar.header("Filter Options") # Sidebar header.
 
-    # 1. Route Filter (Source City)
-    all_source = sorted(df['Source_City'].unique()) # Gets unique source cities.
-    selected_source = st.sidebar.selectbox("Source City", ["All"] + list(all_source)) # Source city filter.
-    
-    # 2. Bus Operator Filter
-    all_operators = sorted(df['Bus_Name'].unique()) # Gets unique operator names.
-    selected_operator = st.sidebar.selectbox("Bus Operator", ["All"] + list(all_operators)) # Operator filter.
+def _filter_sidebar(filters, price_bounds, facets=None, options=None):
+    """Renders the sidebar filters.
+
+    Dropdowns list the engine's reachable values with bus counts (`facets`),
+    or every value from the lookup tables on the SQL path (`options`).
+    """
+    st.sidebar.header("Filter Options") # Sidebar header.
 
-    # 3. Bus Type Filter
-    bus_types = sorted(df['Bus_Type'].unique()) # Gets unique bus types.
-    selected_bus_type = st.sidebar.selectbox("Bus Type", ["All"] + list(bus_types)) # Bus type filter.
+    # 1-3. Source City, Bus Operator and Bus Type Filters
+    for label, field, key in FILTER_DROPDOWNS:
+        if facets is not None:
+            counts = facets[field] # Reachable values with bus counts.
+            st.sidebar.selectbox(
+                label, _facet_options(counts, getattr(filters, field)), key=key,
+                format_func=lambda v, counts=counts: v if v == "All" else f"{v} ({counts.get(v, 0)})" # Shows counts.
+            )
+        else:
+            st.sidebar.selectbox(label, ["All"] + options[field], key=key) # Lookup-table options.
 
     # 4. Price Range Filter
-    min_p, max_p = df['Price'].min(), df['Price'].max() # Gets min/max price.
-    price_range = st.sidebar.slider(
+    min_p, max_p = price_bounds # Precomputed min/max price.
+    st.sidebar.slider(
         "Price Range (₹)", min_value=float(min_p), max_value=float(max_p), 
-        value=(float(min_p), float(max_p)), step=50.0 # Price range slider.
+        value=(float(min_p), float(max_p)), step=50.0, key="filter_price" # Price range slider.
     )
 
-    # 5. Rating Filter (MODIFIED FOR WHOLE NUMBER SLIDER)
-    min_rating_ui = int(df['Ratings'].min() // 1) # Calculates min integer rating.
-    max_rating_ui = int(df['Ratings'].max() // 1) + 1 # Calculates max integer rating (rounded up).
-    
-    min_rating_ui = max(1, min_rating_ui) # Ensures min rating is at least 1.
-    max_rating_ui = min(5, max_rating_ui) # Ensures max rating is at most 5.
-    
-    rating_cutoff = st.sidebar.slider(
+    # 5. Rating Filter (whole number slider)
+    st.sidebar.slider(
         "Minimum Rating (Stars)", 
         min_value=0.0,   # Set minimum to 0
         max_value=5.0,   # Set maximum to 5
         value=0.0,       # Set default value to 0 (shows all buses)
-        step=1.0         # Step by 1.0 (whole numbers)
+        step=1.0,        # Step by 1.0 (whole numbers)
+        key="filter_rating"
     )
 
     # 6. Seats Available Filter
-    seats_filter = st.sidebar.checkbox("Show only buses with seats available", value=False) # Checkbox filter for seats.
-    
-    # --- Apply Filters ---
-    filtered_df = df.copy() # Starts with a copy of the data.
+    st.sidebar.checkbox("Show only buses with seats available", value=False, key="filter_seats") # Checkbox filter for seats.
 
-    # Applies Source City Filter
-    if selected_source != "All":
-        filtered_df = filtered_df[filtered_df['Source_City'] == selected_source]
 
-    # Applies Bus Operator Filter
-    if selected_operator != "All":
-        filtered_df = filtered_df[filtered_df['Bus_Name'] == selected_operator]
-    
-    # Applies Bus Type Filter
-    if selected_bus_type != "All":
-        filtered_df = filtered_df[filtered_df['Bus_Type'] == selected_bus_type]
-    
-    # Applies Price Filter
-    filtered_df = filtered_df[
-        (filtered_df['Price'] >= price_range[0]) & (filtered_df['Price'] <= price_range[1])
-    ]
-    
-    # Applies Rating Filter
-    filtered_df = filtered_df[filtered_df['Ratings'] >= rating_cutoff]
-    
-    # Applies Seats Filter
-    if seats_filter:
-        filtered_df = filtered_df[filtered_df['Seats_Available'] > 0] # Filters for buses with > 0 seats.
+def _results_table(total, filters, fetch_page, export_csv):
+    """Renders the sorted, keyset-paginated results table with its CSV export.
 
-    # --- Display Results ---
-    st.header(f"Total Buses Found: {len(filtered_df)}") # Displays the count of results.
+    `fetch_page(sort, descending, after, size)` returns (page DataFrame, next
+    cursor); `export_csv(sort, descending)` returns the whole result as CSV text.
+    """
+    st.header(f"Total Buses Found: {total}") # Count of the matching rows.
     
-    if filtered_df.empty:
+    if total == 0:
         st.warning("No buses match the current filter criteria.") # Warning if no buses match filters.
-    else:
-        # Define the professional column order
-        professional_columns = [
-            'Route_name', 
-            'Bus_Name', 
-            'Bus_Type', 
-            'Departure_Time', 
-            'Destination_Time', 
-            'Total_Duration', 
-            'Price', 
-            'Ratings', 
-            'Seats_Available' 
-        ] 
-                
-        # Selects columns and renames one for display.
-        display_df = filtered_df[professional_columns].rename(columns={'Bus_Name': 'Bus Operator'})
-
-        st.dataframe(
-            display_df,
-            use_container_width=True # Displays the filtered data table.
+        return
+
+    # --- Sorting and Page Size ---
+    col_sort, col_order, col_size = st.columns(3)
+    with col_sort:
+        sort = st.selectbox(
+            "Sort by", SORT_COLUMNS, key="results_sort",
+            format_func=lambda c: "Default" if c == "ID" else c.replace('_', ' ')
+        )
+    with col_order:
+        descending = st.radio("Order", ["Ascending", "Descending"], horizontal=True, key="results_order") == "Descending"
+    with col_size:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="results_page_size")
+
+    # Keyset cursors of the pages before the current one; reset whenever the query changes.
+    signature = (filters, sort, descending, page_size)
+    if st.session_state.get("results_signature") != signature:
+        st.session_state["results_signature"] = signature
+        st.session_state["results_cursors"] = []
+    cursors = st.session_state["results_cursors"]
+
+    # Materialises only the current page's rows and columns, then renames one for display.
+    with telemetry.span("dashboard.page_fetch", page="Bus Routes", sort=sort, page_number=len(cursors) + 1):
+        page, next_cursor = fetch_page(sort, descending, cursors[-1] if cursors else None, page_size)
+    first = len(cursors) * page_size + 1
+    display_df = page.rename(columns={'Bus_Name': 'Bus Operator'})
+
+    st.dataframe(
+        display_df,
+        use_container_width=True, # Displays one page of the filtered data.
+        hide_index=True
+    )
+
+    # --- Page Navigation ---
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("◀ Previous", disabled=not cursors, on_click=cursors.pop, key="results_prev")
+    with col_info:
+        st.markdown(f"Rows {first}–{first + len(page) - 1} of {total}")
+    with col_next:
+        st.button(
+            "Next ▶", disabled=next_cursor is None, key="results_next",
+            on_click=cursors.append, args=(next_cursor,)
+        )
+
+    # Builds the CSV only when clicked, one keyset chunk at a time.
+    st.download_button(
+        "Download full result (CSV)",
+        data=lambda: export_csv(sort, descending),
+        file_name="bus_routes.csv",
+        mime="text/csv",
+        key="results_export",
+        disabled=total > EXPORT_MAX_ROWS
+    )
+    if total > EXPORT_MAX_ROWS:
+        st.caption(f"Exports are limited to {EXPORT_MAX_ROWS:,} rows; refine the filters to download.")
+
+
+def _spool_csv(chunks):
+    """Writes CSV text chunks to a temporary file and returns it rewound, holding one chunk at a time."""
+    spool = tempfile.TemporaryFile() # Already unlinked; the disk space is freed when Streamlit drops the file.
+    for text in chunks:
+        spool.write(text.encode("utf-8"))
+    spool.seek(0)
+    return spool
+
+
+def _bus_routes_engine(engine):
+    """Filters, counts and pages the snapshot in memory with the indexed FilterEngine."""
+    # --- Evaluate Filters (one index intersection, with facet counts) ---
+    filters = _read_filters(engine.price_bounds) # Current selections.
+    with telemetry.span("dashboard.filter", page="Bus Routes", mode="engine") as filter_span:
+        result = engine.query(filters) # Matching rows plus reachable options per dropdown.
+        filter_span.set(rows=len(result), facets=True)
+
+    _filter_sidebar(filters, engine.price_bounds, facets=result.facets)
+
+    # Re-evaluates only if a widget was initialised with a different value than assumed above.
+    final_filters = _read_filters(engine.price_bounds)
+    if final_filters != filters:
+        with telemetry.span("dashboard.filter", page="Bus Routes", mode="engine") as filter_span:
+            result = engine.query(final_filters, facets=False)
+            filter_span.set(rows=len(result), facets=False)
+
+    def fetch_page(sort, descending, after, size):
+        page = engine.page(result.rows, sort, descending, after, size)
+        return engine.frame(page.rows, PROFESSIONAL_COLUMNS), page.next_cursor
+
+    _results_table(
+        len(result), final_filters, fetch_page, # Count straight from the index intersection.
+        lambda sort, descending: _spool_csv(engine.iter_csv(result.rows, PROFESSIONAL_COLUMNS, sort, descending)),
+    )
+
+
+# Dropdown options for the SQL path, refreshed with the data (600 seconds).
+@st.cache_data(ttl=600)
+def load_sql_filter_options():
+    """Loads the dropdown options and price bounds from the lookup tables the loader maintains."""
+    with get_pool().connection() as conn:
+        return {
+            'source_city': fetch_lookup(conn, 'source_cities'), # Source city options.
+            'operator': fetch_lookup(conn, 'bus_operators'), # Operator options.
+            'bus_type': fetch_lookup(conn, 'bus_types'), # Bus type options.
+            'price_bounds': fetch_price_bounds(conn), # (min, max) price for the slider.
+        }
+
+
+# The table's row count, refreshed with the data (600 seconds).
+@st.cache_data(ttl=600)
+def load_table_size():
+    """Returns the number of rows in bus_routes (one COUNT(*)), or None if the database is unreachable."""
+    try:
+        with get_pool().connection() as conn:
+            return count_buses(conn, BusFilters())
+    except (mysql.connector.Error, PoolTimeout):
+        return None # The engine path serves the last snapshot instead.
+
+
+# Caches each filter combination's match count for 600 seconds.
+@st.cache_data(ttl=600)
+def count_sql_matches(filters):
+    """Counts the matching rows with one index-assisted COUNT(*)."""
+    with telemetry.span("dashboard.filter", page="Bus Routes", mode="sql") as filter_span:
+        with get_pool().connection() as conn:
+            total = count_buses(conn, filters)
+        filter_span.set(rows=total)
+    return total
+
+
+def _sql_page(filters, sort, descending, after, size):
+    """Fetches one keyset page of the matching rows from the database."""
+    with get_pool().connection() as conn:
+        return fetch_page(conn, filters, sort, descending, after, size, PROFESSIONAL_COLUMNS)
+
+
+def _sql_csv(filters, sort, descending):
+    """Streams the whole result out of the database in keyset batches into a spooled CSV file."""
+    with get_pool().connection() as conn:
+        batches = iter_buses(conn, filters, sort, descending, columns=PROFESSIONAL_COLUMNS)
+        return _spool_csv(batch.to_csv(header=i == 0, index=False) for i, batch in enumerate(batches))
+
+
+def _bus_routes_sql():
+    """Pushes the filters, count, paging and export down to SQL (tables too large for the engine)."""
+    try:
+        options = load_sql_filter_options() # Loads the dropdown options.
+        filters = _read_filters(options['price_bounds']) # Current selections.
+        _filter_sidebar(filters, options['price_bounds'], options=options)
+        final_filters = _read_filters(options['price_bounds'])
+        _results_table(
+            count_sql_matches(final_filters), final_filters,
+            lambda sort, descending, after, size: _sql_page(final_filters, sort, descending, after, size),
+            lambda sort, descending: _sql_csv(final_filters, sort, descending),
         )
+    except (mysql.connector.Error, PoolTimeout) as err:
+        st.error(f"Error connecting to MySQL: {err}") # Shows an error if no connection could be used.
+
+
+def bus_routes_page_mysql():
+    """Displays the data table with dynamic sidebar filters, using whole numbers for the Ratings filter."""
+    st.title("🚌 Bus Routes Explorer") # Page title.
+    st.markdown("Use the sidebar filters to refine the list of available bus routes.") # Instructions.
+
+    # Tables up to ENGINE_MAX_ROWS are filtered in memory (with facet counts); larger ones in SQL.
+    # The choice uses the cached row count, so the SQL path never loads the snapshot.
+    table_size = load_table_size()
+    if table_size is not None and table_size > ENGINE_MAX_ROWS:
+        _bus_routes_sql()
+        return
+
+    engine = load_filter_engine() # Gets the indexed data (built once per load).
+
+    if engine is None:
+        return # Stops if data is empty.
+
+    _bus_routes_engine(engine)
+
+
+# Computes the chart summaries once per data load (same 600-second lifetime as the data cache).
+@st.cache_resource(ttl=600)
+def load_chart_aggregates():
+    """Returns the pre-aggregated Charts page data, or None when there is no data."""
+    df = load_data_from_db() # Loads the bus data.
+    if df.empty:
+        return None # Nothing to summarise.
+    with telemetry.span("dashboard.chart_aggregates", page="Charts", rows=len(df)):
+        return build_chart_aggregates(df) # Box stats per bus type, operator ratings, route counts.
+
+
+def _price_box_figure(aggregates, outliers):
+    """Builds the price-by-bus-type box plot from precomputed stats plus the sampled outlier points."""
+    boxes = aggregates.price_boxes
+    colors = px.colors.qualitative.Pastel
+    # One box trace drawn from the precomputed quartiles and whiskers instead of the raw rows.
+    traces = [go.Box(
+        x=boxes['Bus_Type'], q1=boxes['q1'], median=boxes['median'], q3=boxes['q3'],
+        lowerfence=boxes['lowerfence'], upperfence=boxes['upperfence'], mean=boxes['mean'],
+        name='Price', marker_color=colors[0], boxpoints=False,
+    )]
+    if outliers is not None and not outliers.empty:
+        traces.append(go.Scatter(
+            x=outliers['Bus_Type'], y=outliers['Price'], hovertext=outliers['Bus_Name'],
+            mode='markers', name='Outliers (sampled)', marker=dict(color=colors[1], size=5),
+        ))
+    fig_price = go.Figure(traces) # Built in one go: per-trace add_trace() calls revalidate the whole figure.
+    # Updates layout for better appearance.
+    fig_price.update_layout(
+        title='<b>Bus Ticket Price Distribution by Bus Type</b>',
+        xaxis_title="Bus Type",
+        yaxis_title="Price (₹)",
+        plot_bgcolor='rgba(0,0,0,0)', 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        font=dict(family="Arial", size=12, color="#333"),
+        hovermode="x unified", 
+        margin=dict(l=40, r=40, t=80, b=40)
+    )
+    fig_price.update_traces(marker_line_width=1, marker_line_color='black', selector=dict(type='box')) # Adds border to boxes.
+    return fig_price
 
 
 def charts_page():
@@ -311,39 +527,27 @@ def charts_page():
     st.title("📈 Data Visualization & Analysis") # Page title.
     st.markdown("Explore key trends and insights from the Redbus data through interactive charts.") # Instructions.
 
-    df = load_data_from_db() # Loads the data.
+    aggregates = load_chart_aggregates() # Loads the precomputed summaries.
     
-    if df.empty:
+    if aggregates is None:
         st.warning("No data available to generate charts. Please check the database connection or filters.")
         return # Stops if data is empty.
 
     # --- Chart 1: Price Distribution by Bus Type ---
     st.subheader("Price Distribution by Bus Type 💰") # Subheader for chart 1.
     st.markdown("Understanding how prices vary across different bus types.")
+
+    col_toggle, col_cap = st.columns(2) # Outlier display controls.
+    with col_toggle:
+        show_outliers = st.checkbox("Show outliers", value=True, key="chart_show_outliers") # Toggles the sampled points.
+    with col_cap:
+        # Explicit cap on the outlier points sent to the browser per bus type.
+        outlier_cap = st.slider("Max outlier points per bus type", 0, OUTLIERS_PER_TYPE, 10, key="chart_outlier_cap")
     
     try:
-        # Creates an interactive box plot for price distribution.
-        fig_price = px.box(
-            df, 
-            x='Bus_Type', 
-            y='Price', 
-            color='Bus_Type', 
-            title='<b>Bus Ticket Price Distribution by Bus Type</b>',
-            labels={'Bus_Type': 'Bus Type', 'Price': 'Ticket Price (₹)'},
-            color_discrete_sequence=px.colors.qualitative.Pastel, 
-            hover_name="Bus_Name" 
-        )
-        # Updates layout for better appearance.
-        fig_price.update_layout(
-            xaxis_title="Bus Type",
-            yaxis_title="Price (₹)",
-            plot_bgcolor='rgba(0,0,0,0)', 
-            paper_bgcolor='rgba(0,0,0,0)', 
-            font=dict(family="Arial", size=12, color="#333"),
-            hovermode="x unified", 
-            margin=dict(l=40, r=40, t=80, b=40)
-        )
-        fig_price.update_traces(marker_line_width=1, marker_line_color='black') # Adds border to boxes.
+        outliers = aggregates.outlier_sample(outlier_cap) if show_outliers else None # Capped sample, or none.
+        with telemetry.span("dashboard.chart_build", page="Charts", chart="price_by_bus_type"):
+            fig_price = _price_box_figure(aggregates, outliers)
         st.plotly_chart(fig_price, use_container_width=True) # Displays chart 1.
     except Exception as e:
         st.error(f"Error generating Price Distribution chart: {e}")
@@ -355,11 +559,8 @@ def charts_page():
     st.markdown("See which operators are highly rated by passengers.")
 
     try:
-        valid_ratings_df = df.dropna(subset=['Ratings']) # Filters out rows with missing ratings.
-        # Calculates average rating per operator, sorted descending.
-        avg_rating_operator = valid_ratings_df.groupby('Bus_Name')['Ratings'].mean().sort_values(ascending=False).reset_index()
-        
-        top_n_operators = avg_rating_operator.head(10) # Takes the top 10.
+        # Average rating per operator, already sorted descending at load time.
+        top_n_operators = aggregates.operator_ratings.head(10) # Takes the top 10.
 
         # Creates a bar chart for top operator ratings.
         fig_rating = px.bar(
@@ -384,7 +585,8 @@ def charts_page():
             margin=dict(l=40, r=40, t=80, b=40)
         )
         # Adjusts Y-axis limits dynamically.
-        fig_rating.update_yaxes(range=[valid_ratings_df['Ratings'].min() * 0.9, valid_ratings_df['Ratings'].max() * 1.1]) 
+        min_rating, max_rating = aggregates.rating_bounds # Precomputed rating range.
+        fig_rating.update_yaxes(range=[min_rating * 0.9, max_rating * 1.1]) 
         st.plotly_chart(fig_rating, use_container_width=True) # Displays chart 2.
     except Exception as e:
         st.error(f"Error generating Average Rating chart: {e}")
@@ -396,8 +598,7 @@ def charts_page():
     st.markdown("See the routes with the highest number of available buses.")
 
     try:
-        route_counts = df['Route_name'].value_counts().head(10).reset_index() # Counts top 10 routes.
-        route_counts.columns = ['Route_name', 'Count'] # Renames columns.
+        route_counts = aggregates.route_counts.head(10) # Top 10 routes from the precomputed counts.
         
         # Creates a donut chart for route frequency.
         fig_routes = px.pie(
@@ -427,12 +628,107 @@ def charts_page():
         st.error(f"Error generating Route Count chart: {e}")
 
 
+# Reads the pre-downsampled per-route series (a few rows per route per day), not the raw events.
+@st.cache_data(ttl=600)
+def load_trend_series(resolution):
+    """Returns the per-route price/seat series at the given resolution ('daily', 'weekly' or 'scrape')."""
+    return HistoryStore().route_series(resolution=resolution)
+
+
+def trends_page():
+    """Displays price and seat availability trends across crawls from the history store."""
+    st.title("📉 Price & Seat Trends") # Page title.
+    st.markdown("Follow how fares and seat availability change from one crawl to the next.") # Instructions.
+
+    resolution = st.radio(
+        "Resolution", ["daily", "weekly", "scrape"], horizontal=True, key="trend_resolution",
+        format_func=lambda r: "Every crawl" if r == "scrape" else r.title()
+    )
+    series = load_trend_series(resolution) # Loads the downsampled series.
+
+    if series.empty:
+        st.info("No price history yet. Append a crawl with `python history.py`.") # Nothing recorded so far.
+        return
+
+    time_column = 'Scraped_At' if resolution == "scrape" else 'Date'
+    # Route options, busiest first (a route link keeps the last name it was scraped under).
+    routes = series.groupby('Route_Link', observed=True).agg(Route=('Route_name', 'last'), Buses=('Buses', 'max'))
+    routes = routes.sort_values('Buses', ascending=False)
+
+    col_routes, col_stat = st.columns([3, 1])
+    with col_routes:
+        selected = st.multiselect(
+            "Routes", routes.index.tolist(), default=routes.index[:5].tolist(), key="trend_routes",
+            format_func=lambda link: str(routes.at[link, 'Route'])
+        )
+    with col_stat:
+        statistic = st.selectbox(
+            "Price statistic", ['Price_Median', 'Price_Mean', 'Price_Min', 'Price_Max'], key="trend_statistic",
+            format_func=lambda c: c.split('_')[1]
+        )
+
+    first, last = series[time_column].min().date(), series[time_column].max().date()
+    period = st.date_input("Period", (first, last), min_value=first, max_value=last, key="trend_period")
+    start, end = (period if isinstance(period, tuple) and len(period) == 2 else (first, last))
+
+    subset = series[
+        series['Route_Link'].isin(selected)
+        & (series[time_column].dt.date >= start) & (series[time_column].dt.date <= end)
+    ].copy()
+    if subset.empty:
+        st.warning("No history for the selected routes and period.") # Warning if nothing matches.
+        return
+    subset['Route'] = subset['Route_Link'].map(routes['Route']).astype(str) # One legend entry per route.
+
+    # --- Chart 1: Price over time ---
+    try:
+        fig_price = px.line(
+            subset, x=time_column, y=statistic, color='Route', markers=True,
+            title=f"<b>{statistic.split('_')[1]} Ticket Price per Route</b>",
+            labels={time_column: 'Date', statistic: 'Price (₹)'},
+            color_discrete_sequence=px.colors.qualitative.Pastel
+        )
+        fig_price.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family="Arial", size=12, color="#333"),
+            hovermode="x unified",
+            margin=dict(l=40, r=40, t=80, b=40)
+        )
+        st.plotly_chart(fig_price, use_container_width=True) # Displays chart 1.
+    except Exception as e:
+        st.error(f"Error generating Price Trend chart: {e}")
+
+    st.markdown("---") # Separator.
+
+    # --- Chart 2: Seats over time ---
+    try:
+        fig_seats = px.line(
+            subset, x=time_column, y='Seats_Mean', color='Route', markers=True,
+            title='<b>Average Seats Available per Route</b>',
+            labels={time_column: 'Date', 'Seats_Mean': 'Seats Available (avg per bus)'},
+            color_discrete_sequence=px.colors.qualitative.Pastel,
+            hover_data={'Sold_Out': True, 'Buses': True}
+        )
+        fig_seats.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family="Arial", size=12, color="#333"),
+            hovermode="x unified",
+            margin=dict(l=40, r=40, t=80, b=40)
+        )
+        st.plotly_chart(fig_seats, use_container_width=True) # Displays chart 2.
+    except Exception as e:
+        st.error(f"Error generating Seat Trend chart: {e}")
+
+
 # --- Main Execution ---
 
 def main():
     """Main function to run the Streamlit application."""
     # Sets page configuration (title, layout, sidebar state).
     st.set_page_config(page_title="Redbus Dashboard", layout="wide", initial_sidebar_state="expanded")
+    init_telemetry() # No-op spans unless REDBUS_METRICS is set.
 
     if "signed_in" not in st.session_state:
         st.session_state["signed_in"] = False # Initializes the signed_in status.
@@ -445,14 +741,20 @@ def main():
             st.session_state["signed_in"] = False # Resets signed_in status.
             st.rerun() # Reruns to show sign-in page.
 
-        page = st.sidebar.selectbox("Select Page", ["Home", "Bus Routes", "Charts"]) # Page selector.
+        page = st.sidebar.selectbox("Select Page", ["Home", "Bus Routes", "Charts", "Trends"]) # Page selector.
             
-        if page == "Home":
-            home_page() # Shows the Home page.
-        elif page == "Bus Routes":
-            bus_routes_page_mysql() # Shows the Bus Routes page with filters.
-        elif page == "Charts":
-            charts_page() # Shows the Charts page.
+        # Times the page (and profiles it when REDBUS_PROFILE=page:<name> matches).
+        with telemetry.profiled("page", page), telemetry.span("dashboard.render", page=page):
+            if page == "Home":
+                home_page() # Shows the Home page.
+            elif page == "Bus Routes":
+                bus_routes_page_mysql() # Shows the Bus Routes page with filters.
+            elif page == "Charts":
+                charts_page() # Shows the Charts page.
+            elif page == "Trends":
+                trends_page() # Shows the price and seat trends.
+
+        pool_status_sidebar() # Connection pool utilisation after this run's queries.
 
 
 if __name__ == "__main__":
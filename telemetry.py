@@ -0,0 +1,260 @@
+"""Lightweight timing instrumentation for the scraper and the dashboard.
+
+Code is wrapped in named spans:
+
+    with telemetry.span("scraper.scroll", operator=job.operator, route=job.route_name) as s:
+        result = scroll_to_end(driver)
+        s.set(cards=result.cards)
+
+When instrumentation is off (the default), span() returns one shared no-op
+object, so the cost is a flag check per call. When it is on, each span
+writes one JSON log line (name, seconds, status and its fields) and is
+added to in-process aggregates (count, total and max seconds, summed row
+counts) keyed by its low-cardinality labels. These aggregates can be served
+in Prometheus text format by start_metrics_server(). profiled() wraps a
+route or page in cProfile (or pyinstrument, when installed and selected)
+when it matches the configured target.
+
+Configuration comes from configure() or the environment:
+
+    REDBUS_METRICS=1            enable spans
+    REDBUS_METRICS_LOG=path     JSON lines file (default: stderr)
+    REDBUS_METRICS_PORT=9108    serve /metrics and /metrics.json
+    REDBUS_PROFILE=route:Hyderabad | page:Charts
+    REDBUS_PROFILER=cprofile | pyinstrument
+"""
+
+import json # Imports json for the structured log lines.
+import logging # Imports logging for the log output.
+import os # Imports os for the environment configuration.
+import re # Imports re for profile file names.
+import threading # Imports threading for the aggregate lock and metrics server.
+import time # Imports time for the span timings.
+from contextlib import nullcontext # Imports nullcontext for the disabled profiler.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # Imports the metrics endpoint server.
+
+logger = logging.getLogger("redbus.metrics")
+
+LABEL_FIELDS = ("operator", "page", "mode", "status") # Span fields that become metric labels.
+COUNT_FIELDS = ("rows", "cards") # Numeric span fields summed into the aggregates.
+PROFILE_DIR = "profiles" # Where profiler output is written.
+
+
+class _Config:
+    enabled = False
+    profile_kind = None # "route" or "page".
+    profile_match = None # Substring the route or page name must contain.
+    profiler = "cprofile"
+
+
+_config = _Config()
+_aggregates = {} # (name, labels) -> {"count", "seconds", "max", <COUNT_FIELDS>...}
+_lock = threading.Lock()
+_server = None
+
+
+# --- Spans ---
+
+class _NullSpan:
+    """Returned by span() when instrumentation is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_NULL_PROFILE = nullcontext()
+
+
+class Span:
+    """Times a block and reports it on exit."""
+
+    __slots__ = ("name", "fields", "_started")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        """Attaches more fields (e.g. row counts) before the span ends."""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        self.fields["status"] = "ok" if exc_type is None else "error"
+        if exc_type is not None:
+            self.fields["error"] = f"{exc_type.__name__}: {exc}"
+        _report(self.name, seconds, self.fields)
+        return False
+
+
+def span(name, **fields):
+    """Returns a timing context for `name`; a shared no-op when instrumentation is off."""
+    if not _config.enabled:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+
+def _report(name, seconds, fields):
+    """Writes the JSON log line and folds the span into the aggregates."""
+    logger.info(json.dumps({"ts": round(time.time(), 3), "span": name, "seconds": round(seconds, 6), **fields},
+                           default=str))
+    labels = tuple((k, str(fields[k])) for k in LABEL_FIELDS if k in fields)
+    with _lock:
+        entry = _aggregates.setdefault((name, labels), {"count": 0, "seconds": 0.0, "max": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        for key in COUNT_FIELDS:
+            if isinstance(fields.get(key), (int, float)):
+                entry[key] = entry.get(key, 0) + fields[key]
+
+
+def snapshot():
+    """Returns the aggregates as a list of dicts (name, labels, count, seconds, max, ...)."""
+    with _lock:
+        return [{"name": name, "labels": dict(labels), **values} for (name, labels), values in _aggregates.items()]
+
+
+def reset():
+    """Clears the aggregates."""
+    with _lock:
+        _aggregates.clear()
+
+
+# --- Metrics Endpoint ---
+
+def prometheus_text():
+    """Renders the aggregates in the Prometheus text exposition format."""
+    lines = []
+    for item in sorted(snapshot(), key=lambda i: (i["name"], sorted(i["labels"].items()))):
+        metric = "redbus_" + re.sub(r"[^a-zA-Z0-9_]", "_", item["name"])
+        labels = ",".join(f'{k}="{v}"' for k, v in sorted(item["labels"].items()))
+        labels = "{" + labels + "}" if labels else ""
+        lines.append(f"{metric}_seconds_count{labels} {item['count']}")
+        lines.append(f"{metric}_seconds_sum{labels} {item['seconds']:.6f}")
+        lines.append(f"{metric}_seconds_max{labels} {item['max']:.6f}")
+        for key in COUNT_FIELDS:
+            if key in item:
+                lines.append(f"{metric}_{key}_total{labels} {item[key]}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body, kind = prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/metrics.json":
+            body, kind = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keeps scrapes of the endpoint out of the logs.
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serves /metrics and /metrics.json on a daemon thread (once per process); returns the port."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server.server_address[1]
+
+
+# --- Profiling ---
+
+def profiled(kind, name):
+    """Profiles the block if (kind, name) matches the configured target; otherwise a no-op."""
+    if _config.profile_kind != kind or not _config.profile_match or _config.profile_match not in str(name):
+        return _NULL_PROFILE
+    return _Profile(kind, name)
+
+
+class _Profile:
+    """Runs cProfile or pyinstrument around a block and writes the result to PROFILE_DIR."""
+
+    def __init__(self, kind, name):
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", str(name)).strip("-")[:60]
+        self.path = os.path.join(PROFILE_DIR, f"{kind}-{slug}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self._profiler = None
+
+    def __enter__(self):
+        if _config.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler # Optional sampling profiler.
+                self._profiler = Profiler()
+            except ImportError:
+                logger.warning(json.dumps({"span": "telemetry.profile", "error": "pyinstrument not installed"}))
+        if self._profiler is None:
+            import cProfile # Imports the stdlib profiler only when profiling.
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+        return self
+
+    def __exit__(self, *exc):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if hasattr(self._profiler, "output_html"):
+            self._profiler.stop()
+            path = self.path + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            path = self.path + ".prof" # Open with `python -m pstats` or snakeviz.
+            self._profiler.dump_stats(path)
+        logger.info(json.dumps({"span": "telemetry.profile", "path": path}))
+        return False
+
+
+# --- Configuration ---
+
+def configure(enabled=True, log_path=None, metrics_port=None, profile=None, profiler="cprofile"):
+    """Turns instrumentation on or off and sets its outputs.
+
+    `profile` is "route:<substring>" or "page:<substring>" and works even
+    when spans are disabled. Returns the metrics port, if one was started.
+    """
+    _config.enabled = enabled
+    _config.profiler = profiler
+    _config.profile_kind, _config.profile_match = (profile.split(":", 1) + [None])[:2] if profile else (None, None)
+    if enabled and not logger.handlers:
+        handler = logging.FileHandler(log_path, encoding="utf-8") if log_path else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s")) # Messages are already JSON.
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    if enabled and metrics_port is not None:
+        return start_metrics_server(metrics_port)
+    return None
+
+
+def configure_from_env(environ=os.environ):
+    """Applies the REDBUS_METRICS* / REDBUS_PROFILE* environment variables."""
+    port = environ.get("REDBUS_METRICS_PORT")
+    return configure(
+        enabled=environ.get("REDBUS_METRICS", "") not in ("", "0", "false"),
+        log_path=environ.get("REDBUS_METRICS_LOG") or None,
+        metrics_port=int(port) if port else None,
+        profile=environ.get("REDBUS_PROFILE") or None,
+        profiler=environ.get("REDBUS_PROFILER", "cprofile"),
+    )
@@ -0,0 +1,6 @@
+"""Puts the repository root on sys.path so the tests import the top-level modules."""
+
+import os # Imports os for the repository path.
+import sys # Imports sys to extend the import path.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,79 @@
+"""Resumable crawls: the checkpoint store and the output of a checkpointed run."""
+
+import os # Imports os for the fixture folder.
+import time # Imports time to age a stored route.
+
+import pandas as pd # Imports the pandas library for the output CSV.
+import pytest # Imports pytest for fixtures.
+
+import http_fetch # Imports the browserless entry point.
+from checkpoint import CheckpointStore # Imports the store under test.
+from extraction import COLUMNS # Imports the bus-details column order.
+from fixture_server import serve_fixtures # Imports the local fixture server.
+from scraper import ScrapeJob # Imports the job model.
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+JOBS = [ScrapeJob("APSRTC", f"Route {i}", f"https://www.redbus.in/bus-tickets/route-{i}") for i in range(3)]
+
+
+def _rows(job, n):
+    return [dict.fromkeys(COLUMNS, None) | {'Bus_Name': f"Bus {i}", 'Route_name': job.route_name, 'Route_Link': job.route_link}
+            for i in range(n)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with CheckpointStore(str(tmp_path / "checkpoint.sqlite")) as store:
+        yield store
+
+
+def test_restart_skips_completed_routes(store):
+    store.record_success(JOBS[0], _rows(JOBS[0], 2))
+    store.record_failure(JOBS[1], "TimeoutException")
+    assert store.pending(JOBS) == JOBS[1:] # Failed and unseen routes are retried.
+
+
+def test_refresh_stale_only_rescrapes_old_routes(store):
+    store.record_success(JOBS[0], _rows(JOBS[0], 1))
+    store.record_success(JOBS[1], _rows(JOBS[1], 1))
+    store._conn.execute("UPDATE routes SET Last_Scraped = ? WHERE Route_Link = ?", (time.time() - 7200, JOBS[0].route_link))
+    assert store.pending(JOBS, max_age=3600) == [JOBS[0], JOBS[2]]
+
+
+def test_rescrape_replaces_the_route_rows(store):
+    store.record_success(JOBS[0], _rows(JOBS[0], 3))
+    store.record_success(JOBS[0], _rows(JOBS[0], 1))
+    status = store.status().set_index('Route_Link')
+    assert len(store.results()) == 1
+    assert status.at[JOBS[0].route_link, 'Row_Count'] == 1
+    assert status.at[JOBS[0].route_link, 'Attempts'] == 2
+
+
+def test_results_can_be_limited_to_a_run(store):
+    for job in JOBS:
+        store.record_success(job, _rows(job, 2))
+    assert set(store.results(JOBS[1:])['Route_Link']) == {JOBS[1].route_link, JOBS[2].route_link}
+    assert store.results([]).empty
+    assert len(store.results()) == 6
+
+
+def test_fixture_run_exports_only_its_own_routes(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    old = ScrapeJob("TSRTC", "Khammam to Hyderabad", "https://www.redbus.in/bus-tickets/khammam-to-hyderabad")
+    with CheckpointStore(path) as store:
+        store.record_success(old, _rows(old, 4)) # Left by an earlier run against redbus.in.
+    links = tmp_path / "links.csv"
+    links.write_text(
+        "Operator,Bus Routes Name,Bus Routes Link\n"
+        "APSRTC,Hyderabad to Vijayawada,https://www.redbus.in/bus-tickets/hyderabad-to-vijayawada\n",
+        encoding="utf-8",
+    )
+    output = tmp_path / "fetched.csv"
+    argv = ["--links-table", str(links), "--checkpoint", path, "--output", str(output), "--fallback-workers", "0"]
+    with serve_fixtures(FIXTURES) as base_url:
+        http_fetch.main(argv + ["--base-url", base_url])
+        assert sorted(pd.read_csv(output)['Bus_Name']) == ["APSRTC", "Orange Tours"]
+        http_fetch.main(argv + ["--base-url", base_url]) # Resumed: nothing to fetch, same output.
+        assert len(pd.read_csv(output)) == 2
+        http_fetch.main(argv + ["--base-url", base_url, "--export-all"])
+        assert len(pd.read_csv(output)) == 6
@@ -0,0 +1,76 @@
+"""Vectorized column parsers and chunked cleaning of the bus-details CSVs."""
+
+import pandas as pd # Imports the pandas library for data handling.
+import pytest # Imports pytest for the CLI error assertion.
+
+from cleaning import (  # Imports the cleaning pipeline.
+    CLEAN_COLUMNS, CLEAN_OUTPUT_PATH, CLEANED_PATH, clean_files, clean_to_csv, main,
+    parse_duration_minutes, parse_price, parse_ratings, parse_seats, parse_time_of_day, split_route,
+)
+
+RAW_CSV = """Bus_Name,Bus_Type,Departure_Time,Destination_Time,Total_Duration,Ratings,Price,Seats_Available,Route_name,Route_Link
+APSRTC - 3525,SUPER LUXURY,15:00,23:00,08h 00m,"3.7
+10","INR 1,469",29 Seats available,Vijayawada to Hyderabad,https://www.redbus.in/bus-tickets/vijayawada-to-hyderabad
+Orange Tours,A/C Sleeper (2+1),22:30:00,03:45:00,05h 15m,New,1299.50,1 Seat available,Hyderabad to Vijayawada,https://www.redbus.in/bus-tickets/hyderabad-to-vijayawada
+TSRTC,Express,0 days 06:15:00,,45m,,310,,Khammam - Hyderabad,https://www.redbus.in/bus-tickets/khammam-to-hyderabad
+"""
+
+
+def test_parse_price():
+    assert parse_price(pd.Series(["INR 1,469", "1299.50", None])).tolist()[:2] == [1469.0, 1299.5]
+    assert parse_price(pd.Series([None, "Free"])).isna().all()
+
+
+def test_parse_ratings_keeps_the_star_rating_only():
+    assert parse_ratings(pd.Series(["3.7\n10", "New", None, "4"])).tolist() == [3.7, 0.0, 0.0, 4.0]
+
+
+def test_parse_seats_reads_singular_seat():
+    assert parse_seats(pd.Series(["29 Seats available", "1 Seat available", None])).tolist() == [29, 1, 0]
+
+
+def test_parse_time_of_day_formats():
+    times = parse_time_of_day(pd.Series(["15:00", "15:00:00", "0 days 07:05:00", None, "soon"]))
+    assert times[:3].tolist() == [pd.Timedelta(hours=15), pd.Timedelta(hours=15), pd.Timedelta(hours=7, minutes=5)]
+    assert times[3:].isna().all()
+
+
+def test_parse_duration_minutes():
+    assert parse_duration_minutes(pd.Series(["08h 00m", "45m", "2h", None])).tolist() == [480, 45, 120, 0]
+
+
+def test_split_route():
+    source, destination = split_route(pd.Series(["Hyderabad to Vijayawada", "Khammam - Hyderabad", "Goa"]))
+    assert source.tolist() == ["Hyderabad", "Khammam", "Goa"]
+    assert destination.tolist() == ["Vijayawada", "Hyderabad", "Unknown Destination"]
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "df_TEST_1.csv"
+    path.write_text(RAW_CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_chunked_cleaning_matches_one_pass(raw_csv):
+    whole = clean_files([raw_csv])
+    chunked = clean_files([raw_csv, raw_csv], chunksize=1) # Six one-row chunks from two files.
+    assert list(whole.columns) == CLEAN_COLUMNS
+    assert chunked['Bus_Name'].dtype == "category" # Categories merged, not widened to object.
+    pd.testing.assert_frame_equal(chunked.iloc[:3], whole, check_categorical=False) # Same values, wider categories.
+    assert whole['Seats_Available'].tolist() == [29, 1, 0]
+    assert whole['Source_City'].tolist() == ["Vijayawada", "Hyderabad", "Khammam"]
+
+
+def test_clean_to_csv_streams_every_row(raw_csv, tmp_path):
+    output = tmp_path / "clean.csv"
+    assert clean_to_csv(str(output), [raw_csv], chunksize=2) == 3
+    df = pd.read_csv(output)
+    assert list(df.columns) == CLEAN_COLUMNS
+    assert df['Departure_Time'].tolist() == ["15:00:00", "22:30:00", "06:15:00"]
+
+
+def test_cli_never_overwrites_the_notebook_dataset(raw_csv):
+    assert CLEAN_OUTPUT_PATH != CLEANED_PATH
+    with pytest.raises(SystemExit):
+        main([raw_csv, "--output", CLEANED_PATH])
@@ -0,0 +1,59 @@
+"""Bus-card extraction: the page_source parser reads what EXTRACT_JS reads."""
+
+import pytest # Imports pytest for fixtures and skips.
+
+from extraction import BusRecord, extract_with_script, parse_bus_cards # Imports both extractors.
+
+# Two cards in the Redbus markup shapes: fields on non-div elements, nested blocks and a missing field.
+CARDS_HTML = """<html><body>
+<div class="clearfix row-one">
+  <div class="column-two"><div class="travels lh-24 f-bold">Orange <b>Tours</b></div><span class="bus-type f-12">A/C Sleeper (2+1)</span></div>
+  <div class="column-three"><div class="dp-time f-19">22:30</div><div class="dp-loc">Ameerpet</div></div>
+  <div class="column-four"><div class="dur l-color">08h 15m</div></div>
+  <div class="column-five"><div class="bp-time f-19">06:45</div></div>
+  <div class="column-six"><div class="rating-sec"><span>3.7</span></div><span class="no-ppl">10</span></div>
+  <div class="column-seven"><div class="fare d-block">INR <span class="f-19">1,299</span></div></div>
+  <div class="column-eight"><div class="seat-left m-top-30">12 Seats<br>available</div></div>
+</div>
+<div class="clearfix row-one">
+  <div class="column-two"><div class="travels">APSRTC</div><div class="bus-type">NON A/C Seater (2+3)</div></div>
+  <div class="column-three"><div class="dp-time">05:00</div></div>
+  <div class="column-five"><div class="bp-time">11:30</div></div>
+  <div class="column-four"><div class="dur">06h 30m</div></div>
+  <div class="column-seven"><div class="fare">INR <span>450</span></div></div>
+  <div class="column-eight"><div class="seat-left"><ul><li>31 Seats<li>available</ul></div></div>
+</div>
+</body></html>"""
+
+# What Chrome's innerText gives for the cards above.
+EXPECTED = [
+    BusRecord("Orange Tours", "A/C Sleeper (2+1)", "22:30", "06:45", "08h 15m", "3.7\n10", "INR 1,299", "12 Seats\navailable"),
+    BusRecord("APSRTC", "NON A/C Seater (2+3)", "05:00", "11:30", "06h 30m", None, "INR 450", "31 Seats\navailable"),
+]
+
+
+def test_parser_matches_inner_text():
+    assert parse_bus_cards(CARDS_HTML) == EXPECTED
+
+
+def test_block_end_separates_rating_from_review_count():
+    html = '<div class="clearfix row-one"><div class="column-six"><div class="rating"><span>3.7</span></div><span>10</span></div></div>'
+    assert parse_bus_cards(html)[0].ratings == "3.7\n10"
+
+
+@pytest.fixture(scope="module")
+def chrome():
+    try:
+        from browser import make_driver # Imports the shared Chrome factory.
+        driver = make_driver(block_resources=False)
+    except Exception as e: # No Chrome or chromedriver in this environment.
+        pytest.skip(f"Chrome is not available: {e}")
+    yield driver
+    driver.quit()
+
+
+def test_both_modes_read_the_same_records(chrome, tmp_path):
+    page = tmp_path / "route.html"
+    page.write_text(CARDS_HTML, encoding="utf-8")
+    chrome.get(page.as_uri())
+    assert extract_with_script(chrome) == parse_bus_cards(chrome.page_source) == EXPECTED
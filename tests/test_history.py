@@ -0,0 +1,54 @@
+"""Appending crawls to the price/seat history store."""
+
+import os # Imports os to list the store files.
+
+import pandas as pd # Imports the pandas library for data handling.
+import pytest # Imports pytest for fixtures.
+
+from cleaning import CLEANED_PATH, clean_files # Imports the cleaning pipeline.
+from history import HistoryStore # Imports the store under test.
+
+
+@pytest.fixture(scope="module")
+def crawl():
+    df = clean_files([CLEANED_PATH])
+    return df[df['Route_Link'].isin(df['Route_Link'].unique()[:3])].reset_index(drop=True) # A few routes.
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, files in os.walk(root) for f in files)
+
+
+def test_append_accepts_utc_z_suffix(tmp_path, crawl):
+    store = HistoryStore(str(tmp_path))
+    report = store.append(crawl, "2026-10-05T06:00:00Z")
+    assert report.scraped_at == pd.Timestamp("2026-10-05 06:00:00")
+    assert report.new == report.buses > 0
+    assert (store.events()['Scraped_At'] == pd.Timestamp("2026-10-05 06:00:00")).all()
+    series = store.route_series(resolution="scrape", start="2026-10-05T00:00:00Z")
+    assert set(series['Route_Link']) == set(crawl['Route_Link'])
+
+
+def test_same_instant_with_offset_adds_nothing(tmp_path, crawl):
+    store = HistoryStore(str(tmp_path))
+    store.append(crawl, "2026-10-05T06:00:00Z")
+    report = store.append(crawl, "2026-10-05T11:30:00+05:30") # Same crawl time, another zone.
+    assert report.scraped_at == pd.Timestamp("2026-10-05 06:00:00")
+    assert report.events == 0
+
+
+def test_failed_append_writes_nothing(tmp_path, crawl, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    store.append(crawl, "2026-10-05T06:00:00Z")
+    before = {path: os.path.getmtime(tmp_path / path) for path in _files(tmp_path)}
+
+    def broken(*args):
+        raise RuntimeError("series failed")
+    monkeypatch.setattr(HistoryStore, "_series_writes", broken)
+    changed = crawl.assign(Price=crawl['Price'] + 10)
+    with pytest.raises(RuntimeError):
+        store.append(changed, "2026-10-06T06:00:00Z")
+    assert {path: os.path.getmtime(tmp_path / path) for path in _files(tmp_path)} == before
+
+    monkeypatch.undo() # The retry sees every bus as changed, not "no changes".
+    assert store.append(changed, "2026-10-06T06:00:00Z").changed == len(crawl.drop_duplicates(['Route_Link', 'Bus_Name', 'Departure_Time', 'Bus_Type']))
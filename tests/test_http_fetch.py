@@ -0,0 +1,88 @@
+"""Browserless fetching of the saved route pages in tests/fixtures."""
+
+import asyncio # Imports asyncio to run the fetcher.
+import os # Imports os for the fixture folder.
+
+import pandas as pd # Imports the pandas library for the output CSV.
+import pytest # Imports pytest for fixtures.
+
+import http_fetch # Imports the module whose Selenium fallback is replaced.
+from checkpoint import STATUS_DONE, STATUS_FAILED, CheckpointStore # Imports the crawl store.
+from extraction import COLUMNS # Imports the bus-details column order.
+from fixture_server import serve_fixtures # Imports the local fixture server.
+from http_fetch import fetch_routes # Imports the fetcher under test.
+from scraper import RetryPolicy, ScrapeJob, rebase_link # Imports the shared job model.
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+POLICY = RetryPolicy(max_attempts=2, page_timeout=5.0, backoff=0.0) # Fast retries for the 404 case.
+
+
+def _job(operator, slug, base_url):
+    name = slug.replace("-to-", " to ").title()
+    return ScrapeJob(operator, name, rebase_link(f"https://www.redbus.in/bus-tickets/{slug}", base_url))
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    with serve_fixtures(FIXTURES) as url:
+        yield url
+
+
+def test_cards_and_embedded_json_become_rows(base_url):
+    jobs = [_job("APSRTC", "hyderabad-to-vijayawada", base_url), _job("TSRTC", "khammam-to-hyderabad", base_url)]
+    rows, browser_jobs, failures = asyncio.run(fetch_routes(jobs, policy=POLICY))
+    assert browser_jobs == [] and failures == []
+    by_bus = {row['Bus_Name']: row for row in rows}
+    assert set(by_bus) == {"Orange Tours", "APSRTC", "TSRTC", "Sri Krishna Travels"}
+    assert by_bus["Orange Tours"]['Ratings'] == "3.7\n10" # innerText-style break between rating and count.
+    assert by_bus["Orange Tours"]['Price'] == "INR 1,299"
+    assert by_bus["APSRTC"]['Ratings'] is None # Missing field stays aligned.
+    assert by_bus["TSRTC"]['Price'] == "310" and by_bus["TSRTC"]['Seats_Available'] == "22"
+    assert by_bus["Sri Krishna Travels"]['Ratings'] is None
+    assert by_bus["TSRTC"]['Route_Link'] == jobs[1].route_link
+
+
+def test_page_without_bus_data_goes_to_the_browser(base_url):
+    job = _job("APSRTC", "vijayawada-to-guntur", base_url)
+    rows, browser_jobs, failures = asyncio.run(fetch_routes([job], policy=POLICY))
+    assert rows == [] and failures == []
+    assert browser_jobs == [job]
+
+
+def test_missing_page_is_recorded_as_failure(base_url, tmp_path):
+    missing = _job("APSRTC", "guntur-to-ongole", base_url)
+    found = _job("APSRTC", "hyderabad-to-vijayawada", base_url)
+    with CheckpointStore(str(tmp_path / "checkpoint.sqlite")) as checkpoint:
+        rows, browser_jobs, failures = asyncio.run(fetch_routes([missing, found], policy=POLICY, checkpoint=checkpoint))
+        status = checkpoint.status().set_index('Route_Link')
+    assert len(rows) == 2 # The other route is unaffected.
+    assert [(f.job, f.attempts) for f in failures] == [(missing, POLICY.max_attempts)]
+    assert "404" in failures[0].error
+    assert status.at[missing.route_link, 'Status'] == STATUS_FAILED
+    assert "404" in status.at[missing.route_link, 'Error']
+    assert status.at[found.route_link, 'Status'] == STATUS_DONE
+    assert status.at[found.route_link, 'Row_Count'] == 2
+
+
+def test_main_hands_client_rendered_pages_to_selenium(base_url, tmp_path, monkeypatch):
+    links = tmp_path / "links.csv"
+    links.write_text(
+        "Operator,Bus Routes Name,Bus Routes Link\n"
+        "APSRTC,Hyderabad to Vijayawada,https://www.redbus.in/bus-tickets/hyderabad-to-vijayawada\n"
+        "APSRTC,Vijayawada to Guntur,https://www.redbus.in/bus-tickets/vijayawada-to-guntur\n",
+        encoding="utf-8",
+    )
+    handed_over = []
+
+    def fake_run_scrape(jobs, workers, policy, checkpoint):
+        """Stands in for the Chrome pool: one bus per route it is given."""
+        handed_over.extend(jobs)
+        rows = [dict.fromkeys(COLUMNS, None) | {'Bus_Name': "Browser Bus", 'Route_Link': job.route_link} for job in jobs]
+        return pd.DataFrame(rows, columns=COLUMNS), []
+
+    monkeypatch.setattr(http_fetch, "run_scrape", fake_run_scrape)
+    output = tmp_path / "fetched.csv"
+    http_fetch.main(["--links-table", str(links), "--base-url", base_url, "--checkpoint", "", "--output", str(output)])
+    assert [job.route_name for job in handed_over] == ["Vijayawada to Guntur"]
+    df = pd.read_csv(output)
+    assert sorted(df['Bus_Name']) == ["APSRTC", "Browser Bus", "Orange Tours"]
@@ -0,0 +1,114 @@
+"""Schema checks and idempotent upserts of the bulk loader."""
+
+import os # Imports os for the optional MySQL settings.
+import sqlite3 # Imports sqlite3 for the local database.
+
+import pytest # Imports pytest for fixtures and error assertions.
+
+from cleaning import CLEANED_PATH, clean_files # Imports the cleaning pipeline.
+from loader import SchemaError, ensure_schema, load_chunks, load_dataframe, prepare_frame # Imports the loader under test.
+
+MYSQL_DB = os.environ.get("REDBUS_TEST_MYSQL_DB") # Scratch database for the MySQL-dialect tests.
+
+
+def test_table_without_bus_key_is_rejected(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.execute("CREATE TABLE bus_routes (ID INTEGER PRIMARY KEY, Bus_Name TEXT, Price REAL, Ratings REAL)")
+    with pytest.raises(SchemaError, match="Bus_Key"):
+        ensure_schema(conn)
+    conn.close()
+
+
+def test_current_schema_is_accepted_twice(tmp_path):
+    conn = sqlite3.connect(tmp_path / "new.db")
+    ensure_schema(conn)
+    ensure_schema(conn) # Idempotent on an existing, current table.
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def buses():
+    df = clean_files([CLEANED_PATH])
+    return df[df['Route_Link'].isin(df['Route_Link'].unique()[:4])].reset_index(drop=True) # A few routes.
+
+
+def _table(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT ID, Bus_Key, Price, Updated_At FROM bus_routes ORDER BY ID")
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def _assert_idempotent(conn, buses, method="insert"):
+    """Loads the same data twice: the second load matches every bus and changes nothing."""
+    distinct = buses.drop_duplicates(['Route_Link', 'Bus_Name', 'Departure_Time', 'Bus_Type']).shape[0]
+    first = load_dataframe(conn, buses, batch_size=50, method=method)
+    assert (first.rows, first.inserted, first.updated) == (len(buses), distinct, 0)
+    assert first.duplicates == len(buses) - distinct > 0 # The shipped data has natural-key collisions.
+    stored = _table(conn)
+    assert len(stored) == distinct
+
+    second = load_dataframe(conn, buses, batch_size=50, method=method)
+    assert (second.inserted, second.updated, second.duplicates) == (0, distinct, first.duplicates)
+    assert _table(conn) == stored # Same IDs, values and Updated_At.
+
+
+def test_reload_is_idempotent_on_sqlite(tmp_path, buses):
+    conn = sqlite3.connect(tmp_path / "buses.db")
+    _assert_idempotent(conn, buses)
+    conn.close()
+
+
+def test_changed_bus_is_updated_in_place(tmp_path, buses):
+    conn = sqlite3.connect(tmp_path / "buses.db")
+    load_dataframe(conn, buses)
+    conn.execute("UPDATE bus_routes SET Updated_At = '2026-01-01 00:00:00'")
+    before = {key: (row_id, price, updated_at) for row_id, key, price, updated_at in _table(conn)}
+    changed = buses.iloc[[-1]].copy()
+    changed['Price'] = 9999.0
+    key = prepare_frame(changed)['Bus_Key'].iloc[0]
+    report = load_dataframe(conn, changed)
+    assert (report.inserted, report.updated, report.duplicates) == (0, 1, 0)
+    after = {key: (row_id, price, updated_at) for row_id, key, price, updated_at in _table(conn)}
+    assert after[key][:2] == (before[key][0], 9999.0) # Same ID, new price.
+    assert after[key][2] != before[key][2] # Updated_At moved for the changed bus...
+    assert {k: v for k, v in after.items() if k != key} == {k: v for k, v in before.items() if k != key} # ...only.
+    conn.close()
+
+
+def test_key_repeated_in_a_later_chunk_counts_as_duplicate(tmp_path, buses):
+    conn = sqlite3.connect(tmp_path / "buses.db")
+    first, again = buses.iloc[:10], buses.iloc[5:15]
+    report = load_chunks(conn, [first, again])
+    stored = conn.execute("SELECT COUNT(*) FROM bus_routes").fetchone()[0]
+    assert report.rows == 20
+    assert report.stored == report.inserted == stored
+    assert report.rows == report.stored + report.duplicates
+    conn.close()
+
+
+@pytest.fixture
+def mysql_conn():
+    if not MYSQL_DB:
+        pytest.skip("set REDBUS_TEST_MYSQL_DB (plus REDBUS_DB_HOST/PORT/USER/PASSWORD) to run against MySQL")
+    from db_pool import DatabaseConfig # Reads the connection settings.
+    import mysql.connector # Imports the MySQL driver.
+    config = DatabaseConfig.from_env()
+    conn = mysql.connector.connect(
+        host=config.host, port=config.port, user=config.user, password=config.password, database=MYSQL_DB,
+        allow_local_infile=True,
+    )
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS bus_routes") # Only ever the dedicated test database.
+    cursor.close()
+    yield conn
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS bus_routes")
+    cursor.close()
+    conn.close()
+
+
+@pytest.mark.parametrize("method", ["insert", "infile"])
+def test_reload_is_idempotent_on_mysql(mysql_conn, buses, method):
+    _assert_idempotent(mysql_conn, buses, method)
@@ -0,0 +1,96 @@
+"""Keyset pagination on Ratings (ties included) for SQLite and MySQL."""
+
+import os # Imports os for the optional MySQL settings.
+import sqlite3 # Imports sqlite3 for the local database.
+
+import pytest # Imports pytest for fixtures and skips.
+
+from loader import LOAD_COLUMNS, MYSQL_SCHEMA, ensure_schema # Imports the table schema.
+from queries import BusFilters, fetch_page, is_sqlite, iter_buses # Imports the paging queries.
+
+RATINGS = [3.7, 4.1, 3.7, 0.0, 4.5, 3.7, 4.1, 2.9, 3.7, 4.5, 3.8, 3.7] # Many ties on purpose.
+MYSQL_DB = os.environ.get("REDBUS_TEST_MYSQL_DB") # Scratch database for the MySQL-dialect tests.
+
+
+def _insert_buses(conn, ratings):
+    """Inserts one bus per rating, with every other column filled."""
+    mark = "?" if is_sqlite(conn) else "%s"
+    rows = [
+        (f"key{i:03d}", f"Operator {i % 3}", "A/C Sleeper", "10:00:00", "18:00:00", "8h 00m", 480,
+         rating, 500 + i, 20, "Hyderabad to Vijayawada", f"https://www.redbus.in/route/{i}", "Hyderabad", "Vijayawada")
+        for i, rating in enumerate(ratings)
+    ]
+    cursor = conn.cursor()
+    cursor.executemany(
+        f"INSERT INTO bus_routes ({', '.join(LOAD_COLUMNS)}) VALUES ({', '.join([mark] * len(LOAD_COLUMNS))})", rows
+    )
+    conn.commit()
+    cursor.close()
+
+
+def _assert_pages_cover_table(conn, descending):
+    """Pages of 2 rows visit every bus exactly once, in (Ratings, ID) order."""
+    columns = ['ID', 'Ratings']
+    seen, cursor = [], None
+    for _ in range(len(RATINGS) + 1): # A repeating cursor would loop; the bound turns that into a failure.
+        page, cursor = fetch_page(conn, BusFilters(), "Ratings", descending, cursor, 2, columns)
+        seen.extend(zip(page['Ratings'], page['ID']))
+        if cursor is None:
+            break
+    assert cursor is None
+    assert len(seen) == len(RATINGS)
+    assert seen == sorted(seen, reverse=descending)
+    streamed = [row_id for batch in iter_buses(conn, BusFilters(), "Ratings", descending, 3, columns) for row_id in batch['ID']]
+    assert streamed == [row_id for _, row_id in seen]
+
+
+@pytest.fixture
+def sqlite_conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "buses.db")
+    ensure_schema(conn)
+    _insert_buses(conn, RATINGS)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def mysql_conn():
+    if not MYSQL_DB:
+        pytest.skip("set REDBUS_TEST_MYSQL_DB (plus REDBUS_DB_HOST/PORT/USER/PASSWORD) to run against MySQL")
+    from db_pool import DatabaseConfig # Reads the connection settings.
+    import mysql.connector # Imports the MySQL driver.
+    config = DatabaseConfig.from_env()
+    conn = mysql.connector.connect(
+        host=config.host, port=config.port, user=config.user, password=config.password, database=MYSQL_DB
+    )
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS bus_routes") # Only ever the dedicated test database.
+    cursor.execute(MYSQL_SCHEMA.replace("DECIMAL(2,1)", "FLOAT(2,1)", 1)) # Table from the old FLOAT schema.
+    cursor.close()
+    ensure_schema(conn) # Must convert Ratings to DECIMAL.
+    _insert_buses(conn, RATINGS)
+    yield conn
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS bus_routes")
+    cursor.close()
+    conn.close()
+
+
+def test_mysql_schema_stores_ratings_exactly():
+    assert "Ratings DECIMAL(2,1)" in MYSQL_SCHEMA
+    assert "FLOAT" not in MYSQL_SCHEMA
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sqlite_keyset_paging_by_ratings(sqlite_conn, descending):
+    _assert_pages_cover_table(sqlite_conn, descending)
+
+
+def test_sort_by_id_without_id_column(sqlite_conn):
+    page, cursor = fetch_page(sqlite_conn, BusFilters(), "ID", False, None, 5, ['Bus_Name'])
+    assert list(page.columns) == ['Bus_Name'] and len(page) == 5 and cursor == (5, 5)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_mysql_keyset_paging_by_ratings(mysql_conn, descending):
+    _assert_pages_cover_table(mysql_conn, descending)
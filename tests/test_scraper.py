@@ -0,0 +1,139 @@
+"""Worker pool retries, backoff and checkpoint ordering of run_scrape()."""
+
+import os # Imports os for the fixture folder.
+import threading # Imports threading to guard the fake scrape state.
+
+import pytest # Imports pytest for fixtures and skips.
+from selenium.common.exceptions import WebDriverException # Imports the error that restarts a browser.
+
+import scraper # Imports the module whose sleep is recorded.
+from checkpoint import CheckpointStore # Imports the crawl store.
+from extraction import COLUMNS # Imports the bus-details column order.
+from fixture_server import serve_fixtures # Imports the local fixture server.
+from scraper import RetryPolicy, ScrapeJob, rebase_link, run_scrape # Imports the pool under test.
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+JOBS = [ScrapeJob("APSRTC", f"Route {i}", f"https://www.redbus.in/bus-tickets/route-{i}") for i in range(6)]
+
+
+class FakeDriver:
+    """Stands in for a Chrome session."""
+
+    def __init__(self):
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class FlakyScrape:
+    """Fails the first `failures[link]` attempts of a route, then returns one bus for it."""
+
+    def __init__(self, failures, error=RuntimeError):
+        self.failures = dict(failures)
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, driver, job, timeout):
+        with self._lock:
+            self.calls.append(job.route_link)
+            if self.failures.get(job.route_link, 0) > 0:
+                self.failures[job.route_link] -= 1
+                raise self.error(f"flaky {job.route_link}")
+        return [dict.fromkeys(COLUMNS, None) | {'Bus_Name': "Bus", 'Route_name': job.route_name, 'Route_Link': job.route_link}]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(scraper.time, "sleep", delays.append) # Records the backoff instead of waiting.
+    return delays
+
+
+def test_every_job_is_merged_once(sleeps):
+    df, failures = run_scrape(JOBS, workers=3, driver_factory=FakeDriver, scrape=FlakyScrape({}))
+    assert failures == []
+    assert sorted(df['Route_Link']) == sorted(job.route_link for job in JOBS)
+    assert list(df.columns) == COLUMNS
+    assert sleeps == []
+
+
+def test_retry_backs_off_exponentially_and_restarts_the_browser(sleeps):
+    drivers = []
+
+    def factory():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    job = JOBS[0]
+    scrape = FlakyScrape({job.route_link: 2}, error=WebDriverException)
+    policy = RetryPolicy(max_attempts=3, backoff=0.5)
+    df, failures = run_scrape([job], workers=1, policy=policy, driver_factory=factory, scrape=scrape)
+    assert failures == [] and len(df) == 1
+    assert sleeps == [0.5, 1.0]
+    assert len(drivers) == 3 # A WebDriver error discards the browser.
+    assert [d.quit_calls for d in drivers] == [1, 1, 1]
+
+
+def test_exhausted_job_is_reported_and_others_continue(sleeps, tmp_path):
+    bad = JOBS[1]
+    policy = RetryPolicy(max_attempts=2, backoff=1.0)
+    with CheckpointStore(str(tmp_path / "checkpoint.sqlite")) as checkpoint:
+        df, failures = run_scrape(
+            JOBS[:3], workers=1, policy=policy, driver_factory=FakeDriver,
+            scrape=FlakyScrape({bad.route_link: 5}), checkpoint=checkpoint,
+        )
+        status = checkpoint.status().set_index('Route_Link')['Status']
+    assert [(f.job, f.attempts) for f in failures] == [(bad, 2)]
+    assert sorted(df['Route_Link']) == sorted([JOBS[0].route_link, JOBS[2].route_link])
+    assert sleeps == [1.0]
+    assert status[bad.route_link] == "failed"
+
+
+class FailingCheckpoint(CheckpointStore):
+    """Checkpoint whose first `failures` writes raise, like a locked or full disk."""
+
+    def __init__(self, path, failures):
+        super().__init__(path)
+        self.failures = failures
+
+    def record_success(self, job, rows):
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("disk I/O error")
+        super().record_success(job, rows)
+
+
+def test_failed_checkpoint_write_is_retried_without_duplicate_rows(sleeps, tmp_path):
+    job = JOBS[0]
+    with FailingCheckpoint(str(tmp_path / "checkpoint.sqlite"), failures=1) as checkpoint:
+        df, failures = run_scrape([job], workers=1, driver_factory=FakeDriver, scrape=FlakyScrape({}), checkpoint=checkpoint)
+        stored = checkpoint.results()
+    assert failures == []
+    assert len(df) == 1 # Merged only after the checkpoint write succeeded.
+    assert len(stored) == 1
+
+
+def test_route_whose_checkpoint_never_succeeds_is_not_merged(sleeps, tmp_path):
+    job = JOBS[0]
+    policy = RetryPolicy(max_attempts=2, backoff=0.0)
+    with FailingCheckpoint(str(tmp_path / "checkpoint.sqlite"), failures=5) as checkpoint:
+        df, failures = run_scrape([job], workers=1, policy=policy, driver_factory=FakeDriver,
+                                  scrape=FlakyScrape({}), checkpoint=checkpoint)
+    assert df.empty
+    assert [f.job for f in failures] == [job]
+
+
+def test_scrapes_fixture_pages_with_chrome(tmp_path):
+    try:
+        from browser import make_driver # Imports the shared Chrome factory.
+        make_driver().quit()
+    except Exception as e: # No Chrome or chromedriver in this environment.
+        pytest.skip(f"Chrome is not available: {e}")
+    with serve_fixtures(FIXTURES) as base_url:
+        job = ScrapeJob("APSRTC", "Hyderabad to Vijayawada",
+                        rebase_link("https://www.redbus.in/bus-tickets/hyderabad-to-vijayawada", base_url))
+        df, failures = run_scrape([job], workers=1, policy=RetryPolicy(page_timeout=10.0))
+    assert failures == []
+    assert sorted(df['Bus_Name']) == ["APSRTC", "Orange Tours"]
@@ -0,0 +1,71 @@
+"""Incremental refresh of the local Arrow snapshot from bus_routes."""
+
+import sqlite3 # Imports sqlite3 for the local database.
+
+import pytest # Imports pytest for fixtures.
+
+from cleaning import CLEANED_PATH, clean_files # Imports the cleaning pipeline.
+from loader import load_dataframe # Imports the bulk loader.
+from snapshot import _fetch_changes, load_snapshot, refresh_snapshot # Imports the snapshot under test.
+
+OLD, LATEST = "2026-01-01 00:00:00", "2026-01-02 00:00:00" # Times of two earlier loads.
+
+
+@pytest.fixture(scope="module")
+def buses():
+    df = clean_files([CLEANED_PATH])
+    return df[df['Route_Link'].isin(df['Route_Link'].unique()[:3])].reset_index(drop=True) # A few routes.
+
+
+@pytest.fixture
+def conn(tmp_path, buses):
+    conn = sqlite3.connect(tmp_path / "buses.db")
+    load_dataframe(conn, buses)
+    # Spreads the load over two earlier times so the refresh window is one row wide.
+    conn.execute("UPDATE bus_routes SET Updated_At = ?", (OLD,))
+    conn.execute("UPDATE bus_routes SET Updated_At = ? WHERE ID = 1", (LATEST,))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _stored(conn):
+    return conn.execute("SELECT COUNT(*) FROM bus_routes").fetchone()[0]
+
+
+def test_first_refresh_builds_the_whole_snapshot(conn, tmp_path):
+    path = str(tmp_path / "bus_routes.arrow")
+    df = refresh_snapshot(conn, path)
+    assert len(df) == _stored(conn)
+    _, state = load_snapshot(path)
+    assert state == {'high_water_id': int(df['ID'].max()), 'last_updated_at': LATEST, 'rows': len(df)}
+
+
+def test_reloading_unchanged_data_fetches_nothing_new(conn, buses, tmp_path):
+    path = str(tmp_path / "bus_routes.arrow")
+    refresh_snapshot(conn, path)
+    load_dataframe(conn, buses) # Same rows again: nothing changes.
+    _, state = load_snapshot(path)
+    assert len(_fetch_changes(conn, state)) == 1 # Only the row at the last refresh time is re-read.
+    before = (tmp_path / "bus_routes.arrow").stat().st_mtime_ns
+    refresh_snapshot(conn, path)
+    assert (tmp_path / "bus_routes.arrow").stat().st_mtime_ns == before # No rewrite.
+
+
+def test_changed_and_new_rows_are_merged(conn, buses, tmp_path):
+    path = str(tmp_path / "bus_routes.arrow")
+    first = refresh_snapshot(conn, path)
+    changed = buses.copy()
+    changed.loc[5, 'Price'] = 9999.0 # One fare changes.
+    extra = buses.iloc[[0]].copy()
+    extra['Bus_Name'] = extra['Bus_Name'].cat.add_categories(["New Operator"])
+    extra['Bus_Name'] = "New Operator" # One bus is new.
+    load_dataframe(conn, changed)
+    load_dataframe(conn, extra)
+    _, state = load_snapshot(path)
+    assert len(_fetch_changes(conn, state)) == 3 # The changed row, the new row, and the one at the last refresh time.
+    df = refresh_snapshot(conn, path)
+    assert len(df) == len(first) + 1
+    assert (df['Price'] == 9999.0).sum() == 1
+    assert (df['Bus_Name'] == "New Operator").sum() == 1
+    assert df['ID'].is_unique